@@ -0,0 +1,220 @@
+/* Data layer: binary readers plus the fetch / parse / join tasks behind the
+   map. Loaded by index.html ahead of main.js and, as the same file, as
+   main.js's data worker; every task resolves to { value, transfer } so the
+   worker can hand its typed arrays over without copying them. */
+
+// Binary data files (scripts/binfile.py): uint32 header length, JSON
+// header, then 8-byte aligned little-endian columns viewed in place.
+const BIN_ARRAYS = {
+  float32: Float32Array, int32: Int32Array, uint16: Uint16Array, uint8: Uint8Array
+};
+
+function readBinHeader(buf) {
+  const n = new DataView(buf).getUint32(0, true);
+  return JSON.parse(new TextDecoder().decode(new Uint8Array(buf, 4, n)));
+}
+
+const binColumn = (buf, c) => new BIN_ARRAYS[c.dtype](buf, c.offset, c.length);
+
+// data/bundle.bin (scripts/build_bundle.py): one set of columns per table.
+// Text columns come as uint8 codes into labels[col].
+function readBundle(buf) {
+  const header = readBinHeader(buf);
+  const tables = {};
+  for (const [name, t] of Object.entries(header.tables)) {
+    const cols = {}, labels = {};
+    for (const [col, c] of Object.entries(t.columns)) {
+      cols[col] = binColumn(buf, c);
+      if (c.labels) labels[col] = c.labels;
+    }
+    tables[name] = { rows: t.rows, iso: cols.iso, cols, labels };
+  }
+  return { iso3: header.iso3, tables };
+}
+
+// data/europe*.merc.bin (scripts/build_mercator.py): one basemap level in
+// EPSG:3857 metres. Country i's rings are ring_offsets[feature_offsets[i]
+// .. feature_offsets[i + 1]], each a run of x,y pairs in coords.
+function readMercator(buf) {
+  const header = readBinHeader(buf);
+  const cols = {};
+  for (const [col, c] of Object.entries(header.columns)) cols[col] = binColumn(buf, c);
+  return { ids: header.ids, names: header.names, lods: header.lods || [], ...cols };
+}
+
+// A readMercator() level back in lon/lat as a GeoJSON FeatureCollection,
+// for ?tiles / ?merc pages, which draw from tiles but still pick, outline
+// and fit to countries as features. Every ring becomes its own polygon:
+// holes are only stroked and hit-tested, never filled, from these.
+function mercatorToGeo(level) {
+  const R = 6378137, deg = 180 / Math.PI;
+  const { coords, ring_offsets: ro, feature_offsets: fo } = level;
+  const features = level.ids.map((id, i) => {
+    const polygons = [];
+    for (let r = fo[i]; r < fo[i + 1]; r++) {
+      const ring = [];
+      for (let k = ro[r]; k < ro[r + 1]; k++) {
+        const x = coords[2 * k], y = coords[2 * k + 1];
+        ring.push([x / R * deg, (2 * Math.atan(Math.exp(y / R)) - Math.PI / 2) * deg]);
+      }
+      ring.push(ring[0]); // build_mercator.py drops the closing vertex
+      polygons.push([ring]);
+    }
+    return {
+      type: 'Feature', id,
+      properties: { ISO_A3: id, NAME_EN: level.names[i] },
+      geometry: { type: 'MultiPolygon', coordinates: polygons }
+    };
+  });
+  return { type: 'FeatureCollection', features };
+}
+
+const fetchOk = url =>
+  fetch(url).then(r => (r.ok ? r : Promise.reject(new Error(`${url}: ${r.status}`))));
+
+const fetchJSON = url => fetchOk(url).then(r => r.json());
+
+// Demographic shares: 0 where a country with a flow lacks one, NaN for
+// countries without a flow
+const SHARE_COLS = ['pct_women_adult', 'pct_children', 'pct_men_adult', 'pct_elderly'];
+// Path columns read as 0 when missing
+const PATH_ZERO_COLS = ['bar_dx', 'spawn_rate', 'share'];
+
+// Column `name` of table t; an absent one is added filled with NaN
+function tableColumn(t, name) {
+  if (!t.cols[name]) t.cols[name] = new Float32Array(t.rows).fill(NaN);
+  return t.cols[name];
+}
+
+// Refugee totals per destination, over the rows that have a flow
+function sumTotals(ids, values, rows) {
+  const sums = new Map();
+  for (const i of rows) sums.set(ids[i], (sums.get(ids[i]) || 0) + values[i]);
+  return { ids: [...sums.keys()], values: Float64Array.from(sums.values()) };
+}
+
+// Every distinct ArrayBuffer under `value`, for postMessage's transfer list
+function buffersIn(value, out = new Set()) {
+  if (ArrayBuffer.isView(value)) out.add(value.buffer);
+  else if (value && typeof value === 'object') Object.values(value).forEach(v => buffersIn(v, out));
+  return out;
+}
+
+// topojson-client for the worker: importScripts() from the first of `urls`
+// that loads. On the main thread main.js has loaded it before the task runs.
+function requireTopojson(urls = []) {
+  for (const url of urls) {
+    if (self.topojson || typeof importScripts !== 'function') break;
+    try { importScripts(url); } catch (_) {}
+  }
+  return Boolean(self.topojson?.feature);
+}
+
+// The first object of a TopoJSON document as a GeoJSON FeatureCollection
+function topoToGeo(doc) {
+  const objs = Object.values(doc?.objects || {});
+  return objs.length ? topojson.feature(doc, objs[0]) : null;
+}
+
+const timed = async (timings, name, fn) => {
+  const t = performance.now();
+  try { return await fn(); }
+  finally { timings[name] = +(performance.now() - t).toFixed(2); }
+};
+
+// Boot: the basemap and data/bundle.bin, fetched in parallel. The basemap
+// is the TopoJSON file decoded to GeoJSON (geo, null when topojson-client
+// did not load) or, given `merc` instead of `topo` (?tiles / ?merc pages),
+// the coarse merc.bin level, which needs no library; either way with its
+// levels of detail (lods). The bundle's tables come with missing cells
+// filled as the map reads them, the rows that have a flow and the totals
+// per destination.
+async function bootData({ topo, merc, bundle, topojson: libURLs }) {
+  const timings = {};
+  const noGeo = () => ({ geo: null, lods: [] });
+  const basemap = merc
+    ? timed(timings, 'fetch_merc', () => fetchOk(merc).then(r => r.arrayBuffer()))
+      .then(buf => timed(timings, 'decode_merc', () => {
+        const level = readMercator(buf);
+        return { geo: mercatorToGeo(level), lods: level.lods };
+      }))
+    : timed(timings, 'fetch_topo', () => fetchJSON(topo))
+      .then(doc => (requireTopojson(libURLs)
+        ? timed(timings, 'decode_topo', () => ({ geo: topoToGeo(doc), lods: doc.lods || [] }))
+        : noGeo()));
+  const [geoOut, bundleOut] = await Promise.all([
+    basemap.catch(noGeo),
+    timed(timings, 'fetch_bundle', () => fetchOk(bundle).then(r => r.arrayBuffer()))
+      .then(buf => timed(timings, 'parse_bundle', () => readBundle(buf)))
+      .then(b => ({ bundle: b }), e => ({ error: String(e?.message || e) }))
+  ]);
+  const value = { ...geoOut, timings, ...bundleOut };
+  const b = bundleOut.bundle;
+  if (b) {
+    await timed(timings, 'join', () => {
+      const empty = { rows: 0, iso: new Uint16Array(0), cols: {}, labels: {} };
+      const ct = b.tables.countries || (b.tables.countries = empty);
+      const fp = b.tables.flow_paths || (b.tables.flow_paths = { ...empty, labels: { category: [] } });
+      const ids = Array.from(ct.iso, k => b.iso3[k]);
+      const total = tableColumn(ct, 'total_refugees');
+      const flowRows = [];
+      for (let i = 0; i < ct.rows; i++) {
+        const hasFlow = Number.isFinite(total[i]);
+        if (hasFlow) flowRows.push(i);
+        for (const c of SHARE_COLS) {
+          const a = tableColumn(ct, c);
+          a[i] = hasFlow ? (Number.isFinite(a[i]) ? a[i] : 0) : NaN;
+        }
+      }
+      for (const c of PATH_ZERO_COLS) {
+        const a = tableColumn(fp, c);
+        for (let i = 0; i < fp.rows; i++) if (!Number.isFinite(a[i])) a[i] = 0;
+      }
+      ct.flowRows = Uint16Array.from(flowRows);
+      value.totals = sumTotals(ids, total, flowRows);
+    });
+  }
+  return { value, transfer: [...buffersIn([b, value.totals])] };
+}
+
+// One month of data/flows_ua_series/ as columns, keeping destinations in
+// `known` (the ones with an anchor); totals are summed the same way
+async function monthData(url, known) {
+  const doc = await fetchJSON(url);
+  const keep = new Set(known);
+  const rows = (doc.dest_iso3 || []).flatMap((id, i) => (keep.has(id) ? [i] : []));
+  const num = (key, i) => {
+    const v = doc[key]?.[i];
+    return v == null ? NaN : +v;
+  };
+  const ids = rows.map(i => doc.dest_iso3[i]);
+  const cols = { total_refugees: Float64Array.from(rows, i => num('total_refugees', i) || 0) };
+  for (const c of SHARE_COLS) cols[c] = Float64Array.from(rows, i => num(c, i));
+  const totals = sumTotals(ids, cols.total_refugees, ids.keys());
+  const value = { ids, cols, totals };
+  return { value, transfer: [...buffersIn(value)] };
+}
+
+// A finer basemap level (data/europe.lod*.topo.json) as GeoJSON
+async function geoData(url, libURLs) {
+  const doc = await fetchJSON(url);
+  if (!requireTopojson(libURLs)) throw new Error('topojson-client failed to load');
+  return { value: topoToGeo(doc), transfer: [] };
+}
+
+const DATA_TASKS = { boot: bootData, month: monthData, geo: geoData };
+// Tasks that decode TopoJSON, so need topojson-client (boot only when
+// given a `topo` file)
+const needsTopojson = (task, args) => task === 'geo' || (task === 'boot' && Boolean(args[0]?.topo));
+
+// As the worker: run a task per message and transfer its arrays back
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+  self.onmessage = async ({ data: { id, task, args } }) => {
+    try {
+      const { value, transfer } = await DATA_TASKS[task](...args);
+      self.postMessage({ id, value }, transfer);
+    } catch (e) {
+      self.postMessage({ id, error: String(e?.message || e) });
+    }
+  };
+}
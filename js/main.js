@@ -5,6 +5,10 @@ window.bb = {
   factors: {},
   _mapData: null,
   map: null,
+  perf: null,
+  // Content-hashed names of a published build (scripts/publish.py), inlined
+  // into index.html; empty when served straight from the repo
+  assets: JSON.parse(document.getElementById('bb-assets')?.textContent || '{}'),
   dump() {
     return {
       mapType: this._mapData?.type || null,
@@ -18,11 +22,87 @@ window.bb = {
 // Demographic minis: always render all four categories
 const getActiveFactors = () => ['women', 'children', 'men', 'elderly'];
 
+// ?tiles: paint countries from the static vector tiles in data/tiles/
+// (scripts/build_tiles.py) on canvas instead of one SVG path per country
+const USE_TILES = new URLSearchParams(location.search).has('tiles');
+// ?merc: the same canvas layer, with each tile cut in the browser from the
+// basemap levels pre-projected to Web Mercator (scripts/build_mercator.py)
+const USE_MERC = new URLSearchParams(location.search).has('merc');
+// ?webgl: flow particles and minis bars as instanced WebGL quads, one draw
+// call each; Canvas2D / SVG stay in place where WebGL is unavailable
+const USE_WEBGL = new URLSearchParams(location.search).has('webgl');
+
+// ?perf: User Timing spans for boot (libs, fetch, parse, join, layers) and
+// every safe() render call, plus a rolling histogram of particle frame
+// times. window.bb.perf.report() returns them, .download() saves the report
+// as JSON; ?perf=N downloads it by itself N seconds after boot.
+const PERF_PARAM = new URLSearchParams(location.search).get('perf');
+const perf = createPerf(PERF_PARAM !== null);
+window.bb.perf = perf;
+
 const getBoxMode = () =>
   (document.querySelector('input[name=boxmode]:checked')?.value === 'side'
     ? 'side'
     : 'stack');
 
+// URL of a repo-relative asset: its hashed copy in a published build
+function asset(path) {
+  const { files = {}, dirs = {} } = window.bb.assets;
+  if (files[path]) return files[path];
+  for (const dir in dirs) {
+    if (path.startsWith(dir)) return dirs[dir] + path.slice(dir.length);
+  }
+  return path;
+}
+
+// Absolute asset URL, for fetches made from the data worker
+const assetURL = path => new URL(asset(path), location.href).href;
+
+// js/data.js's tasks run in a worker when one starts (not from file://
+// pages, not in old browsers) and on the main thread otherwise; the
+// results are the same typed columns either way.
+function createDataTasks() {
+  const pending = new Map(); // id -> { task, args, resolve, reject }
+  // On the main thread the TopoJSON tasks need topojson-client here first;
+  // the worker imports it itself
+  const local = (task, args) =>
+    (needsTopojson(task, args) ? loadLib('topojson').catch(e => console.warn('[data] topojson', e)) : Promise.resolve())
+      .then(() => DATA_TASKS[task](...args))
+      .then(r => r.value);
+  let worker = null;
+  let seq = 0;
+  try { worker = new Worker(asset('js/data.js')); }
+  catch (e) { console.warn('[data] no worker, loading on the main thread', e); }
+  if (worker) {
+    worker.onmessage = ({ data }) => {
+      const p = pending.get(data.id);
+      if (!p) return;
+      pending.delete(data.id);
+      if (data.error) p.reject(new Error(data.error));
+      else p.resolve(data.value);
+    };
+    // The worker script failed to load: finish what was sent here
+    worker.onerror = e => {
+      e.preventDefault();
+      console.warn('[data] worker failed, loading on the main thread', e.message);
+      worker.terminate();
+      worker = null;
+      for (const p of pending.values()) local(p.task, p.args).then(p.resolve, p.reject);
+      pending.clear();
+    };
+  }
+  const run = (task, ...args) => {
+    if (!worker) return local(task, args);
+    return new Promise((resolve, reject) => {
+      const id = seq++;
+      pending.set(id, { task, args, resolve, reject });
+      worker.postMessage({ id, task, args });
+    });
+  };
+  run.inWorker = () => worker !== null;
+  return run;
+}
+
 function loadScript(src) {
   return new Promise((res, rej) => {
     const s = document.createElement('script');
@@ -34,22 +114,339 @@ function loadScript(src) {
   });
 }
 
+// Ahead of the page's own stylesheets, so css/styles.css still wins
+function loadStyle(href) {
+  return new Promise((res, rej) => {
+    const l = document.createElement('link');
+    l.rel = 'stylesheet';
+    l.href = href;
+    l.onload = res;
+    l.onerror = rej;
+    document.head.insertBefore(l, document.querySelector('link[rel=stylesheet]'));
+  });
+}
+
+// data/tiles/{z}/{x}/{y}.pbf (scripts/build_tiles.py): Mapbox Vector Tile
+// protobuf. Returns the first layer's polygons as
+// { extent, features: [{ id, iso3, name, rings: [Int32Array x,y,...] }] }.
+function readVectorTile(buf) {
+  const bytes = new Uint8Array(buf);
+  let pos = 0;
+  const varint = () => {
+    let v = 0, mul = 1, b;
+    do { b = bytes[pos++]; v += (b & 0x7f) * mul; mul *= 128; } while (b & 0x80);
+    return v;
+  };
+  const packed = () => {
+    const end = varint() + pos, out = [];
+    while (pos < end) out.push(varint());
+    return out;
+  };
+  const string = () => {
+    const len = varint();
+    pos += len;
+    return new TextDecoder().decode(bytes.subarray(pos - len, pos));
+  };
+  const skip = wire => {
+    if (wire === 0) varint();
+    else if (wire === 1) pos += 8;
+    else if (wire === 2) pos += varint();
+    else if (wire === 5) pos += 4;
+  };
+  const fields = (end, on) => {
+    while (pos < end) {
+      const key = varint();
+      if (!on(key >>> 3, key & 7)) skip(key & 7);
+    }
+  };
+  const zigzag = n => (n % 2 ? -(n + 1) / 2 : n / 2);
+
+  function rings(cmds) {
+    const out = [];
+    let x = 0, y = 0, ring = null;
+    for (let i = 0; i < cmds.length;) {
+      const id = cmds[i] & 7, count = cmds[i++] >>> 3;
+      if (id === 7) { if (ring) out.push(Int32Array.from(ring)); ring = null; continue; }
+      for (let k = 0; k < count; k++) {
+        x += zigzag(cmds[i++]); y += zigzag(cmds[i++]);
+        if (id === 1) ring = [];
+        ring.push(x, y);
+      }
+    }
+    return out;
+  }
+
+  let layer = null;
+  fields(bytes.length, (num, wire) => {
+    if (num !== 3 || wire !== 2 || layer) return false;
+    const end = varint() + pos;
+    const keys = [], values = [], raw = [];
+    layer = { extent: 4096, features: [] };
+    fields(end, (n, w) => {
+      if (n === 5 && w === 0) layer.extent = varint();
+      else if (n === 3 && w === 2) keys.push(string());
+      else if (n === 4 && w === 2) {
+        const vend = varint() + pos;
+        let v = null;
+        fields(vend, (vn, vw) => (vn === 1 && vw === 2 ? ((v = string()), true) : false));
+        values.push(v);
+      } else if (n === 2 && w === 2) {
+        const fend = varint() + pos, f = { id: null, tags: [], geom: [] };
+        fields(fend, (fn, fw) => {
+          if (fn === 1 && fw === 0) f.id = varint();
+          else if (fn === 2 && fw === 2) f.tags = packed();
+          else if (fn === 4 && fw === 2) f.geom = packed();
+          else return false;
+          return true;
+        });
+        raw.push(f);
+      } else return false;
+      return true;
+    });
+    for (const f of raw) {
+      const props = {};
+      for (let i = 0; i < f.tags.length; i += 2) props[keys[f.tags[i]]] = values[f.tags[i + 1]];
+      layer.features.push({ id: f.id, iso3: props.dest_iso3, name: props.name, rings: rings(f.geom) });
+    }
+    return true;
+  });
+  return layer || { extent: 4096, features: [] };
+}
+
+// WebGL2, or WebGL1 with ANGLE_instanced_arrays, behind one instancing
+// API; null when neither is available (the canvas then has no context, or
+// a WebGL1 one it should be swapped out for)
+function glContext(canvas, attrs) {
+  const gl2 = canvas.getContext('webgl2', attrs);
+  if (gl2) {
+    return {
+      gl: gl2,
+      divisor: (loc, n) => gl2.vertexAttribDivisor(loc, n),
+      drawInstanced: (mode, first, count, instances) => gl2.drawArraysInstanced(mode, first, count, instances)
+    };
+  }
+  const gl = canvas.getContext('webgl', attrs);
+  const ext = gl?.getExtension('ANGLE_instanced_arrays');
+  if (!ext) return null;
+  return {
+    gl,
+    divisor: (loc, n) => ext.vertexAttribDivisorANGLE(loc, n),
+    drawInstanced: (mode, first, count, instances) => ext.drawArraysInstancedANGLE(mode, first, count, instances)
+  };
+}
+
+function glProgram(gl, vertexSrc, fragmentSrc) {
+  const prog = gl.createProgram();
+  for (const [type, src] of [[gl.VERTEX_SHADER, vertexSrc], [gl.FRAGMENT_SHADER, fragmentSrc]]) {
+    const shader = gl.createShader(type);
+    gl.shaderSource(shader, src);
+    gl.compileShader(shader);
+    if (!gl.getShaderParameter(shader, gl.COMPILE_STATUS)) throw new Error(gl.getShaderInfoLog(shader));
+    gl.attachShader(prog, shader);
+  }
+  gl.linkProgram(prog);
+  if (!gl.getProgramParameter(prog, gl.LINK_STATUS)) throw new Error(gl.getProgramInfoLog(prog));
+  gl.useProgram(prog);
+  return prog;
+}
+
+// Float attribute `name` read from `buffer`; per instance when divisor is 1
+function glAttrib(ctx, prog, name, buffer, size, divisor = 0) {
+  const { gl } = ctx;
+  const loc = gl.getAttribLocation(prog, name);
+  gl.bindBuffer(gl.ARRAY_BUFFER, buffer);
+  gl.enableVertexAttribArray(loc);
+  gl.vertexAttribPointer(loc, size, gl.FLOAT, false, 0, 0);
+  ctx.divisor(loc, divisor);
+}
+
 function safe(fn, tag) {
-  try { return fn(); }
+  try { return perf.span(`render:${fn.name || tag}`, fn, { tag }); }
   catch (e) { console.error(tag || '[safe]', e); }
 }
 
-async function ensureLibs() {
-  if (!window.L) throw new Error('Leaflet missing');
-  if (!window.d3) {
-    await loadScript('https://cdn.jsdelivr.net/npm/d3@7/dist/d3.min.js');
+const FRAME_WINDOW = 600; // frames kept for the rolling histogram (~10 s at 60 fps)
+const FRAME_BUCKETS = [2, 4, 8, 12, 16.7, 20, 25, 33.3, 50, 100, Infinity]; // ms, upper bounds
+const MAX_SPANS = 5000;
+
+function createPerf(enabled) {
+  const spans = [];
+  // Particle engine: time spent in one step() and the interval between steps
+  const work = new Float64Array(FRAME_WINDOW);
+  const interval = new Float64Array(FRAME_WINDOW);
+  const particles = new Uint32Array(FRAME_WINDOW);
+  let frames = 0;
+  let seq = 0;
+
+  const record = (name, start, detail) => {
+    const end = performance.now();
+    try { performance.measure(`bb:${name}`, { start, end, detail }); }
+    catch (_) {} // User Timing L2 only: the report still has the span
+    spans.push({ name, start: +start.toFixed(2), duration: +(end - start).toFixed(2), ...detail });
+    if (spans.length > MAX_SPANS) spans.shift();
+  };
+
+  // Returns a function that closes the span
+  const start = (name, detail = {}) => {
+    if (!enabled) return () => {};
+    const t = performance.now();
+    performance.mark(`bb:${name}:start#${seq++}`);
+    return extra => record(name, t, { ...detail, ...extra });
+  };
+
+  // Times fn; a returned promise closes the span when it settles
+  const span = (name, fn, detail) => {
+    if (!enabled) return fn();
+    const end = start(name, detail);
+    let out;
+    try { out = fn(); }
+    catch (e) { end({ error: String(e) }); throw e; }
+    if (out && typeof out.then === 'function') {
+      out.then(() => end(), e => end({ error: String(e) }));
+    } else {
+      end();
+    }
+    return out;
+  };
+
+  const frame = (workMs, intervalMs, n) => {
+    if (!enabled) return;
+    const i = frames++ % FRAME_WINDOW;
+    work[i] = workMs;
+    interval[i] = intervalMs;
+    particles[i] = n;
+  };
+
+  const stats = buf => {
+    const n = Math.min(frames, FRAME_WINDOW);
+    const v = Float64Array.from(buf.subarray(0, n)).sort();
+    const q = p => (n ? +v[Math.min(n - 1, Math.floor(p * n))].toFixed(2) : null);
+    const counts = FRAME_BUCKETS.map(() => 0);
+    for (const x of v) counts[FRAME_BUCKETS.findIndex(le => x <= le)]++;
+    return {
+      mean: n ? +(v.reduce((a, b) => a + b, 0) / n).toFixed(2) : null,
+      p50: q(0.5), p95: q(0.95), p99: q(0.99), max: n ? +v[n - 1].toFixed(2) : null,
+      histogram: FRAME_BUCKETS.map((le, k) => ({ le: Number.isFinite(le) ? le : null, count: counts[k] }))
+    };
+  };
+
+  const report = () => {
+    const byName = {};
+    for (const s of spans) {
+      const agg = byName[s.name] ||= { count: 0, total: 0, max: 0 };
+      agg.count++;
+      agg.total = +(agg.total + s.duration).toFixed(2);
+      agg.max = Math.max(agg.max, s.duration);
+    }
+    const nav = performance.getEntriesByType('navigation')[0];
+    const n = Math.min(frames, FRAME_WINDOW);
+    return {
+      version: 1,
+      created: new Date().toISOString(),
+      url: location.href,
+      enabled,
+      env: {
+        userAgent: navigator.userAgent,
+        cores: navigator.hardwareConcurrency || null,
+        memoryGB: navigator.deviceMemory || null,
+        screen: [screen.width, screen.height, devicePixelRatio],
+        viewport: [innerWidth, innerHeight]
+      },
+      navigation: nav ? {
+        domContentLoaded: +nav.domContentLoadedEventEnd.toFixed(2),
+        load: +nav.loadEventEnd.toFixed(2)
+      } : null,
+      resources: performance.getEntriesByType('resource')
+        .filter(r => /\/(data|js|css)\//.test(r.name))
+        .map(r => ({
+          name: r.name.replace(location.origin, ''),
+          start: +r.startTime.toFixed(2),
+          duration: +r.duration.toFixed(2),
+          bytes: r.transferSize || r.encodedBodySize || 0
+        })),
+      summary: byName,
+      spans: spans.slice(),
+      frames: {
+        count: frames,
+        window: n,
+        particles: n ? Math.round(particles.subarray(0, n).reduce((a, b) => a + b, 0) / n) : 0,
+        work: stats(work),
+        interval: stats(interval)
+      }
+    };
+  };
+
+  const download = (name = `bb-perf-${new Date().toISOString().replace(/[:.]/g, '-')}.json`) => {
+    const blob = new Blob([JSON.stringify(report(), null, 1)], { type: 'application/json' });
+    const a = document.createElement('a');
+    a.href = URL.createObjectURL(blob);
+    a.download = name;
+    document.body.appendChild(a);
+    a.click();
+    a.remove();
+    setTimeout(() => URL.revokeObjectURL(a.href), 0);
+  };
+
+  return { enabled, start, span, frame, report, download };
+}
+
+// Libraries served from js/vendor/ (scripts/vendor.py, run by publish.py);
+// the CDN copy is used when the local one is missing
+const LIBS = {
+  leaflet: {
+    src: 'js/vendor/leaflet.js',
+    cdn: 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.js',
+    css: {
+      src: 'css/vendor/leaflet.css',
+      cdn: 'https://unpkg.com/leaflet@1.9.4/dist/leaflet.css'
+    },
+    ready: () => window.L
+  },
+  d3: {
+    src: 'js/vendor/d3.min.js',
+    cdn: 'https://cdn.jsdelivr.net/npm/d3@7/dist/d3.min.js',
+    ready: () => window.d3
+  },
+  topojson: {
+    src: 'js/vendor/topojson-client.min.js',
+    cdn: 'https://cdn.jsdelivr.net/npm/topojson-client@3/dist/topojson-client.min.js',
+    ready: () => window.topojson
   }
-  if (!window.d3) throw new Error('d3 failed');
-  if (!window.topojson) {
-    try {
-      await loadScript('https://cdn.jsdelivr.net/npm/topojson-client@3/dist/topojson-client.min.js');
-    } catch (_) {}
+};
+const libLoads = new Map(); // name -> Promise
+
+// A published build lists every file it ships, so a vendored file it lacks
+// goes straight to the CDN instead of through a 404
+function loadVendored(load, { src, cdn }) {
+  const { files } = window.bb.assets;
+  if (files && !files[src]) return load(cdn);
+  return load(asset(src)).catch(() => load(cdn));
+}
+
+// The URLs loadVendored() would try, absolute, for the data worker's
+// importScripts()
+function vendoredURLs({ src, cdn }) {
+  const { files } = window.bb.assets;
+  return files && !files[src] ? [cdn] : [assetURL(src), cdn];
+}
+
+function loadLib(name) {
+  const lib = LIBS[name];
+  if (!libLoads.has(name)) {
+    libLoads.set(name, lib.ready()
+      ? Promise.resolve()
+      : Promise.all([
+        loadVendored(loadScript, lib),
+        lib.css && loadVendored(loadStyle, lib.css).catch(e => console.warn(`[libs] ${name} css`, e))
+      ]).then(() => (lib.ready() ? undefined : Promise.reject(new Error(`${name} failed`)))));
   }
+  return libLoads.get(name);
+}
+
+// Leaflet and d3 in parallel; topojson-client is only needed where
+// TopoJSON is decoded, which the data worker does (createDataTasks)
+async function ensureLibs() {
+  await Promise.all([loadLib('leaflet'), loadLib('d3')]);
 }
 
 const formatCount = v =>
@@ -59,6 +456,7 @@ const comparePins = [];
 let selectedCountries = new Set();
 let countryNames = Object.create(null);
 let flows = [];
+let flowsById = new Map(); // dest_iso3 -> row of flows
 let factors = {};
 let totals = {};
 let totalScale = null;
@@ -144,9 +542,11 @@ function updateCompareToggle() {
   }
 
 (async function boot() {
-  try { await ensureLibs(); }
+  const endBoot = perf.start('boot');
+  try { await perf.span('boot:libs', ensureLibs); }
   catch (e) {
     console.error('[boot] libs', e);
+    endBoot({ error: 'libs' });
     window.bb.ready = true;
     return;
   }
@@ -209,6 +609,7 @@ function updateCompareToggle() {
   const labelLayer  = L.layerGroup({ pane: 'labels' }).addTo(map);
   selectionLayer = L.layerGroup({ pane: 'selection' }).addTo(map);
   let countryLayer  = null;
+  let countryTiles  = null; // ?tiles
   const countryLabels = new Map();
 
   // Country picker state
@@ -224,6 +625,7 @@ function updateCompareToggle() {
     .append('g')
     .attr('class', 'mini-root leaflet-zoom-animated')
     .style('pointer-events', 'visiblePainted');
+  let miniBars; // ?webgl renderer, set up on the first drawMinis(); null = SVG
 const miniTooltip = (() => {
   const el = document.createElement('div');
   el.className = 'mini-tooltip';
@@ -236,33 +638,10 @@ const miniTooltip = (() => {
 })();
 
   // Helpers / aliases
-  const FLOW_KEYS = {
-    dest_iso3: ['dest_iso3', 'iso3', 'ISO3', 'country_code', 'code'],
-    lat:       ['lat', 'latitude'],
-    lon:       ['lon', 'lng', 'longitude'],
-    tot:       ['total_refugees', 'refugees', 'count', 'n']
-  };
-  const COLOR_KEYS = {
-    kids:        ['pct_children', 'children_pct'],
-    women_adult: ['pct_women_adult'],
-    men_adult:   ['pct_men_adult'],
-    old:         ['pct_elderly', 'elderly_pct']
-  };
-
-  const gf = (o, a, d = 0) => {
-    for (const k of a) {
-      const v = o?.[k];
-      if (v !== '' && v != null && Number.isFinite(+v)) return +v;
-    }
-    return d;
-  };
-
-  const gs = (o, a) => {
-    for (const k of a) {
-      const v = o?.[k];
-      if (v !== '' && v != null) return String(v);
-    }
-    return '';
+  // Cell `i` of a bundle column; absent columns and missing cells read as `d`
+  const cell = (t, col, i, d = NaN) => {
+    const v = t.cols[col]?.[i];
+    return Number.isFinite(v) ? v : d;
   };
 
   const iso = p =>
@@ -292,21 +671,12 @@ const miniTooltip = (() => {
     'SVK','SVN','SWE'
   ]);
 
-  const NAME_TO_ISO3 = {
-    'austria':'AUT','belgium':'BEL','bulgaria':'BGR','croatia':'HRV','cyprus':'CYP',
-    'czechia':'CZE','denmark':'DNK','estonia':'EST','finland':'FIN','france':'FRA',
-    'germany':'DEU','greece':'GRC','hungary':'HUN','ireland':'IRL','italy':'ITA',
-    'latvia':'LVA','lithuania':'LTU','luxembourg':'LUX','malta':'MLT',
-    'netherlands':'NLD','poland':'POL','portugal':'PRT','romania':'ROU',
-    'slovakia':'SVK','slovenia':'SVN','spain':'ESP','sweden':'SWE'
-  };
-
   // Arrow origin (Ukraine-ish)
-  const ARROW_ORIGIN = [49.0, 32.0];
 
   flows   = [];
   factors = {};
   let mapData = null;
+  let mapLods = []; // the boot file's levels of detail
 
   // Arrow destination lat/lon per ISO3
   const destLL = Object.create(null);
@@ -314,6 +684,9 @@ const miniTooltip = (() => {
   // Minis / centroids location per ISO3
   const centroidLL = Object.create(null);
 
+  // Label anchor per ISO3 (scripts/build_anchors.py via the bundle)
+  const labelAnchor = Object.create(null);
+
 const isCountryVisible = id =>
   selectedCountries.size ? selectedCountries.has(id) : false;
 
@@ -353,9 +726,16 @@ const getCountryStyle = id => {
 };
 
   // Scales
-  const widthScale = d3.scaleSqrt().range([1, 12]);
   const arrowColor = d3.scaleSequential(d3.interpolatePlasma).domain([0, 1]).clamp(true);
+  // Particle schedule for the arrows (scripts/build_flow_paths.py): one
+  // straight path per destination and category, ending on that category's
+  // minis bar. Month views rescale the rates by the same rule.
   const PEOPLE_PER_PARTICLE = 10000; // target people represented by one dot (denser for visibility)
+  const FLOW_COLOR = '#ffffff';
+  const TAIL_LEN = 22;     // px
+  const TAIL_DELAY = 0.06; // of the path, before a dot grows its tail
+  let latestPaths = [];
+  let flowPaths = [];
   const DEMO_CATS = [
     { key: 'men',      color: '#3b82f6' }, // bright blue
     { key: 'women',    color: '#ec4899' }, // vivid pink
@@ -377,19 +757,129 @@ const getCountryStyle = id => {
     };
   };
 
+  // ?webgl particles: every particle is one instance of a 12-vertex mesh,
+  // a 1 px tail band fading back along the flow plus the dot, placed from
+  // the engine's position buffer. Blending is additive like 'lighter'.
+  const PARTICLE_VS = `
+    attribute vec3 a_corner;  // tail: along, across, 0 / dot: x, y, 1
+    attribute vec2 a_pos;     // dot, container px
+    attribute vec2 a_tail;    // dot to tail end, px (0 while the tail is hidden)
+    uniform vec2 u_scale;     // px -> clip space
+    varying float v_alpha;
+    void main() {
+      vec2 p;
+      if (a_corner.z < 0.5) {
+        vec2 n = normalize(vec2(-a_tail.y, a_tail.x) + 1e-6);
+        p = a_pos + a_tail * a_corner.x + n * a_corner.y;
+        v_alpha = 1.0 - a_corner.x;
+      } else {
+        p = a_pos + a_corner.xy * 1.4;
+        v_alpha = 0.95;
+      }
+      gl_Position = vec4(p * u_scale + vec2(-1.0, 1.0), 0.0, 1.0);
+    }`;
+  const PARTICLE_FS = `
+    precision mediump float;
+    uniform vec3 u_color;
+    varying float v_alpha;
+    void main() { gl_FragColor = vec4(u_color * v_alpha, v_alpha); }`;
+  const PARTICLE_MESH = new Float32Array([
+    0, -0.5, 0,  1, -0.5, 0,  1, 0.5, 0,     0, -0.5, 0,  1, 0.5, 0,  0, 0.5, 0,
+    -0.5, -0.5, 1,  0.5, -0.5, 1,  0.5, 0.5, 1,  -0.5, -0.5, 1,  0.5, 0.5, 1,  -0.5, 0.5, 1
+  ]);
+
+  function createParticleGL(canvas, capacity) {
+    const ctx = glContext(canvas, { antialias: false, premultipliedAlpha: true });
+    if (!ctx) return null;
+    const { gl } = ctx;
+    let prog;
+    try { prog = glProgram(gl, PARTICLE_VS, PARTICLE_FS); }
+    catch (e) { console.warn('[webgl]', e); return null; }
+    const buffer = (data, usage) => {
+      const b = gl.createBuffer();
+      gl.bindBuffer(gl.ARRAY_BUFFER, b);
+      gl.bufferData(gl.ARRAY_BUFFER, data, usage);
+      return b;
+    };
+    const posBuf = buffer(0, gl.DYNAMIC_DRAW);
+    const tailBuf = buffer(0, gl.DYNAMIC_DRAW);
+    glAttrib(ctx, prog, 'a_corner', buffer(PARTICLE_MESH, gl.STATIC_DRAW), 3);
+    glAttrib(ctx, prog, 'a_pos', posBuf, 2, 1);
+    glAttrib(ctx, prog, 'a_tail', tailBuf, 2, 1);
+    const color = d3.color(FLOW_COLOR);
+    gl.uniform3f(gl.getUniformLocation(prog, 'u_color'), color.r / 255, color.g / 255, color.b / 255);
+    const uScale = gl.getUniformLocation(prog, 'u_scale');
+    gl.enable(gl.BLEND);
+    gl.blendFunc(gl.ONE, gl.ONE);
+    let tails;
+    // Room for `n` particles in the instance buffers
+    const reserve = n => {
+      for (const b of [posBuf, tailBuf]) {
+        gl.bindBuffer(gl.ARRAY_BUFFER, b);
+        gl.bufferData(gl.ARRAY_BUFFER, n * 8, gl.DYNAMIC_DRAW);
+      }
+      tails = new Float32Array(n * 2);
+    };
+    reserve(capacity);
+
+    const clear = () => {
+      gl.viewport(0, 0, canvas.width, canvas.height);
+      gl.clearColor(0, 0, 0, 0);
+      gl.clear(gl.COLOR_BUFFER_BIT);
+    };
+    return {
+      clear,
+      reserve,
+      draw({ count, u, flow, pos, geom }) {
+        clear();
+        if (!count) return;
+        for (let i = 0; i < count; i++) {
+          const g = 6 * flow[i], on = u[i] > TAIL_DELAY;
+          tails[2 * i] = on ? geom[g + 4] : 0;
+          tails[2 * i + 1] = on ? geom[g + 5] : 0;
+        }
+        gl.bindBuffer(gl.ARRAY_BUFFER, posBuf);
+        gl.bufferSubData(gl.ARRAY_BUFFER, 0, pos.subarray(0, 2 * count));
+        gl.bindBuffer(gl.ARRAY_BUFFER, tailBuf);
+        gl.bufferSubData(gl.ARRAY_BUFFER, 0, tails.subarray(0, 2 * count));
+        gl.uniform2f(uScale, 2 / canvas.width, -2 / canvas.height);
+        ctx.drawInstanced(gl.TRIANGLES, 0, PARTICLE_MESH.length / 3, count);
+      }
+    };
+  }
+
+  // Dots per second along a path; a trickle even where the rate is 0
+  const spawnRate = f => Math.max(0.05, f.spawnRate || 0);
+
   class FlowParticleEngine {
     constructor(map, paneName = 'arrows') {
       this.map = map;
       this.pane = map.getContainer();
+      this.maxParticles = 0; // sized from the paths by setFlows()
       this.canvas = L.DomUtil.create('canvas', 'flow-canvas');
-      this.ctx = this.canvas.getContext('2d');
+      // Same engine either way: the WebGL renderer replaces drawFrame()'s
+      // Canvas2D calls and needs no tail gradients
+      this.gl = USE_WEBGL ? createParticleGL(this.canvas, this.maxParticles) : null;
+      if (USE_WEBGL && !this.gl) this.canvas = L.DomUtil.create('canvas', 'flow-canvas');
+      this.ctx = this.gl ? null : this.canvas.getContext('2d');
       this.pane.appendChild(this.canvas);
       this.flows = [];
-      this.particles = [];
+      // Per flow, in container px: start x, y, start-to-end vector x, y and
+      // the tail's far end relative to the dot; plus its tail gradient
+      this.geom = new Float32Array(0);
+      this.tails = [];
       this.last = performance.now();
       this.running = false;
       this.dirty = true;
-      this.maxParticles = 12000;
+      // Particle pool, one typed array per field: live particles fill
+      // 0..count-1 and a finished one is replaced by the last (kill()), so
+      // nothing is allocated per particle or per frame. pos holds each
+      // particle's x, y after update().
+      this.u = new Float32Array(0);
+      this.speed = new Float32Array(0);
+      this.flow = new Uint16Array(0);
+      this.pos = new Float32Array(0);
+      this.count = 0;
       this.fade = 0.06; // fade a bit quicker so tails vanish faster
       this._tick = this.step.bind(this);
       this.align = this.align.bind(this);
@@ -403,7 +893,7 @@ const getCountryStyle = id => {
       if (this.canvas.width !== size.x || this.canvas.height !== size.y) {
         this.canvas.width = size.x;
         this.canvas.height = size.y;
-        this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+        if (this.ctx) this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
       }
       this.align();
       this.dirty = true;
@@ -413,32 +903,53 @@ const getCountryStyle = id => {
       L.DomUtil.setPosition(this.canvas, L.point(0, 0));
     }
 
-    pickCategory(distro) {
-      const r = Math.random();
-      let acc = 0;
-      for (const d of distro) {
-        acc += d.p;
-        if (r <= acc) return d;
-      }
-      return distro[distro.length - 1] || { color: '#ffffff' };
-    }
-
     clear(resetParticles = false) {
-      this.ctx.globalCompositeOperation = 'source-over';
-      this.ctx.globalAlpha = 1;
-      this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
-      if (resetParticles) this.particles = [];
+      if (this.gl) {
+        this.gl.clear();
+      } else {
+        this.ctx.globalCompositeOperation = 'source-over';
+        this.ctx.globalAlpha = 1;
+        this.ctx.clearRect(0, 0, this.canvas.width, this.canvas.height);
+      }
+      if (resetParticles) this.count = 0;
     }
 
+    // Particles on a path that is still shown carry over to its new index;
+    // the rest are dropped
     setFlows(flows) {
+      const key = f => `${f.id}|${f.category}`;
+      const next = new Map(flows.map((f, i) => [key(f), i]));
+      const remap = this.flows.map(f => next.get(key(f)) ?? -1);
+      for (let i = 0; i < this.count;) {
+        const j = remap[this.flow[i]];
+        if (j < 0) { this.kill(i); continue; }
+        this.flow[i++] = j;
+      }
       this.flows = flows.map(f => ({
         ...f,
         spawnAcc: 0
       }));
+      this.reserve(this.count + d3.sum(this.flows, f => (Math.ceil(spawnRate(f) * f.duration) || 0) + 1));
       this.dirty = true;
       this.ensureRunning();
     }
 
+    // Grow the pool to `n` particles, keeping the live ones. A flow's dots
+    // live f.duration seconds and spawn() adds them evenly (dt is capped
+    // per frame), so it never holds more than ceil(rate * duration) + 1;
+    // setFlows() asks for that summed over the paths (flow_paths.csv's
+    // spawn_rate / duration, or the month's) plus the particles carried over.
+    reserve(n) {
+      if (n <= this.maxParticles) return;
+      const grow = (a, k) => { const b = new a.constructor(k * n); b.set(a.subarray(0, k * this.count)); return b; };
+      this.u = grow(this.u, 1);
+      this.speed = grow(this.speed, 1);
+      this.flow = grow(this.flow, 1);
+      this.pos = grow(this.pos, 2);
+      if (this.gl) this.gl.reserve(n);
+      this.maxParticles = n;
+    }
+
     ensureRunning() {
       if (this.running) return;
       this.running = true;
@@ -446,82 +957,69 @@ const getCountryStyle = id => {
       requestAnimationFrame(this._tick);
     }
 
+    // Path ends in container pixels; the bar offset is in screen pixels so
+    // it holds at every zoom
     reproject() {
-      this.flows.forEach(f => {
-        const pts = f.latlngs.map(ll => this.map.latLngToContainerPoint(ll));
-        let len = 0;
-        const acc = [0];
-        for (let i = 1; i < pts.length; i++) {
-          len += pts[i].distanceTo(pts[i - 1]);
-          acc.push(len);
-        }
-        f.points = pts;
-        f.acc = acc;
-        f.len = len || 1;
+      if (this.geom.length !== 6 * this.flows.length) this.geom = new Float32Array(6 * this.flows.length);
+      const geom = this.geom;
+      this.flows.forEach((f, i) => {
+        const a = this.map.latLngToContainerPoint(f.from);
+        const b = this.map.latLngToContainerPoint(f.to);
+        const vx = b.x + f.dx - a.x, vy = b.y - a.y;
+        const len = Math.hypot(vx, vy) || 1;
+        geom[6 * i] = a.x; geom[6 * i + 1] = a.y;
+        geom[6 * i + 2] = vx; geom[6 * i + 3] = vy;
+        geom[6 * i + 4] = -vx / len * TAIL_LEN; geom[6 * i + 5] = -vy / len * TAIL_LEN;
       });
+      // Drawn with the dot as origin, so one gradient serves the flow
+      this.tails = this.ctx ? this.flows.map((f, i) => {
+        const grad = this.ctx.createLinearGradient(geom[6 * i + 4], geom[6 * i + 5], 0, 0);
+        grad.addColorStop(0, 'rgba(255,255,255,0)');
+        grad.addColorStop(1, FLOW_COLOR);
+        return grad;
+      }) : [];
       this.dirty = false;
     }
 
-    pointAt(f, u) {
-      if (!f.points || f.points.length < 2) return null;
-      const dist = u * f.len;
-      const acc = f.acc;
-      let idx = acc.findIndex(x => x >= dist);
-      if (idx < 1) idx = 1;
-      if (idx === -1) idx = acc.length - 1;
-      const p0 = f.points[idx - 1];
-      const p1 = f.points[idx];
-      const span = acc[idx] - acc[idx - 1] || 1;
-      const t = Math.min(1, Math.max(0, (dist - acc[idx - 1]) / span));
-      return L.point(
-        p0.x + (p1.x - p0.x) * t,
-        p0.y + (p1.y - p0.y) * t
-      );
-    }
-
     spawn(dt) {
-      for (const f of this.flows) {
-        const intensity = Math.max(0.4, Math.min(1.0, f.intensity || 0.6));
-        const rate = Math.max(0.05, f.spawnRate || 0); // dots per second, derived from people-per-particle
-        f.spawnAcc += rate * dt;
+      for (let i = 0; i < this.flows.length; i++) {
+        const f = this.flows[i];
+        f.spawnAcc += spawnRate(f) * dt;
         const spawnN = Math.min(6, Math.floor(f.spawnAcc));
         f.spawnAcc -= spawnN;
-
-        const laneCount = 1; // single lane; straight path
-        const laneSpacing = 0;
-
-        for (let i = 0; i < spawnN; i++) {
-          if (this.particles.length >= this.maxParticles) break;
-          const laneIdx = Math.floor(Math.random() * laneCount);
-          const laneOffset = (laneIdx - (laneCount - 1) / 2) * laneSpacing;
-          const jitter = 0; // no wiggle
-          const spreadWidth = (f.spread || 1) * 2.2; // continuous band
-          const randOffset = 0; // no random offset; stays centered on lane
-          const cat = this.pickCategory(f.distro);
-          this.particles.push({
-            flow: f,
-            u: 0,
-            speed: 1 / f.duration,
-            jitter,
-            laneOffset,
-            randOffset,
-            color: cat.color
-          });
+        for (let k = 0; k < spawnN && this.count < this.maxParticles; k++) {
+          const n = this.count++;
+          this.u[n] = 0;
+          this.speed[n] = 1 / f.duration;
+          this.flow[n] = i;
         }
       }
     }
 
+    // Swap-remove: the last live particle takes slot i
+    kill(i) {
+      const n = --this.count;
+      this.u[i] = this.u[n];
+      this.speed[i] = this.speed[n];
+      this.flow[i] = this.flow[n];
+    }
+
     update(dt) {
-      const alive = [];
-      for (const p of this.particles) {
-        p.u += dt * p.speed;
-        if (p.u <= 1) alive.push(p);
+      const { u, speed, flow, pos, geom } = this;
+      for (let i = 0; i < this.count;) {
+        u[i] += dt * speed[i];
+        if (u[i] > 1) { this.kill(i); continue; } // slot i now holds an unmoved particle
+        const g = 6 * flow[i];
+        pos[2 * i] = geom[g] + geom[g + 2] * u[i];
+        pos[2 * i + 1] = geom[g + 1] + geom[g + 3] * u[i];
+        i++;
       }
-      this.particles = alive;
     }
 
     drawFrame() {
+      if (this.gl) { this.gl.draw(this); return; }
       const ctx = this.ctx;
+      const { u, flow, pos, geom, tails } = this;
       // Clear frame to avoid lingering streaks
       ctx.globalCompositeOperation = 'source-over';
       ctx.globalAlpha = 1;
@@ -530,130 +1028,46 @@ const getCountryStyle = id => {
       ctx.save();
       ctx.globalCompositeOperation = 'lighter';
 
-      const r = 1.0;
-      const tailDelay = 0.06;
-      const tailLen = 22;
-
-      for (const p of this.particles) {
-        const f = p.flow;
-        const mainPt = this.pointAt(f, p.u);
-        if (!mainPt) continue;
-
-        const dir = this._dirForPoint(f, p.u, mainPt);
-        const jitter = p.jitter;
-        const perp = this._perpForFlow(f, mainPt);
-        const offsetFactor = Math.sin(Math.PI * Math.max(0, Math.min(1, p.u))); // zero at ends, peak mid
-
-        const drawCircle = (pt, radius, alpha) => {
-          if (!pt) return;
-          const spread = f.spread || 1;
-          const baseOffset = (p.laneOffset || 0) + (p.randOffset || 0);
-        const offset = (baseOffset + jitter) * offsetFactor;
-          const x = pt.x + perp[0] * offset;
-          const y = pt.y + perp[1] * offset;
-          ctx.beginPath();
-          ctx.arc(x, y, radius, 0, Math.PI * 2);
-          ctx.fillStyle = p.color || f.color || '#ffffff';
-          ctx.globalAlpha = alpha;
-          ctx.fill();
-        };
-
-        const drawSquare = (pt, size, alpha) => {
-          if (!pt) return;
-          const spread = f.spread || 1;
-          const baseOffset = (p.laneOffset || 0) + (p.randOffset || 0);
-          const offset = (baseOffset + jitter) * offsetFactor;
-          const x = pt.x + perp[0] * offset;
-          const y = pt.y + perp[1] * offset;
-          const half = size / 2;
-          ctx.beginPath();
-          ctx.rect(x - half, y - half, size, size);
-          ctx.fillStyle = p.color || f.color || '#ffffff';
-          ctx.globalAlpha = alpha;
-          ctx.fill();
-        };
+      // Tails with smooth fade, each drawn around its dot
+      ctx.lineWidth = 1;
+      for (let i = 0; i < this.count; i++) {
+        if (u[i] <= TAIL_DELAY) continue;
+        const g = 6 * flow[i];
+        ctx.setTransform(1, 0, 0, 1, pos[2 * i], pos[2 * i + 1]);
+        ctx.beginPath();
+        ctx.moveTo(geom[g + 4], geom[g + 5]);
+        ctx.lineTo(0, 0);
+        ctx.strokeStyle = tails[flow[i]];
+        ctx.stroke();
+      }
+      ctx.setTransform(1, 0, 0, 1, 0, 0);
 
-        // tail with smooth fade
-        const headColor = p.color || f.color || '#ffffff';
-        if (p.u > tailDelay) {
-          const tailEnd = L.point(mainPt.x - dir.x * tailLen, mainPt.y - dir.y * tailLen);
-          const grad = ctx.createLinearGradient(tailEnd.x, tailEnd.y, mainPt.x, mainPt.y);
-          grad.addColorStop(0, 'rgba(255,255,255,0)');
-          grad.addColorStop(1, headColor);
-          ctx.beginPath();
-          ctx.moveTo(tailEnd.x, tailEnd.y);
-          ctx.lineTo(mainPt.x, mainPt.y);
-          ctx.strokeStyle = grad;
-          ctx.globalAlpha = 1;
-          ctx.lineWidth = 1;
-          ctx.stroke();
-        }
-        // main dot as a square
-        drawSquare(mainPt, r * 1.4, 0.95);
+      // Dots as squares, one path for all (additive blending is order-free)
+      const size = 1.4;
+      ctx.beginPath();
+      for (let i = 0; i < this.count; i++) {
+        ctx.rect(pos[2 * i] - size / 2, pos[2 * i + 1] - size / 2, size, size);
       }
+      ctx.fillStyle = FLOW_COLOR;
+      ctx.globalAlpha = 0.95;
+      ctx.fill();
 
       ctx.globalAlpha = 1;
       ctx.restore();
     }
 
-    _perpForFlow(f, pt) {
-      if (!f.points || f.points.length < 2) return [0, 0];
-      // find nearest segment
-      let bestIdx = 1;
-      let bestDist = Infinity;
-      for (let i = 1; i < f.points.length; i++) {
-        const p0 = f.points[i - 1];
-        const p1 = f.points[i];
-        const dx = p1.x - p0.x;
-        const dy = p1.y - p0.y;
-        const proj = ((pt.x - p0.x) * dx + (pt.y - p0.y) * dy) / (dx*dx + dy*dy || 1);
-        const clamped = Math.max(0, Math.min(1, proj));
-        const cx = p0.x + dx * clamped;
-        const cy = p0.y + dy * clamped;
-        const d2 = (pt.x - cx) ** 2 + (pt.y - cy) ** 2;
-        if (d2 < bestDist) {
-          bestDist = d2;
-          bestIdx = i;
-        }
-      }
-      const p0 = f.points[bestIdx - 1];
-      const p1 = f.points[bestIdx];
-      const vx = p1.x - p0.x;
-      const vy = p1.y - p0.y;
-      const len = Math.hypot(vx, vy) || 1;
-      return [-vy / len, vx / len];
-    }
-
-    _dirForPoint(f, u, pt) {
-      if (!f.points || f.points.length < 2) return { x: 0, y: -1 };
-      const dist = u * (f.len || 1);
-      const acc = f.acc || [];
-      let idx = acc.findIndex(x => x >= dist);
-      if (idx < 1) idx = 1;
-      if (idx === -1) idx = acc.length - 1;
-      const p0 = f.points[idx - 1];
-      const p1 = f.points[idx];
-      let vx = p1.x - p0.x;
-      let vy = p1.y - p0.y;
-      if (vx === 0 && vy === 0 && f.points.length >= 2) {
-        const first = f.points[0];
-        const last = f.points[f.points.length - 1];
-        vx = last.x - first.x;
-        vy = last.y - first.y;
-      }
-      const len = Math.hypot(vx, vy) || 1;
-      return { x: vx / len, y: vy / len };
-    }
-
     step(now) {
       if (!this.running) return;
+      const t0 = performance.now();
       const dt = Math.min(0.08, (now - this.last) / 1000);
+      const gap = now - this.last;
       this.last = now;
       this.resize();
       if (this.dirty) this.reproject();
       this.spawn(dt);
       this.update(dt);
       this.drawFrame();
+      perf.frame(performance.now() - t0, gap, this.count);
       requestAnimationFrame(this._tick);
     }
   }
@@ -661,6 +1075,10 @@ const getCountryStyle = id => {
   // Minis config
   // Minis config
 const VARS = ['women', 'children', 'men', 'elderly']; // demographic minis
+const MINI_BAR_W = 10;
+const MINI_BAR_GAP = 6;
+// Left edge of bar i of n, centred on the country's anchor
+const miniBarX = (i, n) => -(n * MINI_BAR_W + (n - 1) * MINI_BAR_GAP) / 2 + i * (MINI_BAR_W + MINI_BAR_GAP);
 
 const COLORS = {
   women: '#ec4899',
@@ -801,7 +1219,7 @@ const fmtPct = v => {
 
   function refreshVisibleCountries() {
     updateCountrySummary();
-    if (countryLayer) countryLayer.setStyle(feat => getCountryStyle(iso(feat.properties)));
+    restyleCountries();
     safe(drawArrows, '[country-filter:arrows]');
     safe(drawMinis, '[country-filter:minis]');
     safe(redrawSelectionOutline, '[country-filter:outline]');
@@ -858,110 +1276,104 @@ const fmtPct = v => {
     updateCountrySummary();
   }
 
+  const dataTask = createDataTasks();
   try {
-    const [mf, flowRaw, factorRows, summaryRows, unemploymentRows] = await Promise.all([
-      d3.json('data/europe.geo.json')
-        .catch(() => d3.json('data/europe.topo.json').catch(() => null)),
-      d3.json('data/flows_ua_agg.json').catch(() => []),
-      d3.csv('data/country_factors.csv', d3.autoType).catch(() => []),
-      d3.csv('data/country_summary_clean.csv', d3.autoType).catch(() => []),
-      d3.csv('data/unemployment_clean.csv', d3.autoType).catch(() => [])
+    // Clipped, simplified basemap (scripts/build_geometry.py) and the
+    // bundle, fetched, decoded and joined off the main thread by js/data.js.
+    // Tile pages take the basemap from the coarse merc.bin level, so never
+    // load topojson-client.
+    const endFetch = perf.start('boot:fetch');
+    const [data, tileMeta] = await Promise.all([
+      dataTask('boot', USE_TILES || USE_MERC
+        ? { merc: assetURL('data/europe.merc.bin'), bundle: assetURL('data/bundle.bin') }
+        : {
+            topo: assetURL('data/europe.topo.json'),
+            bundle: assetURL('data/bundle.bin'),
+            topojson: vendoredURLs(LIBS.topojson)
+          }),
+      USE_TILES
+        ? perf.span('fetch:tiles', () => fetchJSON(asset('data/tiles/metadata.json')))
+          .catch(e => { console.warn('[tiles]', e); return null; })
+        : USE_MERC ? { mercator: true } : null
     ]);
-
+    endFetch({ worker: dataTask.inWorker(), ...data.timings });
+    if (data.error) console.error('[bundle]', data.error);
+    const bundle = data.bundle || null;
+    // The full GeoJSON is only a fallback for when the basemap failed to decode
+    const mf = data.geo
+      || await perf.span('fetch:geo', () => fetchJSON(asset('data/europe.geo.json'))).catch(() => null);
+    mapLods = data.geo ? data.lods : [];
+
+    const endJoin = perf.start('boot:join');
     mapData = mf;
+    const EMPTY_TABLE = { rows: 0, iso: [], cols: {}, flowRows: [] };
+    const ct = bundle?.tables.countries || EMPTY_TABLE;
+    const latestTotals = data.totals || { ids: [], values: [] };
 
-    // Flows
-    flows = (Array.isArray(flowRaw) ? flowRaw : []).map(r => ({
-      dest_iso3: gs(r, FLOW_KEYS.dest_iso3).toUpperCase(),
-      lat:       gf(r, FLOW_KEYS.lat),
-      lon:       gf(r, FLOW_KEYS.lon),
-      total_refugees: gf(r, FLOW_KEYS.tot),
-      pct_children:     gf(r, COLOR_KEYS.kids),
-      pct_elderly:      gf(r, COLOR_KEYS.old),
-      pct_women_adult:  gf(r, COLOR_KEYS.women_adult),
-      pct_men_adult:    gf(r, COLOR_KEYS.men_adult)
-    })).map(r => {
-      const bumpN = { DEU: 1.2, PRT: 1.2 };
-      const b = bumpN[r.dest_iso3];
-      if (b) {
-        r.lat += b;
-      }
-      return r;
-    }).filter(r => Number.isFinite(r.lat) && Number.isFinite(r.lon));
-
-    // Build destLL from flows
-    for (const d of flows) {
-      if (d.dest_iso3 && Number.isFinite(d.lat) && Number.isFinite(d.lon)) {
-        destLL[d.dest_iso3] = [d.lat, d.lon];
-      }
-    }
-
-    // Country factors (GDP, aid, unemployment, permit metrics)
+    // One pre-joined row per country (scripts/build_country_facts.py), all
+    // shares already fractions and left NaN by js/data.js for countries
+    // without a flow: factors and flows are read off the columns
     factors = {};
-    for (const r of factorRows) {
-      const id = String(
-        r.dest_iso3 ||
-        r.iso3     ||
-        r.ISO3     ||
-        r.country_code ||
-        r.code     ||
-        ''
-      ).toUpperCase();
-      if (!id) continue;
-
-      let un = +r.unemployment;
-      if (un > 1) un /= 100;
-
-      const gdp  = +r.gdp_pc;
-      const dP   = +r.ua_perm_delta;
-      const rat  = +r.ua_perm_per_refugee;
-
+    flows = [];
+    for (let i = 0; i < ct.rows; i++) {
+      const id = bundle.iso3[ct.iso[i]];
+      if (Number.isFinite(cell(ct, 'lat', i))) labelAnchor[id] = [cell(ct, 'lat', i), cell(ct, 'lon', i)];
       factors[id] = {
-        gdp_pc:              Number.isFinite(gdp) ? gdp : NaN,
-        unemployment:        Number.isFinite(un) ? un  : NaN,
-        ua_perm_delta:       Number.isFinite(dP)  ? dP  : NaN,
-        ua_perm_per_refugee: Number.isFinite(rat) ? rat : NaN,
-        alloc_pct_gdp:       NaN,
-        women: NaN,
-        children: NaN,
-        men: NaN,
-        elderly: NaN
+        gdp_pc:              cell(ct, 'gdp_pc', i),
+        unemployment:        cell(ct, 'unemployment', i),
+        ua_perm_delta:       cell(ct, 'ua_perm_delta', i),
+        ua_perm_per_refugee: cell(ct, 'ua_perm_per_refugee', i),
+        alloc_pct_gdp:       cell(ct, 'alloc_pct_gdp', i),
+        women:    cell(ct, 'pct_women_adult', i),
+        children: cell(ct, 'pct_children', i),
+        men:      cell(ct, 'pct_men_adult', i),
+        elderly:  cell(ct, 'pct_elderly', i)
       };
     }
+    for (const i of ct.flowRows) {
+      flows.push({
+        dest_iso3: bundle.iso3[ct.iso[i]],
+        lat:       cell(ct, 'lat', i),
+        lon:       cell(ct, 'lon', i),
+        total_refugees:   cell(ct, 'total_refugees', i),
+        pct_children:     cell(ct, 'pct_children', i),
+        pct_elderly:      cell(ct, 'pct_elderly', i),
+        pct_women_adult:  cell(ct, 'pct_women_adult', i),
+        pct_men_adult:    cell(ct, 'pct_men_adult', i)
+      });
+    }
+    flowsById = new Map(flows.map(f => [f.dest_iso3, f]));
+
+    const fp = bundle?.tables.flow_paths || EMPTY_TABLE;
+    for (let i = 0; i < fp.rows; i++) {
+      latestPaths.push({
+        id:        bundle.iso3[fp.iso[i]],
+        category:  fp.labels.category[fp.cols.category[i]],
+        from:      [cell(fp, 'origin_lat', i), cell(fp, 'origin_lon', i)],
+        to:        [cell(fp, 'dest_lat', i), cell(fp, 'dest_lon', i)],
+        dx:        cell(fp, 'bar_dx', i),
+        duration:  cell(fp, 'duration', i),
+        spawnRate: cell(fp, 'spawn_rate', i),
+        share:     cell(fp, 'share', i)
+      });
+    }
+    flowPaths = latestPaths;
+    endJoin({ countries: ct.rows, paths: fp.rows });
 
-    // Merge allocations % GDP from country_summary_clean.csv
-    if (Array.isArray(summaryRows)) {
-      for (const row of summaryRows) {
-        const name = String(row.Country || '').trim().toLowerCase();
-        const iso = NAME_TO_ISO3[name];
-        if (!iso) continue;
-        const raw = +row['Allocations % GDP 2021'];
-        if (!Number.isFinite(raw)) continue;
-        const v = raw > 1 ? raw / 100 : raw / 100; // convert percent to share
-        if (!factors[iso]) {
-          factors[iso] = {
-            gdp_pc: NaN,
-            unemployment: NaN,
-            ua_perm_delta: NaN,
-            ua_perm_per_refugee: NaN,
-            alloc_pct_gdp: NaN,
-            women: NaN,
-            children: NaN,
-            men: NaN,
-            elderly: NaN
-          };
-        }
-        factors[iso].alloc_pct_gdp = v;
-      }
+    // Build destLL from flows
+    for (const d of flows) {
+      destLL[d.dest_iso3] = [d.lat, d.lon];
     }
 
-    // Override unemployment from Eurostat annual file (latest year)
-    if (Array.isArray(unemploymentRows)) {
-      for (const r of unemploymentRows) {
-        const id = String(r.dest_iso3 || '').toUpperCase();
-        if (!id || !ALLOWED_ISO3.has(id)) continue;
-        const val = +r.unemployment;
-        if (!Number.isFinite(val)) continue;
+    // Inject demographic percentages from flows into factors for minis
+    // when the time slider swaps in another month's flows
+    function applyDemographics() {
+      for (const f of Object.values(factors)) {
+        f.women = f.men = f.children = f.elderly = NaN;
+      }
+      for (const f of flows) {
+        const id = f.dest_iso3;
+        if (!id) continue;
         if (!factors[id]) {
           factors[id] = {
             gdp_pc: NaN,
@@ -975,90 +1387,301 @@ const fmtPct = v => {
             elderly: NaN
           };
         }
-        factors[id].unemployment = val; // already fraction
-      }
-    }
-
-    // Inject demographic percentages from flows into factors for minis
-    for (const f of flows) {
-      const id = f.dest_iso3;
-      if (!id) continue;
-      if (!factors[id]) {
-        factors[id] = {
-          gdp_pc: NaN,
-          unemployment: NaN,
-          ua_perm_delta: NaN,
-          ua_perm_per_refugee: NaN,
-          alloc_pct_gdp: NaN,
-          women: NaN,
-          children: NaN,
-          men: NaN,
-          elderly: NaN
+        const frac = v => {
+          if (!Number.isFinite(v)) return NaN;
+          return v > 1 ? v / 100 : v;
         };
+        factors[id].women = frac(f.pct_women_adult);
+        factors[id].men = frac(f.pct_men_adult);
+        factors[id].children = frac(f.pct_children);
+        factors[id].elderly = frac(f.pct_elderly);
       }
-      const frac = v => {
-        if (!Number.isFinite(v)) return NaN;
-        return v > 1 ? v / 100 : v;
-      };
-      factors[id].women = frac(f.pct_women_adult);
-      factors[id].men = frac(f.pct_men_adult);
-      factors[id].children = frac(f.pct_children);
-      factors[id].elderly = frac(f.pct_elderly);
     }
 
     window.bb.flows   = flows;
     window.bb.factors = factors;
     window.bb._mapData = mapData;
 
-    if (flows.length) {
-      const vals = flows
-        .map(d => +d.total_refugees || 0)
-        .filter(Number.isFinite);
-      const lo = d3.min(vals) ?? 1;
-      const hi = d3.max(vals) ?? 1;
-      totals = flows.reduce((acc, d) => {
-        acc[d.dest_iso3] = (acc[d.dest_iso3] || 0) + (+d.total_refugees || 0);
-        return acc;
-      }, {});
-      // Ensure every allowed country has an entry (so all get a fill color)
-      ALLOWED_ISO3.forEach(id => {
-        if (!Object.prototype.hasOwnProperty.call(totals, id)) totals[id] = 0;
-      });
-      widthScale.domain(
-        lo === hi
-          ? [1, hi + 1]
-          : [Math.max(1, lo), Math.max(1, hi)]
-      );
-      const tHi = 1_200_000;
-      const colors = [
-        '#fff7ed',
-        '#f9c385ff',
-        '#fb923c',
-        '#f97316',
-        '#ff4d00ff'
-      ];
-      const domainPoints = [10_000, 50_000, 100_000, 500_000, tHi];
-
-      totalScale = d3.scaleLog()
-        .domain(domainPoints)
-        .range(colors)
-        .interpolate(d3.interpolateRgb)
-        .clamp(true);
+    // Totals per country (summed by js/data.js) and the fill scale
+    function applyTotals(sums) {
+      totals = {};
+      if (flows.length) {
+        sums.ids.forEach((id, i) => { totals[id] = sums.values[i]; });
+        // Ensure every allowed country has an entry (so all get a fill color)
+        ALLOWED_ISO3.forEach(id => {
+          if (!Object.prototype.hasOwnProperty.call(totals, id)) totals[id] = 0;
+        });
+        const tHi = 1_200_000;
+        const colors = [
+          '#fff7ed',
+          '#f9c385ff',
+          '#fb923c',
+          '#f97316',
+          '#ff4d00ff'
+        ];
+        const domainPoints = [10_000, 50_000, 100_000, 500_000, tHi];
+
+        totalScale = d3.scaleLog()
+          .domain(domainPoints)
+          .range(colors)
+          .interpolate(d3.interpolateRgb)
+          .clamp(true);
+      }
     }
+
+    applyTotals(latestTotals);
     buildMiniScales();
 
+  const COUNTRY_TIP = {
+    direction: 'auto',
+    opacity: 0.95,
+    className: 'arrow-tip',
+    sticky: true,
+    offset: [0, -6]
+  };
+
+  const countryTipHtml = id =>
+    `<div><b>${countryNames[id] || id}</b></div><div><b>Total refugees:</b> ${formatCount(totals[id] || 0)}</div>`;
+
+  function toggleCountry(id) {
+    if (selectedCountries.has(id)) selectedCountries.delete(id);
+    else selectedCountries.add(id);
+    syncCountryCheckboxes();
+    refreshVisibleCountries();
+    syncCompareFromSelection(false, true);
+    updateCompareToggle();
+  }
+
+  // Vector-tile country layer (?tiles). Each canvas tile keeps its decoded
+  // features so restyling repaints from memory and hover / click are
+  // answered by a point-in-polygon test on the tile under the cursor.
+  const FLAG_STOPS = [[0, '#0057b7'], [0.5, '#0057b7'], [0.5, '#ffd700'], [1, '#ffd700']];
+
+  // ?merc tiles: metres map to tile units with one scale and offset per
+  // tile, so each ring is one pass over its slice of coords. Rings are not
+  // clipped (the canvas does that); countries off the tile are skipped.
+  const MERC_HALF = Math.PI * 6378137; // half the EPSG:3857 world, metres
+  const MERC_EXTENT = 4096;
+  const MERC_BUFFER = 64;              // tile units kept beyond each edge
+  const mercLevels = new Map(); // file -> Promise of readMercator() result
+
+  function loadMercator(file) {
+    if (!mercLevels.has(file)) {
+      mercLevels.set(file, fetch(asset(`data/${file}`))
+        .then(r => (r.ok ? r.arrayBuffer() : Promise.reject(new Error(`${file}: ${r.status}`))))
+        .then(buf => {
+          const level = readMercator(buf);
+          // lon/lat bbox per country, as in tiles/metadata.json, for flag fills
+          const deg = 180 / Math.PI, R = 6378137;
+          const lat = y => (2 * Math.atan(Math.exp(y / R)) - Math.PI / 2) * deg;
+          level.bboxLL = {};
+          level.ids.forEach((id, i) => {
+            const b = level.bbox.subarray(4 * i, 4 * i + 4);
+            level.bboxLL[id] = [b[0] / R * deg, lat(b[1]), b[2] / R * deg, lat(b[3])];
+          });
+          return level;
+        })
+        .catch(err => { mercLevels.delete(file); throw err; }));
+    }
+    return mercLevels.get(file);
+  }
+
+  function mercatorTile({ x, y, z }) {
+    const file = (lodForZoom(z)?.file || 'europe.topo.json').replace(/\.topo\.json$/, '.merc.bin');
+    return loadMercator(file).then(level => {
+      const { coords, ring_offsets: ro, feature_offsets: fo, bbox } = level;
+      const n = 2 ** z;
+      const k = n * MERC_EXTENT / (2 * MERC_HALF);
+      const ox = (n / 2 - x) * MERC_EXTENT, oy = (n / 2 - y) * MERC_EXTENT;
+      const pad = MERC_BUFFER / k;
+      const x0 = -ox / k - pad, x1 = (MERC_EXTENT - ox) / k + pad;
+      const y0 = (oy - MERC_EXTENT) / k - pad, y1 = oy / k + pad;
+      const features = [];
+      for (let i = 0; i < level.ids.length; i++) {
+        if (bbox[4 * i] > x1 || bbox[4 * i + 2] < x0 || bbox[4 * i + 1] > y1 || bbox[4 * i + 3] < y0) continue;
+        const rings = [];
+        for (let r = fo[i]; r < fo[i + 1]; r++) {
+          const ring = coords.slice(2 * ro[r], 2 * ro[r + 1]);
+          for (let j = 0; j < ring.length; j += 2) {
+            ring[j] = ring[j] * k + ox;
+            ring[j + 1] = oy - ring[j + 1] * k;
+          }
+          rings.push(ring);
+        }
+        features.push({ id: i, iso3: level.ids[i], name: level.names[i], rings });
+      }
+      return { extent: MERC_EXTENT, features, bbox: level.bboxLL };
+    });
+  }
+
+  function createCountryTiles(meta) {
+    const available = new Set(
+      Object.entries(meta.available || {}).flatMap(([z, xys]) => xys.map(xy => `${z}/${xy}`))
+    );
+    const url = meta.tiles ? asset('data/tiles/' + meta.tiles[0]) : null;
+    const decoded = new Map(); // z/x/y -> Promise of readVectorTile() result
+
+    const layer = new (L.GridLayer.extend({
+      createTile(coords, done) {
+        const tile = L.DomUtil.create('canvas', 'leaflet-tile');
+        const size = this.getTileSize();
+        const dpr = window.devicePixelRatio || 1;
+        tile.width = size.x * dpr;
+        tile.height = size.y * dpr;
+        this._load(coords)
+          .then(data => { tile._data = data; this._paint(tile, coords); done(null, tile); })
+          .catch(err => done(err, tile));
+        return tile;
+      },
+
+      _load(coords) {
+        if (meta.mercator) return mercatorTile(coords);
+        const { x, y, z } = coords;
+        const key = `${z}/${x}/${y}`;
+        if (!available.has(key)) return Promise.resolve(null);
+        if (!decoded.has(key)) {
+          decoded.set(key, fetch(url.replace('{z}', z).replace('{x}', x).replace('{y}', y))
+            .then(r => (r.ok ? r.arrayBuffer() : Promise.reject(new Error(`${key}: ${r.status}`))))
+            .then(readVectorTile)
+            .catch(err => { decoded.delete(key); throw err; }));
+        }
+        return decoded.get(key);
+      },
+
+      _paint(tile, coords) {
+        const ctx = tile.getContext('2d');
+        ctx.setTransform(1, 0, 0, 1, 0, 0);
+        ctx.clearRect(0, 0, tile.width, tile.height);
+        const data = tile._data;
+        if (!data) return;
+        const k = tile.width / data.extent;
+        const size = this.getTileSize();
+        ctx.setTransform(k, 0, 0, k, 0, 0);
+        ctx.lineJoin = 'round';
+        for (const f of data.features) {
+          const style = getCountryStyle(f.iso3);
+          ctx.beginPath();
+          for (const ring of f.rings) {
+            ctx.moveTo(ring[0], ring[1]);
+            for (let i = 2; i < ring.length; i += 2) ctx.lineTo(ring[i], ring[i + 1]);
+            ctx.closePath();
+          }
+          if (style.fill !== false) {
+            let alpha = style.fillOpacity ?? 0.2;
+            if (f.iso3 === this._hover) alpha = Math.max(0, alpha - 0.03);
+            ctx.globalAlpha = alpha;
+            ctx.fillStyle = String(style.fillColor).startsWith('url(')
+              ? this._flag(ctx, f.iso3, coords, data.extent / size.y, data.bbox || meta.bbox)
+              : style.fillColor;
+            ctx.fill('evenodd');
+          }
+          ctx.globalAlpha = style.opacity ?? 1;
+          ctx.strokeStyle = style.color;
+          ctx.lineWidth = (style.weight ?? 1) * (window.devicePixelRatio || 1) / k;
+          ctx.stroke();
+        }
+        ctx.globalAlpha = 1;
+      },
+
+      // Top-to-bottom flag over the country's whole bbox, like the SVG
+      // gradient, so it lines up across tiles
+      _flag(ctx, id, coords, unitsPerPx, bboxes) {
+        const bbox = bboxes?.[id];
+        if (!bbox) return FLAG_STOPS[0][1];
+        const top = (map.project([bbox[3], bbox[0]], coords.z).y - coords.y * this.getTileSize().y) * unitsPerPx;
+        const bottom = (map.project([bbox[1], bbox[0]], coords.z).y - coords.y * this.getTileSize().y) * unitsPerPx;
+        const grad = ctx.createLinearGradient(0, top, 0, bottom);
+        for (const [at, color] of FLAG_STOPS) grad.addColorStop(at, color);
+        return grad;
+      },
+
+      repaint() {
+        for (const t of Object.values(this._tiles || {})) {
+          if (t.el._data !== undefined) this._paint(t.el, t.coords);
+        }
+      },
+
+      setHover(id) {
+        if (id === this._hover) return;
+        this._hover = id;
+        this.repaint();
+      },
+
+      // ISO3 of the country under latlng, from the loaded tile at the
+      // current tile zoom (even-odd rule over all of its rings)
+      hit(latlng) {
+        const z = this._tileZoom;
+        if (z === undefined) return null;
+        const size = this.getTileSize();
+        const p = map.project(latlng, z);
+        const x = Math.floor(p.x / size.x), y = Math.floor(p.y / size.y);
+        const data = this._tiles?.[this._tileCoordsToKey({ x, y, z })]?.el._data;
+        if (!data) return null;
+        const px = (p.x / size.x - x) * data.extent;
+        const py = (p.y / size.y - y) * data.extent;
+        for (let n = data.features.length - 1; n >= 0; n--) {
+          let inside = false;
+          for (const r of data.features[n].rings) {
+            for (let i = 0, j = r.length - 2; i < r.length; j = i, i += 2) {
+              if ((r[i + 1] > py) !== (r[j + 1] > py) &&
+                  px < (r[j] - r[i]) * (py - r[i + 1]) / (r[j + 1] - r[i + 1]) + r[i]) {
+                inside = !inside;
+              }
+            }
+          }
+          if (inside) return data.features[n].iso3;
+        }
+        return null;
+      }
+    }))({
+      pane: 'countries',
+      minNativeZoom: meta.minzoom,
+      maxNativeZoom: meta.maxzoom,
+      updateWhenZooming: false
+    });
+
+    // Tooltip, hover and click for the EU27, skipping events that land on
+    // arrows, minis or controls
+    const tip = L.tooltip(COUNTRY_TIP);
+    const countryAt = e => {
+      const target = e.originalEvent?.target;
+      if (target?.closest?.('.leaflet-interactive, .mini, .leaflet-control')) return null;
+      const id = layer.hit(e.latlng);
+      return ALLOWED_ISO3.has(id) ? id : null;
+    };
+    const leave = () => {
+      layer.setHover(null);
+      tip.close();
+      map.getContainer().style.cursor = '';
+    };
+    map.on('mousemove', e => {
+      const id = countryAt(e);
+      if (!id) { leave(); return; }
+      layer.setHover(id);
+      map.getContainer().style.cursor = 'pointer';
+      tip.setLatLng(e.latlng).setContent(countryTipHtml(id));
+      if (!tip.isOpen()) tip.openOn(map);
+    });
+    map.on('mouseout', leave);
+    map.on('click', e => {
+      const id = countryAt(e);
+      if (id) toggleCountry(id);
+    });
+    return layer;
+  }
+
+  function restyleCountries() {
+    if (countryLayer) countryLayer.setStyle(feat => getCountryStyle(iso(feat.properties)));
+    if (countryTiles) countryTiles.repaint();
+  }
+
     // Countries + labels
   function drawCountries() {
     let geo = null;
     if (!mapData) return;
       if (mapData.type === 'FeatureCollection')      geo = mapData;
       else if (mapData.type === 'Feature')           geo = { type: 'FeatureCollection', features: [mapData] };
-      else if (mapData.type === 'Topology') {
-        if (!window.topojson || !topojson.feature) return;
-        const objs = Object.values(mapData.objects || {});
-        if (!objs.length) return;
-        geo = topojson.feature(mapData, objs[0]);
-      }
+      else return;
 
     if (countryLayer) map.removeLayer(countryLayer);
     labelLayer.clearLayers();
@@ -1068,43 +1691,23 @@ const fmtPct = v => {
       const pickerOptions = [];
       const seenOptions = new Set();
 
-    countryLayer = L.geoJSON(geo, {
-        pane: 'countries',
-        style: feat => getCountryStyle(iso(feat?.properties || {})),
-        interactive: true,
-        smoothFactor: 2.0,
-        tolerance: 2,
-        bubblingMouseEvents: false,
-        onEachFeature: (feat, layer) => {
-        const props = feat?.properties || {};
-        const id    = iso(props);
-        if (!ALLOWED_ISO3.has(id)) return;
+    // Names, picker entry, minis anchor and label for one EU27 country
+    function registerCountry(feat) {
+        const id = iso(feat.properties);
         countryFeatures.set(id, feat);
 
-          const name  = nm(props);
+          const name  = nm(feat.properties);
           countryNames[id] = name;
           if (!seenOptions.has(id)) {
             seenOptions.add(id);
             pickerOptions.push({ id, name });
           }
-          const polyCenter = layer.getBounds().getCenter();
-          const hasFlow = !!destLL[id];
-
-          // Base position for minis = arrow destination if we have it; else polygon center
-          const base = hasFlow
-            ? destLL[id]
-            : [polyCenter.lat, polyCenter.lng];
-
-          // Minis live at base
-          centroidLL[id] = [base[0], base[1]];
-
-          // Label: at arrow destination; otherwise polygon center
-          let labelLL;
-          if (hasFlow) {
-            labelLL = L.latLng(base[0], base[1]);
-          } else {
-            labelLL = polyCenter;
-          }
+          // Label and minis sit on the label anchor, where the country's
+          // arrow also ends
+          const anchor = labelAnchor[id];
+          if (!anchor) return;
+          centroidLL[id] = [anchor[0], anchor[1]];
+          const labelLL = L.latLng(anchor[0], anchor[1]);
 
           L.marker(labelLL, {
             pane: 'labels',
@@ -1117,17 +1720,29 @@ const fmtPct = v => {
           }).addTo(labelLayer);
           const lastMarker = labelLayer.getLayers()[labelLayer.getLayers().length - 1];
           if (lastMarker) countryLabels.set(id, lastMarker);
+    }
 
-          layer.bindTooltip(
-            `<div><b>${name}</b></div><div><b>Total refugees:</b> ${formatCount(totals[id] || 0)}</div>`,
-            {
-              direction: 'auto',
-              opacity: 0.95,
-              className: 'arrow-tip',
-              sticky: true,
-              offset: [0, -6]
-            }
-          );
+    if (tileMeta) {
+      // Canvas tiles paint every country; the decoded features here only
+      // name the picker entries and outline the selection
+      if (!countryTiles) countryTiles = createCountryTiles(tileMeta).addTo(map);
+      for (const feat of geo.features) {
+        if (ALLOWED_ISO3.has(iso(feat.properties))) registerCountry(feat);
+      }
+    } else {
+    countryLayer = L.geoJSON(geo, {
+        pane: 'countries',
+        style: feat => getCountryStyle(iso(feat?.properties || {})),
+        interactive: true,
+        smoothFactor: 2.0,
+        tolerance: 2,
+        bubblingMouseEvents: false,
+        onEachFeature: (feat, layer) => {
+        const id = iso(feat?.properties || {});
+        if (!ALLOWED_ISO3.has(id)) return;
+        registerCountry(feat);
+
+          layer.bindTooltip(() => countryTipHtml(id), COUNTRY_TIP);
 
           layer.on({
             mouseover: e => {
@@ -1143,24 +1758,11 @@ const fmtPct = v => {
             mouseout: e => {
               countryLayer.resetStyle(e.target);
             },
-            click: () => {
-              const f   = factors[id] || {};
-              const ref = flows.find(x => x.dest_iso3 === id) || {};
-              if (selectedCountries.has(id)) selectedCountries.delete(id);
-              else selectedCountries.add(id);
-              syncCountryCheckboxes();
-              refreshVisibleCountries();
-              syncCompareFromSelection(false, true);
-              updateCompareToggle();
-              const permDelta = Number.isFinite(f.ua_perm_delta) ? f.ua_perm_delta : null;
-              const permRatio = Number.isFinite(f.ua_perm_per_refugee) ? f.ua_perm_per_refugee : null;
-
-              const permDeltaText = permDelta != null ? fmtNum(permDelta)        : '—';
-              const permRatioText = permRatio != null ? permRatio.toFixed(3) : '—';
-            }
+            click: () => toggleCountry(id)
           });
         }
       }).addTo(map);
+    }
 
     if (pickerOptions.length) {
       buildCountryPicker(pickerOptions);
@@ -1179,6 +1781,55 @@ const fmtPct = v => {
     }
   }
 
+  // Basemap levels of detail (scripts/build_geometry.py): the boot file is
+  // the coarsest and its `lods` list names finer files by starting zoom.
+  // Swapping only replaces each polygon's rings; styles, tooltips, labels
+  // and handlers stay on the existing layers. Finer levels are decoded by
+  // the data worker like the boot one.
+  const lodGeo = new Map(); // file -> Promise of FeatureCollection
+  let lodShown = null;
+
+  function lodForZoom(zoom) {
+    let pick = null;
+    for (const lod of mapLods) {
+      if (zoom >= lod.minZoom) pick = lod;
+    }
+    return pick;
+  }
+
+  async function updateLod() {
+    if (!countryLayer || !mapLods.length) return;
+    const lod = lodForZoom(map.getZoom());
+    if (!lod) return;
+    if (lodShown === null) {
+      // Drawn at boot. Swaps replace the layers' (that is, mapData's)
+      // geometries, so keep the boot ones aside for zooming back out
+      lodShown = mapLods[0].file;
+      lodGeo.set(lodShown, Promise.resolve({ ...mapData, features: mapData.features.map(f => ({ ...f })) }));
+    }
+    if (lod.file === lodShown) return;
+    lodShown = lod.file;
+    if (!lodGeo.has(lod.file)) {
+      lodGeo.set(lod.file, dataTask('geo', assetURL(`data/${lod.file}`), vendoredURLs(LIBS.topojson))
+        .catch(err => {
+          lodGeo.delete(lod.file);
+          throw err;
+        }));
+    }
+    const geo = await lodGeo.get(lod.file);
+    if (lodShown !== lod.file || !geo) return; // zoom moved on meanwhile
+    const byId = new Map(geo.features.map(f => [iso(f.properties), f]));
+    countryLayer.eachLayer(layer => {
+      const id = iso(layer.feature?.properties);
+      const feat = byId.get(id);
+      if (!feat) return;
+      layer.feature.geometry = feat.geometry;
+      const depth = feat.geometry.type === 'Polygon' ? 1 : 2;
+      layer.setLatLngs(L.GeoJSON.coordsToLatLngs(feat.geometry.coordinates, depth));
+    });
+    redrawSelectionOutline();
+  }
+
     // Arrows
     function getArrowColorValue(d) {
       const sel = document.getElementById('arrowColorVar');
@@ -1195,102 +1846,93 @@ const fmtPct = v => {
       return METRIC_COLORS[key] || '#94a3b8';
     };
 
-    renderCompare = function renderCompare(openPanel = false, opts = {}) {
-      const { resetSort = false } = opts;
-      const panel = document.getElementById('detailPanel');
-      const body = document.getElementById('detail-body');
-      if (!panel || !body) return;
-      // keep comparePins in sync with selectedCountries
-      comparePins.length = 0;
-      selectedCountries.forEach(id => comparePins.push(id));
-      if (resetSort) resetCompareSort();
-      if (!comparePins.length) {
-        body.innerHTML = 'Click countries to add them to the comparison table.';
-        hideDetail();
-        return;
-      }
-
-      const rows = comparePins.map(id => {
-        const name = countryNames[id] || id;
-        const f = factors[id] || {};
-        const ref = flows.find(x => x.dest_iso3 === id) || {};
-        return { id, name, f, ref };
-      });
-
-      const getSortValue = (row, key) => {
-        switch (key) {
-          case 'country':       return row.name || row.id;
-          case 'gdp_pc':        return row.f.gdp_pc;
-          case 'unemployment':  return row.f.unemployment;
-          case 'alloc_pct_gdp': return row.f.alloc_pct_gdp;
-          case 'total_refugees':return row.ref.total_refugees;
-          default:              return row.name || row.id;
-        }
-      };
+    // Compare panel: one store entry per pinned country, keyed by ISO3, and
+    // keyed d3 joins for the table rows and chart bars, so a pin, unpin or
+    // sort only adds, removes, moves or rewrites the elements it changes
+    const compareRows = new Map(); // iso3 -> { id, name, f, ref }
+    let compareHeaderShown = null; // the header html in the current frame
+    const CHART_BAR_H = 14;
+    const CHART_GAP = 8;
+    const CHART_MARGIN = { t: 12, r: 16, b: 12, l: 70 }; // shift bars further left
+
+    // Write only when the value differs, so unchanged cells are left alone
+    function setText(el, text) {
+      if (el.textContent !== text) el.textContent = text;
+    }
 
-      const allowedSortKeys = new Set(['country', 'gdp_pc', 'unemployment', 'alloc_pct_gdp', 'total_refugees']);
-      if (!allowedSortKeys.has(compareSort.key)) {
-        compareSort = { key: 'total_refugees', dir: 'desc' };
+    function syncCompareRows() {
+      for (const id of compareRows.keys()) {
+        if (!selectedCountries.has(id)) compareRows.delete(id);
       }
+      for (const id of comparePins) {
+        let row = compareRows.get(id);
+        if (!row) compareRows.set(id, row = { id, name: countryNames[id] || id });
+        row.f = factors[id] || {};
+        row.ref = flowsById.get(id) || {};
+      }
+      return comparePins.map(id => compareRows.get(id));
+    }
 
-      const sortDir = compareSort.dir === 'asc' ? 1 : -1;
-      const sortedRows = rows.slice().sort((a, b) => {
-        if (compareSort.key === 'country') {
-          return (a.name || a.id).localeCompare(b.name || b.id) * sortDir;
-        }
-        const va = getSortValue(a, compareSort.key);
-        const vb = getSortValue(b, compareSort.key);
-        const na = Number.isFinite(+va) ? +va : -Infinity;
-        const nb = Number.isFinite(+vb) ? +vb : -Infinity;
-        if (na === nb) return (a.name || '').localeCompare(b.name || '') * sortDir;
-        return na < nb ? -1 * sortDir : 1 * sortDir;
-      });
+    const getSortValue = (row, key) => {
+      switch (key) {
+        case 'country':       return row.name || row.id;
+        case 'gdp_pc':        return row.f.gdp_pc;
+        case 'unemployment':  return row.f.unemployment;
+        case 'alloc_pct_gdp': return row.f.alloc_pct_gdp;
+        case 'total_refugees':return row.ref.total_refugees;
+        default:              return row.name || row.id;
+      }
+    };
 
-      const columns = [
-        {
-          id: 'country',
-          label: 'Country',
-          align: 'left',
-          render: row =>
-            `<div class="compare-country">
-              <div class="name">${row.name}</div>
-              <div class="code">${row.id}</div>
-            </div>`
-        },
-        {
-          id: 'gdp_pc',
-          label: 'GDP per capita',
-          align: 'right',
-          render: row => fmtNum(row.f.gdp_pc),
-          color: metricColorFor('gdp_pc')
-        },
-        {
-          id: 'unemployment',
-          label: 'Unemployment rate',
-          align: 'right',
-          render: row => fmtPct(row.f.unemployment),
-          color: metricColorFor('unemployment')
-        },
-        {
-          id: 'alloc_pct_gdp',
-          label: 'Support for Ukraine % GDP',
-          align: 'right',
-          render: row => fmtPct(row.f.alloc_pct_gdp),
-          color: metricColorFor('alloc_pct_gdp')
-        },
-        {
-          id: 'total_refugees',
-          label: 'Total refugees',
-          align: 'right',
-          render: row => formatCount(row.ref.total_refugees),
-          color: '#cbd5e1'
-        }
-      ];
+    const compareColumns = [
+      {
+        id: 'country',
+        label: 'Country',
+        align: 'left'
+      },
+      {
+        id: 'gdp_pc',
+        label: 'GDP per capita',
+        align: 'right',
+        render: row => fmtNum(row.f.gdp_pc),
+        color: metricColorFor('gdp_pc')
+      },
+      {
+        id: 'unemployment',
+        label: 'Unemployment rate',
+        align: 'right',
+        render: row => fmtPct(row.f.unemployment),
+        color: metricColorFor('unemployment')
+      },
+      {
+        id: 'alloc_pct_gdp',
+        label: 'Support for Ukraine % GDP',
+        align: 'right',
+        render: row => fmtPct(row.f.alloc_pct_gdp),
+        color: metricColorFor('alloc_pct_gdp')
+      },
+      {
+        id: 'total_refugees',
+        label: 'Total refugees',
+        align: 'right',
+        render: row => formatCount(row.ref.total_refugees),
+        color: '#cbd5e1'
+      }
+    ];
+    const allowedSortKeys = new Set(compareColumns.map(c => c.id));
+    // Charts: total refugees first, then the table's order
+    const chartColumns = compareColumns.filter(c => c.id !== 'country');
+    chartColumns.sort((a, b) => (a.id === 'total_refugees' ? -1 : b.id === 'total_refugees' ? 1 : 0));
+
+    const cellStyle = col => {
+      const style = [];
+      if (col.align) style.push(`text-align:${col.align}`);
+      if (col.color) style.push(`color:${col.color}`);
+      return style.join(';');
+    };
 
-      const headerCells = columns.map(col => {
-        const style = [];
-        if (col.align) style.push(`text-align:${col.align}`);
-        if (col.color) style.push(`color:${col.color}`);
+    function compareHeader() {
+      return compareColumns.map(col => {
         const isSortable = col.id !== 'country';
         const isActive = isSortable && compareSort.key === col.id;
         const indicator = isSortable
@@ -1303,251 +1945,345 @@ const fmtPct = v => {
           : 'none';
         const title = isSortable ? 'Click to sort' : '';
         const dataKeyAttr = isSortable ? `data-key="${col.id}"` : '';
-        return `<th ${dataKeyAttr} class="${sortableClass} ${activeClass}" style="${style.join(';')}" aria-sort="${ariaSort}" title="${title}">${col.label}${indicator}</th>`;
-      }).join('');
-
-      const bodyRows = sortedRows.map(row => {
-        const cells = columns.map(col => {
-          if (col.id === 'country') {
-            return `
-              <td class="country-cell">
-                <div class="compare-country">
-                  <div class="name">${row.name}</div>
-                </div>
-                <button class="compare-remove" data-id="${row.id}" aria-label="Remove ${row.name}">×</button>
-              </td>
-            `;
-          }
-          const val = typeof col.render === 'function' ? col.render(row) : '';
-          const style = [];
-          const color = typeof col.getColor === 'function' ? col.getColor(row) : col.color;
-          if (col.align) style.push(`text-align:${col.align}`);
-          if (color) style.push(`color:${color}`);
-          return `<td style="${style.join(';')}">${val}</td>`;
-        }).join('');
-        return `<tr>${cells}</tr>`;
+        return `<th ${dataKeyAttr} class="${sortableClass} ${activeClass}" style="${cellStyle(col)}" aria-sort="${ariaSort}" title="${title}">${col.label}${indicator}</th>`;
       }).join('');
+    }
 
+    // The panel's frame, built once; the empty-state message or another
+    // detail view replaces it, in which case it is built again
+    function compareFrame(body, panel) {
+      let table = body.querySelector('.compare-table');
+      if (table) return table;
       body.innerHTML = `
         <div class="compare-charts"></div>
         <div class="compare-table-wrapper">
           <div class="compare-hint">Click any metric header to sort</div>
           <table class="compare-table">
-            <thead><tr>${headerCells}</tr></thead>
-            <tbody>${bodyRows}</tbody>
+            <thead><tr></tr></thead>
+            <tbody></tbody>
           </table>
         </div>
       `;
-      const shouldOpen = openPanel || panel.classList.contains('open');
-      if (shouldOpen) {
-        panel.classList.add('open');
-        panel.style.display = 'block';
-        panel.focus?.();
-      } else {
-        panel.classList.remove('open');
-        panel.style.display = 'none';
-      }
+      table = body.querySelector('.compare-table');
+      compareHeaderShown = null;
+      table.tHead.addEventListener('click', e => {
+        const key = e.target.closest('th.sortable')?.dataset.key;
+        if (!key || key === 'country') return;
+        if (compareSort.key === key) {
+          compareSort.dir = compareSort.dir === 'asc' ? 'desc' : 'asc';
+        } else {
+          compareSort = { key, dir: 'desc' };
+        }
+        renderCompare(panel.classList.contains('open'), { resetSort: false });
+      });
+      return table;
+    }
 
-      function renderCharts() {
-        const rootEl = body.querySelector('.compare-charts');
-        if (!rootEl || typeof d3 === 'undefined') return;
-        const root = d3.select(rootEl);
-        root.selectAll('*').remove();
-
-        const metricCols = columns.filter(c => c.id !== 'country');
-        metricCols.sort((a, b) => (a.id === 'total_refugees' ? -1 : b.id === 'total_refugees' ? 1 : 0));
-        const formatVal = (col, row) => {
-          switch (col.id) {
-            case 'gdp_pc': return fmtNum(row.f.gdp_pc);
-            case 'unemployment': return fmtPct(row.f.unemployment);
-            case 'alloc_pct_gdp': return fmtPct(row.f.alloc_pct_gdp);
-            case 'total_refugees': return formatCount(row.ref.total_refugees);
-            default: return '';
-          }
-        };
+    function renderCompareTable(table, sortedRows) {
+      const headerHtml = compareHeader();
+      if (headerHtml !== compareHeaderShown) {
+        table.tHead.rows[0].innerHTML = compareHeaderShown = headerHtml;
+      }
 
-        metricCols.forEach(col => {
-          const values = sortedRows.map(row => ({
-            row,
-            name: row.name || row.id,
-            id: row.id,
-            val: getSortValue(row, col.id)
-          })).filter(d => Number.isFinite(+d.val));
+      d3.select(table.tBodies[0])
+        .selectAll('tr')
+        .data(sortedRows, d => d.id)
+        .join(enter => enter.append('tr').each(function (row) {
+          this.innerHTML = compareColumns.map(col => (col.id === 'country'
+            ? `
+              <td class="country-cell">
+                <div class="compare-country">
+                  <div class="name">${row.name}</div>
+                </div>
+                <button class="compare-remove" data-id="${row.id}" aria-label="Remove ${row.name}">×</button>
+              </td>
+            `
+            : `<td style="${cellStyle(col)}"></td>`)).join('');
+        }))
+        .each(function (row) {
+          compareColumns.forEach((col, i) => {
+            if (col.render) setText(this.cells[i], col.render(row));
+          });
+        })
+        .order();
+    }
 
-          if (!values.length) return;
+    function renderCompareCharts(rootEl, sortedRows) {
+      if (!rootEl || typeof d3 === 'undefined') return;
+      const formatVal = (col, row) => {
+        switch (col.id) {
+          case 'gdp_pc': return fmtNum(row.f.gdp_pc);
+          case 'unemployment': return fmtPct(row.f.unemployment);
+          case 'alloc_pct_gdp': return fmtPct(row.f.alloc_pct_gdp);
+          case 'total_refugees': return formatCount(row.ref.total_refugees);
+          default: return '';
+        }
+      };
 
-          const card = root.append('div').attr('class', 'chart-card');
+      const charts = chartColumns.map(col => ({
+        col,
+        values: sortedRows.map(row => ({
+          row,
+          name: row.name || row.id,
+          id: row.id,
+          val: getSortValue(row, col.id)
+        })).filter(d => Number.isFinite(+d.val))
+      })).filter(c => c.values.length);
+
+      d3.select(rootEl)
+        .selectAll('div.chart-card')
+        .data(charts, d => d.col.id)
+        .join(enter => {
+          const card = enter.append('div').attr('class', 'chart-card');
           card.append('div')
             .attr('class', 'chart-title')
-            .text(col.label);
-
-          const barH = 14;
-          const gap = 8;
-          const margin = { t: 12, r: 16, b: 12, l: 70 }; // shift bars further left
-          const containerW = Math.max(320, (card.node()?.clientWidth || 400));
-          const usable = containerW * 0.9;
-          const width = usable;
-          const height = values.length * (barH + gap) + margin.t + margin.b - gap;
+            .text(d => d.col.label);
+          card.append('svg')
+            .attr('class', 'bar-chart')
+            .attr('width', '100%')
+            .append('g')
+            .attr('transform', `translate(${CHART_MARGIN.l},${CHART_MARGIN.t})`);
+          return card;
+        })
+        .order()
+        .each(function ({ col, values }) {
+          const card = d3.select(this);
+          const containerW = Math.max(320, (this.clientWidth || 400));
+          const width = containerW * 0.9;
+          const height = values.length * (CHART_BAR_H + CHART_GAP) + CHART_MARGIN.t + CHART_MARGIN.b - CHART_GAP;
 
           const maxVal = d3.max(values, d => +d.val) || 1;
           const x = d3.scaleLinear()
             .domain([0, maxVal])
-            .range([0, width - margin.l - margin.r]);
+            .range([0, width - CHART_MARGIN.l - CHART_MARGIN.r]);
 
-          const svg = card.append('svg')
-            .attr('class', 'bar-chart')
-            .attr('width', '100%')
+          card.select('svg')
             .attr('height', height)
             .attr('viewBox', `0 0 ${width} ${height}`);
 
-          const g = svg.append('g').attr('transform', `translate(${margin.l},${margin.t})`);
-
           const colorFor = row =>
             (typeof col.getColor === 'function' ? col.getColor(row) : col.color) || '#38bdf8';
 
-          g.selectAll('rect')
-            .data(values)
-            .enter()
-            .append('rect')
-            .attr('x', 0)
-            .attr('y', (_, i) => i * (barH + gap))
-            .attr('width', d => x(Math.max(0, +d.val)))
-            .attr('height', barH)
-            .attr('rx', 4)
-            .attr('ry', 4)
-            .attr('fill', d => colorFor(d.row));
-
-          g.selectAll('text.name')
-            .data(values)
-            .enter()
-            .append('text')
-            .attr('class', 'bar-label')
-            .attr('x', -10)
-            .attr('y', (_, i) => i * (barH + gap) + barH * 0.7)
-            .attr('text-anchor', 'end')
-            .text(d => `${d.name}`);
-
-          g.selectAll('text.val')
-            .data(values)
-            .enter()
-            .append('text')
-            .attr('class', 'bar-value')
-            .attr('x', d => x(Math.max(0, +d.val)) + 6)
-            .attr('y', (_, i) => i * (barH + gap) + barH * 0.7)
-            .text(d => formatVal(col, d.row));
+          card.select('g')
+            .selectAll('g.bar-row')
+            .data(values, d => d.id)
+            .join(enter => {
+              const bar = enter.append('g').attr('class', 'bar-row');
+              bar.append('rect')
+                .attr('x', 0)
+                .attr('height', CHART_BAR_H)
+                .attr('rx', 4)
+                .attr('ry', 4);
+              bar.append('text')
+                .attr('class', 'bar-label')
+                .attr('x', -10)
+                .attr('y', CHART_BAR_H * 0.7)
+                .attr('text-anchor', 'end')
+                .text(d => `${d.name}`);
+              bar.append('text')
+                .attr('class', 'bar-value')
+                .attr('y', CHART_BAR_H * 0.7);
+              return bar;
+            })
+            .attr('transform', (_, i) => `translate(0,${i * (CHART_BAR_H + CHART_GAP)})`)
+            .order()
+            .each(function (d) {
+              const w = x(Math.max(0, +d.val));
+              const bar = d3.select(this);
+              bar.select('rect')
+                .attr('width', w)
+                .attr('fill', colorFor(d.row));
+              const label = bar.select('text.bar-value').attr('x', w + 6);
+              setText(label.node(), formatVal(col, d.row));
+            });
         });
+    }
+
+    renderCompare = function renderCompare(openPanel = false, opts = {}) {
+      const { resetSort = false } = opts;
+      const panel = document.getElementById('detailPanel');
+      const body = document.getElementById('detail-body');
+      if (!panel || !body) return;
+      // keep comparePins in sync with selectedCountries
+      comparePins.length = 0;
+      selectedCountries.forEach(id => comparePins.push(id));
+      if (resetSort) resetCompareSort();
+      if (!comparePins.length) {
+        compareRows.clear();
+        body.innerHTML = 'Click countries to add them to the comparison table.';
+        hideDetail();
+        return;
       }
 
-      renderCharts();
+      const rows = syncCompareRows();
 
-      body.querySelectorAll('.compare-table th.sortable').forEach(th => {
-        th.addEventListener('click', () => {
-          const key = th.dataset.key;
-          if (!key || key === 'country') return;
-          if (compareSort.key === key) {
-            compareSort.dir = compareSort.dir === 'asc' ? 'desc' : 'asc';
-          } else {
-            compareSort = { key, dir: 'desc' };
-          }
-          renderCompare(panel.classList.contains('open'), { resetSort: false });
-        });
+      if (!allowedSortKeys.has(compareSort.key)) {
+        compareSort = { key: 'total_refugees', dir: 'desc' };
+      }
+
+      const sortDir = compareSort.dir === 'asc' ? 1 : -1;
+      const sortedRows = rows.slice().sort((a, b) => {
+        if (compareSort.key === 'country') {
+          return (a.name || a.id).localeCompare(b.name || b.id) * sortDir;
+        }
+        const va = getSortValue(a, compareSort.key);
+        const vb = getSortValue(b, compareSort.key);
+        const na = Number.isFinite(+va) ? +va : -Infinity;
+        const nb = Number.isFinite(+vb) ? +vb : -Infinity;
+        if (na === nb) return (a.name || '').localeCompare(b.name || '') * sortDir;
+        return na < nb ? -1 * sortDir : 1 * sortDir;
       });
-    }
 
-    function bez(a, c, b, n = 40) {
-      const pts = [];
-      for (let i = 0; i <= n; i++) {
-        const t = i / n, u = 1 - t;
-        pts.push([
-          u*u*a.lat + 2*u*t*c.lat + t*t*b.lat,
-          u*u*a.lng + 2*u*t*c.lng + t*t*b.lng
-        ]);
+      const table = compareFrame(body, panel);
+      renderCompareTable(table, sortedRows);
+      const shouldOpen = openPanel || panel.classList.contains('open');
+      if (shouldOpen) {
+        panel.classList.add('open');
+        panel.style.display = 'block';
+        panel.focus?.();
+      } else {
+        panel.classList.remove('open');
+        panel.style.display = 'none';
       }
-      return pts;
+
+      renderCompareCharts(body.querySelector('.compare-charts'), sortedRows);
     }
 
   function drawArrows() {
     arrowsGroup.clearLayers();
-    if (!flows.length) {
+    if (!flowPaths.length) {
       flowEngine?.setFlows([]);
       return;
-      }
-      if (!flowEngine) {
-        flowEngine = new FlowParticleEngine(map, 'arrows');
     }
-    const origin = L.latLng(ARROW_ORIGIN[0], ARROW_ORIGIN[1]);
-
-    const jitterPath = (from, to) => [from, to]; // straight path, no wiggle
-
-    const visibleFlows = flows.filter(d => isCountryVisible(d.dest_iso3));
-    const flowData = [];
-    visibleFlows.forEach(d => {
-      const dest = L.latLng(+d.lat, +d.lon);
-      const anchorLL = centroidLL[d.dest_iso3] ? L.latLng(centroidLL[d.dest_iso3][0], centroidLL[d.dest_iso3][1]) : dest;
-      const samples = jitterPath(origin, anchorLL);
-      const distKm = origin.distanceTo(dest) / 1000;
-      const duration = Math.min(12, Math.max(5, distKm / 350)); // longer routes take a bit longer
-      const intensity = Math.max(0.2, Math.min(1.2, (widthScale(+d.total_refugees || 1) || 1) / 10));
-      const dots = Math.max(0, (+d.total_refugees || 0) / PEOPLE_PER_PARTICLE);
-      const spawnRate = dots > 0 ? Math.min(40, Math.max(2, dots / duration)) : 0; // dots per second
-      const demoRaw = {
-        men:      +d.pct_men_adult,
-        women:    +d.pct_women_adult,
-        children: +d.pct_children,
-        elderly:  +d.pct_elderly
-      };
-      let sumDemo = 0;
-      DEMO_CATS.forEach(cat => { sumDemo += Math.max(0, demoRaw[cat.key] || 0); });
-      const normDemo = DEMO_CATS.map(cat => {
-        const v = Math.max(0, demoRaw[cat.key] || 0);
-        return { key: cat.key, color: cat.color, p: sumDemo > 0 ? v / sumDemo : 1 / DEMO_CATS.length };
-      });
-      // ensure sum to 1
-      const totalP = normDemo.reduce((a, b) => a + b.p, 0);
-      normDemo.forEach(d => { d.p = d.p / (totalP || 1); });
+    if (!flowEngine) {
+      flowEngine = new FlowParticleEngine(map, 'arrows');
+    }
+    flowEngine.setFlows(flowPaths.filter(p => isCountryVisible(p.id)));
+  }
 
-      const labelMap = {
-        men: 'Men',
-        women: 'Women',
-        children: 'Children',
-        elderly: 'Elderly'
-      };
-      const compLines = normDemo.map(cat => {
-        return `<span style="color:${cat.color}">${labelMap[cat.key] || cat.key}: ${fmtPct(cat.p)}</span>`;
-      }).join('<br>');
-
-      // split into per-category flows so particles target the matching bar
-      const BAR_W = 10, BAR_GAP = 6;
-      const totalW = VARS.length * BAR_W + (VARS.length - 1) * BAR_GAP;
-      const anchorPt = map.latLngToLayerPoint(anchorLL);
-
-      normDemo.forEach((cat) => {
-        const pShare = cat.p;
-        if (pShare <= 0) return;
-        const idx = Math.max(0, VARS.indexOf(cat.key));
-        const shiftX = -totalW / 2 + idx * (BAR_W + BAR_GAP) + BAR_W / 2;
-        const barTarget = map.layerPointToLatLng(anchorPt.add([shiftX, 0]));
-        const path = jitterPath(samples[0], barTarget);
-        flowData.push({
-          id: d.dest_iso3,
-          latlngs: path,
-          duration,
-          intensity,
-          spawnRate: (spawnRate * pShare),
-          color: '#ffffff',
-          distro: [{ color: '#ffffff', p: 1 }],
-          spread: 1 + intensity * 2.8,
-          total: d.total_refugees || 0,
-          tooltip: `<div><b>${labelMap[cat.key] || cat.key}</b></div><div>${fmtPct(cat.p)}</div><div style="margin-top:6px;"><b>Total refugees:</b> ${formatCount(d.total_refugees)}</div>`
+  // ?webgl minis: every bar is one instance of a quad on a canvas in the
+  // minis pane. It is a Leaflet renderer like L.Canvas, so it pans and
+  // zoom-animates with the map and redraws on moveend / zoomend or new
+  // bars; hover is a rectangle test on the map's mousemove.
+  const BAR_VS = `
+    attribute vec2 a_corner;  // 0..1 across the bar
+    attribute vec4 a_rect;    // x, y, width, height in css px
+    attribute float a_color;  // index into VARS
+    uniform vec2 u_scale;     // css px -> clip space
+    uniform vec3 u_fill[${VARS.length}];
+    uniform vec3 u_stroke[${VARS.length}];
+    varying vec2 v_px;
+    varying vec2 v_size;
+    varying vec3 v_fill;
+    varying vec3 v_stroke;
+    void main() {
+      int c = int(a_color + 0.5);
+      v_px = a_corner * a_rect.zw;
+      v_size = a_rect.zw;
+      v_fill = u_fill[c];
+      v_stroke = u_stroke[c];
+      gl_Position = vec4((a_rect.xy + v_px) * u_scale + vec2(-1.0, 1.0), 0.0, 1.0);
+    }`;
+  const BAR_FS = `
+    precision mediump float;
+    varying vec2 v_px;
+    varying vec2 v_size;
+    varying vec3 v_fill;
+    varying vec3 v_stroke;
+    void main() {
+      vec2 edge = min(v_px, v_size - v_px);
+      gl_FragColor = vec4(min(edge.x, edge.y) < 0.8 ? v_stroke : v_fill, 1.0);
+    }`;
+
+  function createMiniBarsGL() {
+    const canvas = L.DomUtil.create('canvas');
+    canvas.style.pointerEvents = 'none';
+    const ctx = glContext(canvas, { premultipliedAlpha: true });
+    if (!ctx) return null;
+    const { gl } = ctx;
+    let prog;
+    try { prog = glProgram(gl, BAR_VS, BAR_FS); }
+    catch (e) { console.warn('[webgl]', e); return null; }
+    const corner = gl.createBuffer();
+    gl.bindBuffer(gl.ARRAY_BUFFER, corner);
+    gl.bufferData(gl.ARRAY_BUFFER, new Float32Array([0, 0, 1, 0, 1, 1, 0, 0, 1, 1, 0, 1]), gl.STATIC_DRAW);
+    glAttrib(ctx, prog, 'a_corner', corner, 2);
+    const rectBuf = gl.createBuffer(), colorBuf = gl.createBuffer();
+    glAttrib(ctx, prog, 'a_rect', rectBuf, 4, 1);
+    glAttrib(ctx, prog, 'a_color', colorBuf, 1, 1);
+    const rgb = hex => { const c = d3.color(hex); return [c.r / 255, c.g / 255, c.b / 255]; };
+    gl.uniform3fv(gl.getUniformLocation(prog, 'u_fill'), VARS.flatMap(v => rgb(COLORS[v])));
+    gl.uniform3fv(gl.getUniformLocation(prog, 'u_stroke'), VARS.flatMap(v => rgb(STROKES[v])));
+    const uScale = gl.getUniformLocation(prog, 'u_scale');
+
+    let bars = []; // { ll, x, y, w, h, varName, label }, x / y from the anchor
+    const Layer = L.Renderer.extend({
+      _initContainer() { this._container = canvas; },
+      _destroyContainer() { L.DomUtil.remove(canvas); },
+
+      _update() {
+        if (this._map._animatingZoom && this._bounds) return;
+        L.Renderer.prototype._update.call(this);
+        const size = this._bounds.getSize(), dpr = window.devicePixelRatio || 1;
+        L.DomUtil.setPosition(canvas, this._bounds.min);
+        canvas.width = dpr * size.x;
+        canvas.height = dpr * size.y;
+        canvas.style.width = `${size.x}px`;
+        canvas.style.height = `${size.y}px`;
+        this.redraw();
+      },
+
+      setBars(next) {
+        bars = next;
+        if (this._bounds) this.redraw();
+      },
+
+      redraw() {
+        const min = this._bounds.min, size = this._bounds.getSize();
+        const rects = new Float32Array(4 * bars.length), colors = new Float32Array(bars.length);
+        bars.forEach((bar, i) => {
+          const p = this._map.latLngToLayerPoint(bar.ll);
+          rects[4 * i] = p.x - min.x + bar.x;
+          rects[4 * i + 1] = p.y - min.y + bar.y;
+          rects[4 * i + 2] = bar.w;
+          rects[4 * i + 3] = bar.h;
+          colors[i] = VARS.indexOf(bar.varName);
         });
-      });
+        gl.viewport(0, 0, canvas.width, canvas.height);
+        gl.clearColor(0, 0, 0, 0);
+        gl.clear(gl.COLOR_BUFFER_BIT);
+        if (!bars.length) return;
+        gl.bindBuffer(gl.ARRAY_BUFFER, rectBuf);
+        gl.bufferData(gl.ARRAY_BUFFER, rects, gl.DYNAMIC_DRAW);
+        gl.bindBuffer(gl.ARRAY_BUFFER, colorBuf);
+        gl.bufferData(gl.ARRAY_BUFFER, colors, gl.DYNAMIC_DRAW);
+        gl.uniform2f(uScale, 2 / size.x, -2 / size.y);
+        ctx.drawInstanced(gl.TRIANGLES, 0, 6, bars.length);
+      },
+
+      // Topmost bar under a layer point
+      hit(lp) {
+        for (let i = bars.length - 1; i >= 0; i--) {
+          const bar = bars[i], p = this._map.latLngToLayerPoint(bar.ll);
+          const x = lp.x - p.x - bar.x, y = lp.y - p.y - bar.y;
+          if (x >= 0 && x <= bar.w && y >= 0 && y <= bar.h) return bar;
+        }
+        return null;
+      }
     });
 
-      flowEngine.setFlows(flowData);
-
-      // Lightweight tooltip hit areas showing total refugees
-      // no flow hover tooltips
-    }
+    const layer = new Layer({ pane: 'minis', padding: 0.5 }).addTo(map);
+    map.on('mousemove', e => {
+      const bar = layer.hit(e.layerPoint);
+      if (!bar) { miniTooltip.style.display = 'none'; return; }
+      miniTooltip.textContent = bar.label;
+      miniTooltip.style.display = 'block';
+      miniTooltip.style.left = `${e.originalEvent.clientX + 8}px`;
+      miniTooltip.style.top = `${e.originalEvent.clientY + 8}px`;
+    });
+    map.on('mouseout', () => { miniTooltip.style.display = 'none'; });
+    return layer;
+  }
 
     // Minis
   function project(lat, lon) {
@@ -1560,6 +2296,8 @@ const fmtPct = v => {
       const mode   = getBoxMode();
       const ids    = Object.keys(factors).filter(isCountryVisible);
       const shouldTransition = (mode !== drawMinis._lastMode);
+      if (USE_WEBGL && miniBars === undefined) miniBars = createMiniBarsGL();
+      const labelMap = { women: 'Women', children: 'Children', men: 'Men', elderly: 'Elderly' };
 
       // Only keep variables we actually know how to transform + have scales for
       const activeVars = active.filter(v =>
@@ -1572,6 +2310,7 @@ const fmtPct = v => {
           if (el) el.style.opacity = '1';
         });
         miniRoot.selectAll('g.mini').remove();
+        miniBars?.setBars([]);
         return;
       }
 
@@ -1602,6 +2341,20 @@ const fmtPct = v => {
         el.style.opacity = hasMini ? '0' : '1';
       });
 
+      if (miniBars) {
+        miniBars.setBars(data.flatMap(d => d.sizes.map((s, i) => ({
+          ll: d.ll,
+          x: miniBarX(i, d.sizes.length),
+          y: -s.s,
+          w: MINI_BAR_W,
+          h: s.s,
+          varName: s.varName,
+          label: `${labelMap[s.varName] || s.varName}: ${fmtPct(s.value)}`
+        }))));
+        drawMinis._lastMode = mode;
+        return;
+      }
+
       const groups = miniRoot.selectAll('g.mini').data(data, d => d.id);
       const enter  = groups.enter()
         .append('g')
@@ -1631,7 +2384,6 @@ const fmtPct = v => {
         .attr('stroke', s => STROKES[s.varName]  || '#374151');
 
       rectsEnter.append('title');
-      const labelMap = { women: 'Women', children: 'Children', men: 'Men', elderly: 'Elderly' };
       rectsMerged.select('title').text(function (s) {
         const label = labelMap[s.varName] || s.varName;
         return `${label}: ${fmtPct(s.value)}`;
@@ -1653,17 +2405,12 @@ const fmtPct = v => {
           miniTooltip.style.display = 'none';
         });
 
-      const baseW = 10;
-      const baseGap = 6;
-
       const applyPos = sel => sel
         .attr('x', function (s, i) {
-          const d = this.parentNode.__data__;
-          const totalW = d.sizes.length * baseW + (d.sizes.length - 1) * baseGap;
-          return -totalW / 2 + i * (baseW + baseGap);
+          return miniBarX(i, this.parentNode.__data__.sizes.length);
         })
         .attr('y', s => -s.s)
-        .attr('width', baseW)
+        .attr('width', MINI_BAR_W)
         .attr('height', s => s.s);
 
       applyPos(rectsMerged);
@@ -1887,12 +2634,132 @@ const fmtPct = v => {
     }
 
     // Initial draw
+    const endLayers = perf.start('boot:layers');
     safe(drawCountries, '[init:countries]');
+    perf.span('render:updateLod', updateLod).catch(e => console.warn('[lod]', e));
     safe(drawArrows,    '[init:arrows]');
     safe(drawMinis,     '[init:minis]');
     safe(renderArrowLegend, '[legend:arrows]');
     safe(renderBoxLegend,   '[legend:boxes]');
     safe(renderTotalLegend, '[legend:total]');
+    endLayers();
+
+    // Time slider: monthly flows from data/flows_ua_series/ (build with
+    // build_flows_from_migr_asytpsm.py --series). Months are fetched one at
+    // a time as the slider reaches them; the last stop is the latest
+    // per-country snapshot loaded at boot.
+    const SERIES_DIR = 'data/flows_ua_series/';
+    const latestFlows = flows;
+    const seriesMonths = new Map(); // period -> Promise of the month file
+    let seriesManifest = null;
+    let shownPeriod = null;
+
+    // A month as js/data.js's columns, limited to destinations placed on
+    // the map, with its totals
+    function loadSeriesMonth(period) {
+      if (!seriesMonths.has(period)) {
+        const file = seriesManifest.file.replace('{period}', period);
+        const placed = Object.keys(destLL).filter(id => destLL[id].every(Number.isFinite));
+        seriesMonths.set(period, dataTask('month', assetURL(SERIES_DIR + file), placed).catch(err => {
+          seriesMonths.delete(period);
+          throw err;
+        }));
+      }
+      return seriesMonths.get(period);
+    }
+
+    function flowsFromMonth({ ids, cols }) {
+      return ids.map((id, i) => ({
+        dest_iso3: id,
+        lat: destLL[id][0],
+        lon: destLL[id][1],
+        total_refugees:  cols.total_refugees[i],
+        pct_children:    cols.pct_children[i],
+        pct_elderly:     cols.pct_elderly[i],
+        pct_women_adult: cols.pct_women_adult[i],
+        pct_men_adult:   cols.pct_men_adult[i]
+      }));
+    }
+
+    // A month keeps each destination's path and duration from the snapshot;
+    // dots per second and category shares follow the month's figures
+    function pathsForMonth(rows) {
+      const byDest = d3.group(latestPaths, p => p.id);
+      const barDx = new Map(latestPaths.map(p => [p.category, p.dx]));
+      return rows.flatMap(d => {
+        const base = byDest.get(d.dest_iso3)?.[0];
+        if (!base) return [];
+        const dots = Math.max(0, d.total_refugees || 0) / PEOPLE_PER_PARTICLE;
+        const rate = dots > 0 ? Math.min(40, Math.max(2, dots / base.duration)) : 0;
+        const raw = {
+          men:      d.pct_men_adult,
+          women:    d.pct_women_adult,
+          children: d.pct_children,
+          elderly:  d.pct_elderly
+        };
+        const sum = d3.sum(Object.values(raw), v => Math.max(0, v || 0));
+        return Object.entries(raw).map(([category, v]) => {
+          const share = sum > 0 ? Math.max(0, v || 0) / sum : 1 / 4;
+          return { ...base, category, dx: barDx.get(category) ?? 0, spawnRate: rate * share, share };
+        }).filter(p => p.share > 0);
+      });
+    }
+
+    async function showPeriod(period) {
+      shownPeriod = period;
+      const month = period ? await loadSeriesMonth(period) : null;
+      if (shownPeriod !== period) return; // slider moved on meanwhile
+      const rows = month ? flowsFromMonth(month) : latestFlows;
+      flows = rows;
+      flowsById = new Map(rows.map(f => [f.dest_iso3, f]));
+      flowPaths = period ? pathsForMonth(rows) : latestPaths;
+      window.bb.flows = flows;
+      applyDemographics();
+      applyTotals(month ? month.totals : latestTotals);
+      buildMiniScales();
+      restyleCountries();
+      safe(drawArrows, '[period:arrows]');
+      safe(drawMinis,  '[period:minis]');
+      safe(renderArrowLegend, '[period:legend-arrows]');
+      safe(renderTotalLegend, '[period:legend-total]');
+      safe(() => renderCompare(false), '[period:compare]');
+    }
+
+    function buildTimeSlider(manifest) {
+      const wrap   = document.getElementById('time-controls');
+      const slider = document.getElementById('periodSlider');
+      const label  = document.getElementById('periodLabel');
+      const periods = manifest?.periods || [];
+      if (!wrap || !slider || !periods.length) return;
+      seriesManifest = manifest;
+      const fmtPeriod = d3.timeFormat('%b %Y');
+      const parsePeriod = d3.timeParse('%Y-%m');
+      const periodAt = i => (i < periods.length ? periods[i] : null);
+      const labelFor = p => (p ? fmtPeriod(parsePeriod(p)) : 'Latest');
+
+      slider.min = 0;
+      slider.max = periods.length; // last stop = latest snapshot
+      slider.value = periods.length;
+      label.textContent = labelFor(null);
+      wrap.hidden = false;
+
+      slider.addEventListener('input', () => {
+        const i = +slider.value;
+        const p = periodAt(i);
+        label.textContent = labelFor(p);
+        showPeriod(p)
+          .then(() => {
+            // Warm the next stop so stepping forward does not wait
+            const next = periodAt(i + 1);
+            if (next) loadSeriesMonth(next).catch(() => {});
+          })
+          .catch(e => console.warn('[period]', p, e));
+      });
+    }
+
+    fetchJSON(asset(SERIES_DIR + 'manifest.json'))
+      .then(buildTimeSlider)
+      .catch(() => {}); // no series built: keep the snapshot only
 
     // Reposition minis on pan/zoom
   map.on('moveend zoomend', () => {
@@ -1901,6 +2768,7 @@ const fmtPct = v => {
   });
   map.on('zoomend', () => {
     if (flowEngine) flowEngine.dirty = true;
+    perf.span('render:updateLod', updateLod).catch(e => console.warn('[lod]', e));
   });
   window.addEventListener('resize', () => {
     map.invalidateSize();
@@ -1998,7 +2866,9 @@ const fmtPct = v => {
     console.error('[load error]', e);
   } finally {
     hideDetail();
+    endBoot();
     window.bb.ready = true;
     window.dispatchEvent(new Event('bb:ready'));
+    if (Number(PERF_PARAM) > 0) setTimeout(() => perf.download(), Number(PERF_PARAM) * 1000);
   }
 })();
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""Benchmark the data pipeline on synthetic Eurostat inputs 10x, 100x, 1000x today's size.
+
+For each scale the four raw SDMX-CSV ("linear 2.0") inputs are written into
+a throw-away copy of the tree, then every build stage fed by them (see
+build.py) runs in its own process, timed and measured:
+
+    python scripts/bench.py                          # scales 1, 10, 100, 1000
+    python scripts/bench.py --scales 10 100 --baseline .cache/bench/old.json
+    python scripts/bench.py --max-slowdown 1.3 --baseline base.json   # CI gate
+
+Fixtures keep the real column layouts.  Scale 1 is the extract in data/ (for
+migr_asytpsm, which is not kept in data/, a generated grid of UA and TOTAL
+citizenships over ~32 hosts and 3.5 years of months).  Scale N adds N - 1
+copies of those rows under made-up codes in a dimension the build filters
+on (citizenship or unit), like a full Eurostat download next to a custom
+extract: the stages parse N times the rows and still produce the same
+outputs.  A scale is skipped when its fixtures would not fit on disk.
+
+Stages reading Eurostat files run twice, "cold" (empty parse cache) and
+"warm" (cache filled by the cold run); other stages run once.  Wall time,
+CPU time (user + system) and peak RSS of each run, plus the per-step
+records the scripts emit (instrument.py), go to a JSON file
+(.cache/bench/ by default).  With --baseline the run is compared against an
+earlier file, matched on (scale, stage, mode).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import build
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = ROOT / ".cache" / "bench"
+RESULTS_VERSION = 1
+
+# Raw input -> dimension whose extra codes pad it out, and the code pattern
+FIXTURES = {
+    "data/migr_asytpsm_linear_2_0.csv":                   ("citizen", "Z{:04d}"),
+    "data/migr_resvalid__custom_18711207_linear_2_0.csv": ("citizen", "Z{:04d}"),
+    "data/sdg_08_10_linear_2_0.csv":                      ("unit", "SYN{:04d}"),
+    "data/une_rt_a$defaultview_linear_2_0.csv":           ("unit", "SYN{:04d}"),
+}
+
+ASYTPSM_HEADER = [
+    "STRUCTURE", "STRUCTURE_ID", "STRUCTURE_NAME", "freq", "Time frequency",
+    "unit", "Unit of measure", "citizen", "Country of citizenship", "sex", "Sex",
+    "age", "Age class", "geo", "Geopolitical entity (reporting)", "TIME_PERIOD",
+    "Time", "OBS_VALUE", "Observation value", "OBS_FLAG",
+    "Observation status (Flag) V2 structure", "CONF_STATUS",
+    "Confidentiality status (flag)",
+]
+ASYTPSM_GEOS = ("AT BE BG CH CY CZ DE DK EE EL ES FI FR HR HU IE IS IT LI LT LU "
+                "LV MT NL NO PL PT RO SE SI SK EU27_2020").split()
+ASYTPSM_AGES = ["TOTAL", "Y_LT18", "Y18-34", "Y35-64", "Y_GE65", "UNK",
+                "Y_LT14", "Y14-17", "Y65-79", "Y_GE80"]
+
+
+def asytpsm_rows(seed=1):
+    """Header and rows shaped like a custom migr_asytpsm extract."""
+    rng = random.Random(seed)
+    months = [f"{y}-{m:02d}" for y in range(2022, 2026) for m in range(1, 13)][2:-4]
+    name = ("Beneficiaries of temporary protection at the end of the month by "
+            "citizenship, age and sex - monthly data")
+    rows = []
+    for cit, cit_name in (("UA", "Ukraine"), ("TOTAL", "Total")):
+        for sex, sex_name in (("F", "Females"), ("M", "Males"), ("T", "Total"), ("UNK", "Unknown")):
+            for geo in ASYTPSM_GEOS:
+                for age in ASYTPSM_AGES:
+                    for month in months:
+                        hi = 200_000 if age == "TOTAL" else 40_000
+                        rows.append(["dataflow", "ESTAT:MIGR_ASYTPSM(1.0)", name, "M", "Monthly",
+                                     "NR", "Person", cit, cit_name, sex, sex_name, age, age,
+                                     geo, geo, month, "", str(rng.randint(0, hi) * 5), "",
+                                     "", "", "", ""])
+    return ASYTPSM_HEADER, rows
+
+
+def template(rel):
+    """(header, rows) at scale 1, or None when there is nothing to copy."""
+    if rel == "data/migr_asytpsm_linear_2_0.csv":
+        return asytpsm_rows()
+    path = ROOT / rel
+    if not path.exists():
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header, list(reader)
+
+
+def csv_block(rows):
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue()
+
+
+def write_fixture(path, header, rows, field, pattern, scale):
+    """Write rows once as they are plus scale - 1 relabelled copies."""
+    col = header.index(field)
+    marked = [r[:col] + ["\0"] + r[col + 1:] for r in rows]
+    block = csv_block(marked)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(csv_block([header]))
+        f.write(csv_block(rows))
+        for k in range(1, scale):
+            f.write(block.replace("\0", pattern.format(k)))
+    return {"rows": len(rows) * scale, "bytes": path.stat().st_size}
+
+
+def fixture_bytes(templates, scale):
+    """Rough size of one scale's fixtures."""
+    return sum(len(csv_block(rows[:200])) / max(1, len(rows[:200])) * len(rows) * scale
+               for _, rows in templates.values())
+
+
+def affected_stages():
+    """Stages that read a fixture, directly or through another stage."""
+    deps = build.dependencies()
+    hit = []
+    for name in build.topo_order(list(build.STAGES), deps):
+        if set(build.STAGES[name]["inputs"]) & set(FIXTURES) or deps[name] & set(hit):
+            hit.append(name)
+    return hit
+
+
+# Runs a stage script and records its own high-water RSS.  Linux carries
+# the parent's RSS at fork over into the child's ru_maxrss, so with the
+# fixture templates in memory that figure would be this process's size;
+# VmHWM belongs to the exec'd image alone.  instrument.py resets VmHWM at
+# each step, so the run's peak is the larger of this and the steps' peaks.
+CHILD = """\
+import os, runpy, sys
+script = sys.argv[1]
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(script))
+try:
+    runpy.run_path(script, run_name="__main__")
+finally:
+    try:
+        with open("/proc/self/status") as f:
+            kb = next(int(l.split()[1]) for l in f if l.startswith("VmHWM"))
+        with open(os.environ["BB_BENCH_RSS"], "w") as f:
+            f.write(str(kb))
+    except (OSError, StopIteration):
+        pass
+"""
+
+
+def measure(argv, cwd, env, log):
+    """Run a script; return wall/CPU seconds, peak RSS in MB, exit status and
+    the script's step records (see instrument.py)."""
+    rss_file = Path(cwd) / ".cache" / "bench_rss"
+    metrics_file = Path(cwd) / ".cache" / "bench_metrics.jsonl"
+    rss_file.parent.mkdir(parents=True, exist_ok=True)
+    rss_file.unlink(missing_ok=True)
+    metrics_file.unlink(missing_ok=True)
+    env = dict(env, BB_BENCH_RSS=str(rss_file), BB_METRICS=str(metrics_file))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD] + argv, cwd=cwd, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - start
+    if rss_file.exists():
+        rss = int(rss_file.read_text()) / 1024
+    else:
+        # no /proc: ru_maxrss, KiB on Linux and bytes on macOS
+        rss = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+    steps = []
+    if metrics_file.exists():
+        keep = ("step", "wall_s", "cpu_s", "peak_mb", "rows_in", "rows_out")
+        for line in metrics_file.read_text().splitlines():
+            rec = json.loads(line)
+            steps.append({k: rec.get(k) for k in keep})
+            rss = max(rss, rec["peak_mb"])
+    return {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(usage.ru_utime + usage.ru_stime, 3),
+        "peak_rss_mb": round(rss, 1),
+        "ok": proc.returncode == 0,
+        "steps": steps,
+    }
+
+
+def run_scale(scale, templates, stages, tree, log):
+    data = {}
+    for rel, (header, rows) in templates.items():
+        field, pattern = FIXTURES[rel]
+        data[rel] = write_fixture(tree / rel, header, rows, field, pattern, scale)
+        print(f"  {rel}: {data[rel]['rows']:,} rows, {data[rel]['bytes'] / 1e6:,.1f} MB")
+
+    cache = tree / ".cache" / "eurostat"
+    env = dict(os.environ, BB_CACHE_DIR=str(cache))
+    runs = []
+    for name in stages:
+        stage = build.STAGES[name]
+        if set(stage["inputs"]) & set(FIXTURES) - set(templates):
+            print(f"  [{name}] skipped: no template for its raw input")
+            continue
+        modes = ["cold", "warm"] if stage.get("cache") else ["run"]
+        if stage.get("cache"):
+            shutil.rmtree(cache, ignore_errors=True)
+        for mode in modes:
+            total = {"wall_s": 0.0, "cpu_s": 0.0, "peak_rss_mb": 0.0, "ok": True, "steps": []}
+            for script in stage["scripts"]:
+                argv = [f"scripts/{script}"] + stage.get("args", [])
+                log.write(f"\n### scale {scale} {name} {mode}: {' '.join(argv)}\n")
+                log.flush()
+                r = measure(argv, tree, env, log)
+                total["wall_s"] = round(total["wall_s"] + r["wall_s"], 3)
+                total["cpu_s"] = round(total["cpu_s"] + r["cpu_s"], 3)
+                total["peak_rss_mb"] = max(total["peak_rss_mb"], r["peak_rss_mb"])
+                total["ok"] = total["ok"] and r["ok"]
+                total["steps"] += r["steps"]
+            runs.append({"scale": scale, "stage": name, "mode": mode, **total})
+            print(f"  [{name}] {mode:4s} {total['wall_s']:9.2f} s wall "
+                  f"{total['cpu_s']:9.2f} s cpu {total['peak_rss_mb']:9.1f} MB"
+                  + ("" if total["ok"] else "  FAILED"), flush=True)
+    return data, runs
+
+
+def compare(results, baseline, max_slowdown):
+    """Print wall / RSS ratios against a baseline; True if within limits."""
+    key = lambda r: (r["scale"], r["stage"], r["mode"])
+    before = {key(r): r for r in baseline.get("runs", [])}
+    ok = True
+    print(f"\nAgainst baseline {baseline.get('created', '?')}:")
+    print(f"{'scale':>6} {'stage':14s} {'mode':5s} {'wall':>8} {'x':>6} {'rss MB':>8} {'x':>6}")
+    for r in results["runs"]:
+        b = before.get(key(r))
+        if b is None:
+            continue
+        wall_x = r["wall_s"] / b["wall_s"] if b["wall_s"] else float("inf")
+        rss_x = r["peak_rss_mb"] / b["peak_rss_mb"] if b["peak_rss_mb"] else float("inf")
+        flag = ""
+        if max_slowdown and wall_x > max_slowdown:
+            flag, ok = "  <-- slower", False
+        print(f"{r['scale']:>6} {r['stage']:14s} {r['mode']:5s} {r['wall_s']:8.2f} {wall_x:6.2f}"
+              f" {r['peak_rss_mb']:8.1f} {rss_x:6.2f}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="multiples of today's row counts (default: 1 10 100 1000)")
+    parser.add_argument("--out", type=Path,
+                        help="results file (default: .cache/bench/bench-<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--max-slowdown", type=float,
+                        help="with --baseline, exit 1 if a stage's wall time grew by more")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary tree")
+    args = parser.parse_args()
+
+    templates = {rel: t for rel in FIXTURES if (t := template(rel)) is not None}
+    for rel in FIXTURES.keys() - templates.keys():
+        print(f"No {rel} to build a fixture from; its stages are skipped")
+    stages = affected_stages()
+    print("Stages:", ", ".join(stages))
+
+    tmp = Path(tempfile.mkdtemp(prefix="bb-bench-"))
+    tree = tmp / "tree"
+    shutil.copytree(ROOT, tree, ignore=shutil.ignore_patterns(
+        ".git", ".cache", "__pycache__", "tiles", "ne10", "ne50", "*.zip"))
+    log_path = tmp / "bench.log"
+    print("Working tree:", tree)
+
+    now = datetime.now(timezone.utc)
+    results = {
+        "version": RESULTS_VERSION,
+        "created": now.isoformat(timespec="seconds"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "fixtures": {},
+        "skipped": {},
+        "runs": [],
+    }
+    try:
+        with open(log_path, "w") as log:
+            for scale in args.scales:
+                need = fixture_bytes(templates, scale)
+                free = shutil.disk_usage(tmp).free
+                if need > 0.8 * free:
+                    reason = f"needs ~{need / 1e9:.1f} GB, {free / 1e9:.1f} GB free"
+                    print(f"\nScale {scale}x skipped: {reason}")
+                    results["skipped"][str(scale)] = reason
+                    continue
+                print(f"\nScale {scale}x")
+                data, runs = run_scale(scale, templates, stages, tree, log)
+                results["fixtures"][str(scale)] = data
+                results["runs"] += runs
+                for rel in templates:
+                    (tree / rel).unlink(missing_ok=True)
+    finally:
+        if args.keep:
+            print("Kept", tmp, "(stage output in bench.log)")
+        else:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    out = args.out or RESULTS_DIR / f"bench-{now:%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=1))
+    print("\nWriting", out)
+
+    failed = [f"{r['stage']}@{r['scale']}x" for r in results["runs"] if not r["ok"]]
+    if failed:
+        raise SystemExit(f"Failed: {', '.join(failed)}")
+    if args.baseline:
+        if not compare(results, json.loads(args.baseline.read_text()), args.max_slowdown):
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
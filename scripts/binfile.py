@@ -0,0 +1,44 @@
+"""The binary framing shared by data/bundle.bin and data/europe*.merc.bin.
+
+    uint32 LE   length N of the JSON header
+    N bytes     header (UTF-8 JSON), zero-padded to a multiple of 8
+    ...         column blocks, each starting on an 8-byte boundary
+
+Each column is described by a dict somewhere inside the header; write()
+fills in its "offset" so the browser can wrap the block as a typed array
+straight off the fetched buffer:
+
+    entry = {"dtype": arr.dtype.name, "length": len(arr)}
+    header["columns"]["coords"] = entry
+    binfile.write(path, header, [(entry, arr)])
+"""
+import json
+import struct
+
+
+def pad8(n):
+    return (n + 7) // 8 * 8
+
+
+def write(path, header, blocks):
+    """Write `header` and the (entry, array) blocks; returns the byte size."""
+    # Offsets depend on the header size, which depends on the offsets' digits:
+    # lay out with a provisional size and repeat until it settles.
+    header_len = 0
+    while True:
+        pos = pad8(4 + header_len)
+        for entry, arr in blocks:
+            entry["offset"] = pos
+            pos = pad8(pos + arr.nbytes)
+        raw = json.dumps(header, separators=(",", ":")).encode()
+        if len(raw) == header_len:
+            break
+        header_len = len(raw)
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<I", len(raw)))
+        f.write(raw)
+        for entry, arr in blocks:
+            f.write(b"\0" * (entry["offset"] - f.tell()))
+            f.write(arr.tobytes())
+        return f.tell()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Rebuild the data/ artefacts, running only the stages whose inputs changed.
+
+Each stage lists the scripts it runs plus the files it reads and writes; the
+dependency graph between stages follows from those paths (a stage depends on
+whichever stage produces one of its inputs).  Like make, a stage is rebuilt
+when one of its outputs is missing or older than one of its inputs (--hash
+compares content hashes recorded at the last build instead of mtimes).
+
+    python scripts/build.py                 # everything that is out of date
+    python scripts/build.py bundle          # one target and what it needs
+    python scripts/build.py -j 4            # independent stages in parallel
+    python scripts/build.py --dry-run       # show what would run
+    python scripts/build.py --list          # stages, inputs and outputs
+    python scripts/build.py -v --profile    # debug output, cProfile per stage
+
+Every stage appends its step timings (wall, CPU, peak memory, rows in/out)
+to .cache/metrics.jsonl as JSON lines (rotated past BB_METRICS_MAX_MB); see
+instrument.py.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import runpy
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import instrument
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_PATH = ROOT / ".cache" / "build_state.json"
+PROFILE_DIR = instrument.PROFILE_DIR
+
+# Scripts reading raw Eurostat files also depend on the shared loader
+LOADER = "scripts/eurostat.py"
+# ... and the basemap stages on the shared TopoJSON helpers
+TOPO = "scripts/topo.py"
+LODS = ["data/europe.topo.json", "data/europe.lod1.topo.json", "data/europe.lod2.topo.json"]
+ANCHORS = "data/country_anchors.csv"
+# ... and the binary outputs on the shared framing
+BINFILE = "scripts/binfile.py"
+MERC = [p.replace(".topo.json", ".merc.bin") for p in LODS]
+
+STAGES = {
+    "gdp": {
+        "scripts": ["build_gdp_from_sdg_08_10.py"],
+        "inputs":  ["data/sdg_08_10_linear_2_0.csv", LOADER],
+        "outputs": ["data/gdp_pc_clean.csv"],
+        "cache":   True,
+    },
+    "unemployment": {
+        "scripts": ["build_unemployment_clean.py"],
+        "inputs":  ["data/une_rt_a$defaultview_linear_2_0.csv", LOADER],
+        "outputs": ["data/unemployment_clean.csv"],
+        "cache":   True,
+    },
+    "aid_summary": {
+        "scripts": ["build_country_summary_clean.py"],
+        "inputs":  ["data/9a488f59-b74d-4043-bef1-23ed4f2b6293-Ukraine-Support-Tracker-Release-25 (1).xlsx"],
+        "outputs": ["data/country_summary_clean.csv"],
+    },
+    # --series also writes data/flows_ua_series/; it is not a declared output
+    # because trees without the raw dump have never had one.
+    "flows": {
+        "scripts": ["build_flows_from_migr_asytpsm.py"],
+        "args":    ["--series"],
+        "inputs":  ["data/migr_asytpsm_linear_2_0.csv", LOADER],
+        "outputs": ["data/flows_ua_agg.csv"],
+        "cache":   True,
+    },
+    "flows_json": {
+        "scripts": ["build_flows_json.py"],
+        "inputs":  ["data/flows_ua_agg.csv", ANCHORS],
+        "outputs": ["data/flows_ua_agg.json"],
+    },
+    # build_respermits_metrics.py supersedes build_respermits_from_migr_resvalid.py:
+    # it writes the same respermits_ua_agg.* plus the metrics table.
+    "respermits": {
+        "scripts": ["build_respermits_metrics.py"],
+        "inputs":  ["data/migr_resvalid__custom_18711207_linear_2_0.csv",
+                    "data/flows_ua_agg.csv", ANCHORS, LOADER],
+        "outputs": ["data/respermits_ua_agg.csv", "data/respermits_ua_agg.json",
+                    "data/respermits_ua_metrics.csv", "data/respermits_ua_metrics.json"],
+        "cache":   True,
+    },
+    "geometry": {
+        "scripts": ["build_geometry.py"],
+        "inputs":  ["gisco/CNTR_RG_20M_2024_4326.geojson", TOPO],
+        "outputs": LODS,
+    },
+    # data/tiles/{z}/{x}/{y}.pbf; metadata.json stands in for the directory
+    "tiles": {
+        "scripts": ["build_tiles.py"],
+        "inputs":  LODS + [TOPO],
+        "outputs": ["data/tiles/metadata.json"],
+    },
+    # The same levels pre-projected to Web Mercator for the canvas renderer
+    "mercator": {
+        "scripts": ["build_mercator.py"],
+        "inputs":  LODS + [TOPO, BINFILE],
+        "outputs": MERC,
+    },
+    # Label anchors and centroids, the one source of country positions
+    "anchors": {
+        "scripts": ["build_anchors.py"],
+        "inputs":  ["data/europe.lod2.topo.json", TOPO],
+        "outputs": [ANCHORS],
+    },
+    # One pre-joined row per country, then packed for the browser
+    "country_facts": {
+        "scripts": ["build_country_facts.py"],
+        "inputs":  [ANCHORS, "data/flows_ua_agg.json", "data/gdp_pc_clean.csv",
+                    "data/unemployment_clean.csv", "data/country_summary_clean.csv",
+                    "data/respermits_ua_metrics.csv"],
+        "outputs": ["data/country_facts.csv"],
+    },
+    # Arrow particle schedule, derived from the joined facts
+    "flow_paths": {
+        "scripts": ["build_flow_paths.py"],
+        "inputs":  ["data/country_facts.csv"],
+        "outputs": ["data/flow_paths.csv"],
+    },
+    "bundle": {
+        "scripts": ["build_bundle.py"],
+        "inputs":  ["data/country_facts.csv", "data/flow_paths.csv", BINFILE],
+        "outputs": ["data/bundle.bin"],
+    },
+}
+
+
+def stage_inputs(name):
+    """Declared inputs plus the stage's own scripts."""
+    stage = STAGES[name]
+    return stage["inputs"] + [f"scripts/{s}" for s in stage["scripts"]]
+
+
+def producers():
+    """Map output path -> producing stage."""
+    made_by = {}
+    for name, stage in STAGES.items():
+        for out in stage["outputs"]:
+            if out in made_by:
+                raise SystemExit(f"{out} is produced by both {made_by[out]} and {name}")
+            made_by[out] = name
+    return made_by
+
+
+def dependencies():
+    """Map stage -> set of stages it depends on."""
+    made_by = producers()
+    return {
+        name: {made_by[i] for i in stage["inputs"] if i in made_by and made_by[i] != name}
+        for name, stage in STAGES.items()
+    }
+
+
+def topo_order(targets, deps):
+    """Stages needed for `targets`, dependencies first."""
+    order, seen, active = [], set(), set()
+
+    def visit(name):
+        if name in seen:
+            return
+        if name in active:
+            raise SystemExit(f"Dependency cycle through stage {name!r}")
+        active.add(name)
+        for dep in sorted(deps[name]):
+            visit(dep)
+        active.discard(name)
+        seen.add(name)
+        order.append(name)
+
+    for t in targets:
+        visit(t)
+    return order
+
+
+def resolve_targets(names):
+    """Accept stage names or output paths (relative to the repo root)."""
+    if not names:
+        return list(STAGES)
+    made_by = producers()
+    targets = []
+    for n in names:
+        if n in STAGES:
+            targets.append(n)
+        elif n in made_by:
+            targets.append(made_by[n])
+        else:
+            raise SystemExit(f"Unknown target {n!r}; see --list")
+    return targets
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def load_state():
+    try:
+        return json.loads(STATE_PATH.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(json.dumps(state, indent=1, sort_keys=True))
+
+
+def input_hashes(name):
+    return {i: file_sha256(ROOT / i) for i in stage_inputs(name) if (ROOT / i).exists()}
+
+
+def staleness(name, use_hash, state, rebuilt, force=False):
+    """Why `name` must run, or None when it is up to date."""
+    stage = STAGES[name]
+    made_by = producers()
+    missing_in = [i for i in stage_inputs(name)
+                  if not (ROOT / i).exists() and i not in made_by]
+    missing_out = [o for o in stage["outputs"] if not (ROOT / o).exists()]
+
+    if missing_in:
+        # Raw downloads are not all kept in data/; without them the
+        # committed outputs stand as they are.
+        if missing_out:
+            raise SystemExit(f"{name}: missing source {missing_in[0]} and output {missing_out[0]}")
+        return None
+    if missing_out:
+        return f"missing {missing_out[0]}"
+    if force:
+        return "forced"
+
+    if use_hash:
+        if input_hashes(name) != state.get(name):
+            return "inputs changed since last build"
+        return None
+
+    # An upstream stage that ran in this build always makes us stale
+    if any(made_by.get(i) in rebuilt for i in stage["inputs"]):
+        return "upstream rebuilt"
+    newest_in = max((ROOT / i).stat().st_mtime for i in stage_inputs(name))
+    oldest_out = min((ROOT / o).stat().st_mtime for o in stage["outputs"])
+    if newest_in > oldest_out:
+        return "inputs newer than outputs"
+    return None
+
+
+def run_stage(name, no_cache=False, capture=False, profile=False):
+    """Run a stage's scripts in this interpreter; returns (ok, captured output).
+
+    Scripts run through runpy as __main__, so a pool worker imports pandas
+    once and reuses it for every stage it is handed.  With `capture` the
+    output is buffered and printed by the parent as one block, so parallel
+    stages do not interleave line by line.  With `profile` the stage runs
+    under cProfile (stats in .cache/profile/<stage>.pstats).
+    """
+    stage = STAGES[name]
+    if str(ROOT / "scripts") not in sys.path:
+        sys.path.insert(0, str(ROOT / "scripts"))
+    buf = io.StringIO()
+    redirect = (contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf)) if capture else ()
+    with contextlib.ExitStack() as stack:
+        for r in redirect:
+            stack.enter_context(r)
+        record = stack.enter_context(instrument.stage(name, PROFILE_DIR if profile else None))
+        record["ok"] = run_scripts(name, stage, no_cache)
+    return record["ok"], buf.getvalue()
+
+
+def run_scripts(name, stage, no_cache):
+    for script in stage["scripts"]:
+        argv = [f"scripts/{script}"] + stage.get("args", [])
+        if no_cache and stage.get("cache"):
+            argv.append("--no-cache")
+        instrument.info(f"[{name}] $ python {' '.join(argv)}")
+        sys.argv = [str(ROOT / argv[0])] + argv[1:]
+        try:
+            runpy.run_path(sys.argv[0], run_name="__main__")
+        except SystemExit as e:
+            if e.code not in (None, 0):
+                print(f"[{name}] {script} exited: {e.code}")
+                return False
+        except Exception:
+            traceback.print_exc()
+            print(f"[{name}] {script} failed")
+            return False
+    return True
+
+
+def _init_worker():
+    # Pay for the heavy import once per worker, while other stages queue up
+    import pandas  # noqa: F401
+
+
+def run_all(order, deps, args):
+    """Run `order`, up to args.jobs stages at a time, each after its deps."""
+    state = load_state()
+    rebuilt, done, failed = set(), set(), set()
+    pending = list(order)
+    running = {}
+    pool = None
+    if args.jobs > 1 and not args.dry_run:
+        pool = ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker)
+
+    def finish(name, ok):
+        done.add(name)
+        if not ok:
+            failed.add(name)
+            return
+        rebuilt.add(name)
+        state[name] = input_hashes(name)
+        save_state(state)
+
+    try:
+        while pending or running:
+            # Start every stage whose dependencies have all finished
+            for name in list(pending):
+                needed = deps[name] & set(order)
+                if not needed <= done:
+                    continue
+                pending.remove(name)
+                if needed & failed:
+                    print(f"[{name}] skipped: upstream failed")
+                    done.add(name)
+                    failed.add(name)
+                    continue
+                reason = staleness(name, args.hash, state, rebuilt, args.force)
+                if reason is None:
+                    instrument.info(f"[{name}] up to date")
+                    done.add(name)
+                    continue
+                instrument.info(f"[{name}] rebuilding: {reason}")
+                if args.dry_run:
+                    done.add(name)
+                    rebuilt.add(name)
+                elif pool is None:
+                    ok, _ = run_stage(name, args.no_cache, profile=args.profile)
+                    finish(name, ok)
+                else:
+                    running[pool.submit(run_stage, name, args.no_cache, True, args.profile)] = name
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                ok, output = fut.result()
+                print(output, end="", flush=True)
+                finish(name, ok)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if failed:
+        raise SystemExit(f"Failed: {', '.join(sorted(failed))}")
+    if not rebuilt:
+        instrument.info("Nothing to do.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", help="stage names or output paths (default: all)")
+    parser.add_argument("--hash", action="store_true",
+                        help="decide staleness by content hash instead of mtime")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would run")
+    parser.add_argument("--list", action="store_true", help="list stages and exit")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="pass --no-cache to the Eurostat readers")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="run up to N independent stages at once in a process pool")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="print the scripts' debug previews and per-step timings")
+    parser.add_argument("-q", "--quiet", action="count", default=0,
+                        help="only print warnings and failures")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"run each stage under cProfile, stats in {PROFILE_DIR.relative_to(ROOT)}/")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help='step metrics file (default .cache/metrics.jsonl, "-" = stderr)')
+    args = parser.parse_args()
+    # Before the pool starts, so workers inherit the settings
+    instrument.configure(verbosity=max(0, instrument.VERBOSITY + args.verbose - args.quiet),
+                         metrics=(args.metrics if args.metrics is not None
+                                  else os.environ.get("BB_METRICS", str(instrument.DEFAULT_METRICS))),
+                         run_id=time.strftime("%Y%m%d-%H%M%S-") + instrument.RUN_ID[:6])
+
+    deps = dependencies()
+    if args.list:
+        for name in topo_order(list(STAGES), deps):
+            stage = STAGES[name]
+            print(f"{name}  (after: {', '.join(sorted(deps[name])) or '-'})")
+            print("  scripts:", ", ".join(stage["scripts"]))
+            print("  inputs: ", ", ".join(stage["inputs"]))
+            print("  outputs:", ", ".join(stage["outputs"]))
+        return
+
+    order = topo_order(resolve_targets(args.targets), deps)
+    run_all(order, deps, args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Build data/country_anchors.csv: where to place each country's label and arrow.
+
+For every country in the basemap (the full-detail level written by
+build_geometry.py) this computes
+
+  label_lat / label_lon        pole of inaccessibility of the largest
+                               polygon: the interior point farthest from
+                               any border, so labels, arrow heads and minis
+                               sit well inside the outline
+  centroid_lat / centroid_lon  area-weighted centroid over all polygons
+                               (holes subtracted)
+
+Distances and areas use a local equirectangular frame (longitude scaled by
+the cosine of the country's mid latitude).  The flows, permit and country
+facts builds read their positions from this table, so the browser never
+derives them from polygon bounds.
+"""
+import argparse
+import heapq
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import instrument
+import topo
+
+BASE = Path(__file__).resolve().parents[1]
+geom_path = BASE / "data" / "europe.lod2.topo.json"
+out_path = BASE / "data" / "country_anchors.csv"
+
+PRECISION = 0.01    # degrees of latitude (~1 km)
+DECIMALS = 4
+
+
+def signed_area(ring):
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x1, y1 = ring[1:, 0], ring[1:, 1]
+    return (x * y1 - x1 * y).sum() / 2
+
+
+def ring_centroid(ring):
+    """Signed area and centroid of one closed ring (shoelace)."""
+    x, y = ring[:-1, 0], ring[:-1, 1]
+    x1, y1 = ring[1:, 0], ring[1:, 1]
+    cross = x * y1 - x1 * y
+    a = cross.sum() / 2
+    if a == 0:
+        return 0.0, ring[:-1].mean(axis=0)
+    return a, np.array([((x + x1) * cross).sum(), ((y + y1) * cross).sum()]) / (6 * a)
+
+
+class Polygon:
+    """Rings of one polygon as segment arrays, for signed point distances."""
+
+    def __init__(self, rings):
+        self.a = np.concatenate([r[:-1] for r in rings])
+        self.b = np.concatenate([r[1:] for r in rings])
+
+    def distance(self, p):
+        """Distance from p to the outline; negative outside (even-odd)."""
+        ab = self.b - self.a
+        ap = p - self.a
+        len2 = (ab ** 2).sum(axis=1)
+        t = np.clip(np.divide((ap * ab).sum(axis=1), len2,
+                              out=np.zeros_like(len2), where=len2 > 0), 0, 1)
+        d = np.sqrt(((ap - t[:, None] * ab) ** 2).sum(axis=1)).min()
+        ya, yb = self.a[:, 1], self.b[:, 1]
+        crosses = (ya > p[1]) != (yb > p[1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_at = self.a[:, 0] + (p[1] - ya) * ab[:, 0] / ab[:, 1]
+        inside = np.count_nonzero(crosses & (p[0] < x_at)) % 2 == 1
+        return d if inside else -d
+
+
+def pole_of_inaccessibility(rings, precision):
+    """Grid search refined in quadtree cells (the "polylabel" method)."""
+    poly = Polygon(rings)
+    lo, hi = rings[0].min(axis=0), rings[0].max(axis=0)
+    size = float((hi - lo).min())
+    if size <= 0:
+        return lo
+    h = size / 2
+    queue = []
+
+    def push(c, h):
+        d = poly.distance(c)
+        heapq.heappush(queue, (-(d + h * np.sqrt(2)), h, d, tuple(c)))
+        return d
+
+    for x in np.arange(lo[0], hi[0], size):
+        for y in np.arange(lo[1], hi[1], size):
+            push(np.array([x + h, y + h]), h)
+
+    best = ring_centroid(rings[0])[1]
+    best_d = poly.distance(best)
+    center = (lo + hi) / 2
+    if poly.distance(center) > best_d:
+        best, best_d = center, poly.distance(center)
+
+    while queue:
+        neg_max, h, d, c = heapq.heappop(queue)
+        c = np.array(c)
+        if d > best_d:
+            best, best_d = c, d
+        if -neg_max - best_d <= precision:
+            continue
+        h /= 2
+        for dx in (-h, h):
+            for dy in (-h, h):
+                push(c + [dx, dy], h)
+    return best
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+instrument.info("Reading", geom_path)
+countries = topo.read(geom_path)
+instrument.step("read", rows=len(countries))
+
+rows = []
+for c in countries:
+    shells = np.concatenate([p[0] for p in c.polygons])
+    lat0 = np.radians((shells[:, 1].min() + shells[:, 1].max()) / 2)
+    k = np.array([np.cos(lat0), 1.0])   # lon/lat -> local planar frame
+    polys = [[r * k for r in p] for p in c.polygons]
+
+    total, moment = 0.0, np.zeros(2)
+    for rings in polys:
+        for i, ring in enumerate(rings):
+            a, ctr = ring_centroid(ring)
+            # shells count positive and holes negative, whatever their winding
+            a = abs(a) if i == 0 else -abs(a)
+            total += a
+            moment += a * ctr
+    centroid = moment / total if total else shells.mean(axis=0) * k
+
+    largest = max(polys, key=lambda rings: abs(signed_area(rings[0])))
+    label = pole_of_inaccessibility(largest, PRECISION)
+
+    rows.append({
+        "dest_iso3": c.id,
+        "name": c.name,
+        "label_lat": label[1],
+        "label_lon": label[0] / k[0],
+        "centroid_lat": centroid[1],
+        "centroid_lon": centroid[0] / k[0],
+    })
+
+anchors = pd.DataFrame(rows).sort_values("dest_iso3").round(DECIMALS)
+instrument.step("anchors", rows=len(anchors))
+instrument.debug(anchors.head)
+instrument.info("Rows:", len(anchors))
+instrument.info("Writing", out_path)
+anchors.to_csv(out_path, index=False)
+instrument.step("write", rows=len(anchors))
@@ -0,0 +1,83 @@
+"""Pack everything the map loads at boot into one binary file, data/bundle.bin.
+
+The front-end used to fetch flows_ua_agg.json plus three CSVs and parse each
+row into an object.  The bundle holds country_facts.csv (already joined by
+build_country_facts.py) and the arrows' particle schedule, flow_paths.csv,
+column by column in the framing of binfile.py (uint32 header length, JSON
+header, 8-byte aligned column blocks).
+
+The header lists the shared ISO3 index and, per table, its row count and
+for each column the dtype, byte offset and length.  Every table has an
+"iso" uint16 column pointing into the ISO3 index; metric columns are
+little-endian float32 (rounded to 6 decimals first, missing -> NaN), so the
+browser wraps them as Float32Arrays straight off the fetched buffer.  Text
+columns are uint8 codes into the column's "labels" list.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import binfile
+import instrument
+
+BASE = Path(__file__).resolve().parents[1]
+facts_path = BASE / "data" / "country_facts.csv"
+paths_path = BASE / "data" / "flow_paths.csv"
+out = BASE / "data" / "bundle.bin"
+
+BUNDLE_VERSION = 3
+DECIMALS = 6
+
+# table -> (frame, metric columns); frames are keyed by dest_iso3
+TABLES = {}
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+instrument.info("Reading", facts_path)
+facts = pd.read_csv(facts_path)
+TABLES["countries"] = (facts, [c for c in facts.columns if c != "dest_iso3"])
+
+instrument.info("Reading", paths_path)
+paths = pd.read_csv(paths_path)
+TABLES["flow_paths"] = (paths, [c for c in paths.columns if c != "dest_iso3"])
+instrument.step("read", rows=len(facts) + len(paths))
+
+iso3 = sorted(set().union(*(t["dest_iso3"].dropna().astype(str).str.upper()
+                            for t, _ in TABLES.values())))
+iso_pos = {code: i for i, code in enumerate(iso3)}
+instrument.info("ISO3 index:", len(iso3), "codes")
+
+
+def column(frame, name):
+    """(array, labels): float32 values, or uint8 codes for a text column."""
+    if not pd.api.types.is_numeric_dtype(frame[name]):
+        labels = sorted(frame[name].dropna().unique())
+        codes = frame[name].map({v: i for i, v in enumerate(labels)})
+        return codes.to_numpy().astype("u1"), labels
+    vals = pd.to_numeric(frame[name], errors="coerce").to_numpy(dtype="float64")
+    return np.round(vals, DECIMALS).astype("<f4"), None
+
+
+blocks = []
+header = {"version": BUNDLE_VERSION, "iso3": iso3, "tables": {}}
+for name, (frame, metrics) in TABLES.items():
+    frame = frame[frame["dest_iso3"].notna()]
+    cols = {"iso": (frame["dest_iso3"].astype(str).str.upper().map(iso_pos).to_numpy().astype("<u2"), None)}
+    for m in metrics:
+        cols[m] = column(frame, m)
+    header["tables"][name] = {"rows": len(frame), "columns": {}}
+    for col, (arr, labels) in cols.items():
+        entry = {"dtype": arr.dtype.name, "length": len(arr)}
+        if labels is not None:
+            entry["labels"] = labels
+        header["tables"][name]["columns"][col] = entry
+        blocks.append((entry, arr))
+    instrument.info(f" {name:12s}: {len(frame)} rows, {len(metrics)} metrics")
+
+instrument.step("pack", rows=sum(t["rows"] for t in header["tables"].values()))
+
+instrument.info("Writing", out)
+size = binfile.write(out, header, blocks)
+instrument.info("Bytes:", size)
+instrument.step("write", bytes=size)
@@ -0,0 +1,103 @@
+"""Build data/country_facts.csv: one row per country, every metric the map reads.
+
+Joins the label anchors (lat/lon, where a country's label, minis and arrow
+sit), the flows snapshot (refugee totals and demographic shares), GDP per
+capita, unemployment, Kiel aid allocations and the permit metrics on ISO3,
+so the browser gets a single pre-joined table.  Rows are the flow
+destinations plus the EU27.  Shares and rates are fractions
+(percent inputs are divided by 100 here); counts and euros stay absolute.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import instrument
+
+BASE = Path(__file__).resolve().parents[1]
+anchors_path = BASE / "data" / "country_anchors.csv"
+flows_path   = BASE / "data" / "flows_ua_agg.json"
+gdp_path     = BASE / "data" / "gdp_pc_clean.csv"
+unemp_path   = BASE / "data" / "unemployment_clean.csv"
+summary_path = BASE / "data" / "country_summary_clean.csv"
+permits_path = BASE / "data" / "respermits_ua_metrics.csv"
+out_path     = BASE / "data" / "country_facts.csv"
+
+# Kiel tracker rows are keyed by country name; the map's EU27
+NAME_TO_ISO3 = {
+    "austria": "AUT", "belgium": "BEL", "bulgaria": "BGR", "croatia": "HRV", "cyprus": "CYP",
+    "czechia": "CZE", "denmark": "DNK", "estonia": "EST", "finland": "FIN", "france": "FRA",
+    "germany": "DEU", "greece": "GRC", "hungary": "HUN", "ireland": "IRL", "italy": "ITA",
+    "latvia": "LVA", "lithuania": "LTU", "luxembourg": "LUX", "malta": "MLT",
+    "netherlands": "NLD", "poland": "POL", "portugal": "PRT", "romania": "ROU",
+    "slovakia": "SVK", "slovenia": "SVN", "spain": "ESP", "sweden": "SWE",
+}
+EU27 = sorted(NAME_TO_ISO3.values())
+
+FLOW_COLUMNS = ["total_refugees", "pct_children", "pct_elderly",
+                "pct_women_adult", "pct_men_adult", "pct_unknown_age"]
+PERMIT_COLUMNS = ["ua_perm_delta", "ua_perm_per_refugee"]
+
+
+def as_fraction(s):
+    """Values above 1 are read as percentages."""
+    s = pd.to_numeric(s, errors="coerce")
+    return s.where(~(s > 1), s / 100)
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+instrument.info("Reading", flows_path)
+flows = pd.read_json(flows_path)
+flows = flows[["dest_iso3"] + FLOW_COLUMNS].drop_duplicates("dest_iso3")
+for col in FLOW_COLUMNS:
+    if col.startswith("pct_"):
+        flows[col] = as_fraction(flows[col])
+
+ids = list(dict.fromkeys(flows["dest_iso3"].tolist() + EU27))
+instrument.info("Reading", anchors_path)
+anchors = pd.read_csv(anchors_path)[["dest_iso3", "label_lat", "label_lon"]]
+anchors = anchors.rename(columns={"label_lat": "lat", "label_lon": "lon"})
+facts = (pd.DataFrame({"dest_iso3": ids})
+         .merge(anchors, on="dest_iso3", how="left")
+         .merge(flows, on="dest_iso3", how="left"))
+instrument.step("read", rows=len(facts))
+
+instrument.info("Reading", gdp_path)
+gdp = pd.read_csv(gdp_path)[["dest_iso3", "gdp_pc"]]
+facts = facts.merge(gdp.drop_duplicates("dest_iso3"), on="dest_iso3", how="left")
+
+instrument.info("Reading", unemp_path)
+unemp = pd.read_csv(unemp_path)[["dest_iso3", "unemployment"]]
+unemp["unemployment"] = as_fraction(unemp["unemployment"])
+facts = facts.merge(unemp.drop_duplicates("dest_iso3"), on="dest_iso3", how="left")
+
+instrument.info("Reading", summary_path)
+summary = pd.read_csv(summary_path)
+summary["dest_iso3"] = summary["Country"].astype(str).str.strip().str.lower().map(NAME_TO_ISO3)
+# Always a percentage in the Kiel export, even below 1%
+summary["alloc_pct_gdp"] = pd.to_numeric(summary["Allocations % GDP 2021"], errors="coerce") / 100
+summary = summary.loc[summary["dest_iso3"].notna(), ["dest_iso3", "alloc_pct_gdp"]]
+facts = facts.merge(summary.drop_duplicates("dest_iso3"), on="dest_iso3", how="left")
+
+if permits_path.exists():
+    instrument.info("Reading", permits_path)
+    permits = pd.read_csv(permits_path)[["dest_iso3"] + PERMIT_COLUMNS]
+    facts = facts.merge(permits.drop_duplicates("dest_iso3"), on="dest_iso3", how="left")
+else:
+    instrument.warn("WARNING: no", permits_path.name, "- permit metrics left empty")
+    for col in PERMIT_COLUMNS:
+        facts[col] = np.nan
+
+missing = [c for c in ["gdp_pc", "unemployment", "alloc_pct_gdp"]
+           if facts.loc[facts["dest_iso3"].isin(EU27), c].isna().any()]
+if missing:
+    instrument.warn("EU27 rows with gaps in:", missing)
+instrument.step("merge", rows=len(facts))
+
+instrument.debug("\nPreview of country_facts:")
+instrument.debug(facts.head)
+instrument.info("Rows:", len(facts))
+instrument.info("Writing", out_path)
+facts.to_csv(out_path, index=False)
+instrument.step("write", rows=len(facts))
@@ -1,6 +1,10 @@
+import argparse
+
 import pandas as pd
 from pathlib import Path
 
+import instrument
+
 
 BASE = Path(__file__).resolve().parents[1]
 SRC = BASE / "data" / "9a488f59-b74d-4043-bef1-23ed4f2b6293-Ukraine-Support-Tracker-Release-25 (1).xlsx"
@@ -27,17 +31,22 @@ KEEP = [
 
 
 def main():
-    print("Reading", SRC)
+    instrument.parse_args(argparse.ArgumentParser())
+    instrument.info("Reading", SRC)
     df = pd.read_excel(SRC, sheet_name="Country Summary (€)", header=HEADER_ROW)
+    instrument.step("read", rows=len(df))
 
     # Drop empty rows, keep desired columns, rename GDP share for clarity
     df = df[df["Country"].notna()].copy()
     df = df[KEEP]
     df = df.rename(columns={"Total bilateral and EU allocations.1": "Allocations % GDP 2021"})
 
-    print("Rows:", len(df))
-    print("Writing", OUT)
+    instrument.step("filter", rows=len(df))
+
+    instrument.info("Rows:", len(df))
+    instrument.info("Writing", OUT)
     df.to_csv(OUT, index=False)
+    instrument.step("write", rows=len(df))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+"""Build data/flow_paths.csv: the particle schedule behind the map's arrows.
+
+One row per destination and demographic category with a non-zero share:
+
+    dest_iso3, category          destination and its minis bar
+    origin_lat/lon, dest_lat/lon straight path from Ukraine to the label anchor
+    bar_dx                       screen-pixel offset of the category's bar
+                                 from the anchor (the path ends on the bar)
+    duration                     seconds a particle takes along the path
+    spawn_rate                   particles per second for this category
+    share                        the category's normalised share
+
+The values follow the map's drawing rules (PEOPLE_PER_PARTICLE people per
+dot, 350 km per second of travel clamped to 5-12 s, 2-40 dots per second
+per destination), so the browser's particle engine only interpolates.
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+import instrument
+
+BASE = Path(__file__).resolve().parents[1]
+facts_path = BASE / "data" / "country_facts.csv"
+out_path = BASE / "data" / "flow_paths.csv"
+
+ARROW_ORIGIN = (49.0, 32.0)     # lat, lon in Ukraine where every arrow starts
+PEOPLE_PER_PARTICLE = 10_000
+EARTH_RADIUS_KM = 6371          # as Leaflet's distanceTo
+KM_PER_SECOND = 350
+DURATION_RANGE = (5, 12)        # seconds
+SPAWN_RANGE = (2, 40)           # dots per second per destination
+
+# Minis bars left to right (main.js VARS), and each category's share column
+BARS = ["women", "children", "men", "elderly"]
+BAR_W, BAR_GAP = 10, 6
+SHARE_COLUMNS = {
+    "men":      "pct_men_adult",
+    "women":    "pct_women_adult",
+    "children": "pct_children",
+    "elderly":  "pct_elderly",
+}
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Haversine distance."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp, dl = p2 - p1, np.radians(lon2 - lon1)
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def bar_offset(category):
+    total_w = len(BARS) * BAR_W + (len(BARS) - 1) * BAR_GAP
+    return -total_w / 2 + BARS.index(category) * (BAR_W + BAR_GAP) + BAR_W / 2
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+instrument.info("Reading", facts_path)
+facts = pd.read_csv(facts_path)
+instrument.step("read", rows=len(facts))
+dests = facts[facts["total_refugees"].notna() & facts["lat"].notna()].copy()
+instrument.step("filter", rows=len(dests))
+
+dests["duration"] = np.clip(
+    distance_km(*ARROW_ORIGIN, dests["lat"], dests["lon"]) / KM_PER_SECOND, *DURATION_RANGE)
+dots = dests["total_refugees"].clip(lower=0) / PEOPLE_PER_PARTICLE
+dests["spawn_rate"] = np.where(dots > 0, np.clip(dots / dests["duration"], *SPAWN_RANGE), 0)
+
+shares = pd.DataFrame({cat: dests[col].fillna(0).clip(lower=0)
+                       for cat, col in SHARE_COLUMNS.items()})
+total = shares.sum(axis=1)
+# No breakdown at all: split evenly
+shares = shares.div(total, axis=0).where(total > 0, 1 / len(SHARE_COLUMNS))
+
+rows = []
+for i, d in dests.iterrows():
+    for cat in SHARE_COLUMNS:
+        share = shares.at[i, cat]
+        if share <= 0:
+            continue
+        rows.append({
+            "dest_iso3": d["dest_iso3"],
+            "category": cat,
+            "origin_lat": ARROW_ORIGIN[0],
+            "origin_lon": ARROW_ORIGIN[1],
+            "dest_lat": d["lat"],
+            "dest_lon": d["lon"],
+            "bar_dx": bar_offset(cat),
+            "duration": d["duration"],
+            "spawn_rate": d["spawn_rate"] * share,
+            "share": share,
+        })
+
+paths = pd.DataFrame(rows)
+instrument.step("bucket", rows=len(paths))
+instrument.debug(paths.head)
+instrument.info("Rows:", len(paths), " destinations:", paths["dest_iso3"].nunique() if len(paths) else 0)
+instrument.info("Writing", out_path)
+paths.to_csv(out_path, index=False)
+instrument.step("write", rows=len(paths))
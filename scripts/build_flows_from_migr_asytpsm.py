@@ -1,35 +1,58 @@
+"""Build data/flows_ua_agg.csv from the Eurostat migr_asytpsm monthly dump.
+
+With --series the full monthly history is written as well: one small JSON
+file per month under data/flows_ua_series/ plus a manifest.json listing the
+periods, which the map loads lazily as the time slider moves.
+
+--incremental updates that series in place: flows_ua_series/state.json
+records the last period seen per geo, only rows newer than that are kept
+while streaming, and only the months they touch are recomputed and merged
+into the stored files.  The dump itself is still read in full: a CSV has
+no index to seek to a month, so reading stays proportional to the file
+(cheap on a warm eurostat.py cache) and only the bucketing, the series
+writes and the snapshot scale with the new months.  Revisions Eurostat
+makes to months already processed are not picked up; rerun with --series
+for a full rebuild.
+"""
+import argparse
+import json
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+import eurostat
+import instrument
+
 BASE = Path(__file__).resolve().parents[1]
 src = BASE / "data" / "migr_asytpsm_linear_2_0.csv"
 out = BASE / "data" / "flows_ua_agg.csv"
-
-print("Reading", src)
-
-# Read everything, ignore Eurostat comment lines
-df = pd.read_csv(src, comment="#", low_memory=False)
-
-print("Original columns:")
-for i, c in enumerate(df.columns):
-    print(f"{i:2d}: {repr(c)}")
-
-cols = df.columns
-
-def pick(target):
-    tgt = target.lower()
-    for c in cols:
-        if c.strip().lower() == tgt:
-            return c
-    raise SystemExit(f"Could not find column for {target!r}")
-
-def pick_age_sum(age_map, combos):
-    for combo in combos:
-        vals = [age_map.get(code) for code in combo]
-        vals = [v for v in vals if pd.notna(v)]
-        if vals:
-            return sum(vals)
-    return 0.0
+series_dir = BASE / "data" / "flows_ua_series"
+state_path = series_dir / "state.json"
+
+# Rows per chunk when streaming the monthly dump; the unfiltered file covers
+# every citizenship/sex/age/geo, so it is never loaded in one go.
+CHUNK_ROWS = 500_000
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS,
+                    help=f"rows per streamed chunk (default {CHUNK_ROWS})")
+parser.add_argument("--series", action="store_true",
+                    help=f"also write every month x destination to {series_dir.name}/")
+parser.add_argument("--incremental", action="store_true",
+                    help="only process months newer than the series state (implies --series)")
+eurostat.add_cache_argument(parser)
+args = instrument.parse_args(parser)
+args.series = args.series or args.incremental
+
+state = None
+if args.incremental:
+    try:
+        state = json.loads(state_path.read_text())
+    except (OSError, ValueError):
+        instrument.warn(f"No usable {state_path}; building the full series")
+incremental = state is not None
+
+instrument.info("Reading", src)
 
 CHILD_COMBOS = [
     ["Y_LT18"],
@@ -44,152 +67,66 @@ ELDER_COMBOS = [
     ["Y65-79", "Y80-84", "Y85-89", "Y_GE90"],
 ]
 
-cit_col   = pick("citizen")
-sex_col   = pick("sex")
-age_col   = pick("age")
-geo_col   = pick("geo")
-time_col  = pick("time_period")
-value_col = pick("obs_value")
-unit_col  = pick("unit")
-
-print("\nUsing columns:")
-print(" citizen :", cit_col)
-print(" sex     :", sex_col)
-print(" age     :", age_col)
-print(" geo     :", geo_col)
-print(" time    :", time_col)
-print(" value   :", value_col)
-print(" unit    :", unit_col)
-
-# Keep only what we need, rename to clean names
-df = df[[cit_col, sex_col, age_col, geo_col, time_col, value_col, unit_col]].copy()
-df.columns = ["citizen", "sex", "age", "geo", "time_period", "obs_value", "unit"]
-
-# Coerce key dimensions to string
-for col in ["citizen", "sex", "age", "geo", "time_period", "unit"]:
-    df[col] = df[col].astype(str)
-
-print("\nSample citizen codes:", df["citizen"].dropna().unique().tolist()[:20])
-
-# ---- Filter to Ukrainians, unit = NR (number of persons) ----
-df = df[df["citizen"] == "UA"]
-if df.empty:
-    raise SystemExit("No rows with citizen == 'UA' – check citizen codes above.")
+# Output column -> (sex code, age combos); None means the age=TOTAL cell
+BUCKETS = {
+    "children":    ("T", CHILD_COMBOS),
+    "elderly":     ("T", ELDER_COMBOS),
+    "women_total": ("F", None),
+    "men_total":   ("M", None),
+    "women_child": ("F", CHILD_COMBOS),
+    "men_child":   ("M", CHILD_COMBOS),
+    "women_elder": ("F", ELDER_COMBOS),
+    "men_elder":   ("M", ELDER_COMBOS),
+}
 
-if "NR" in df["unit"].unique():
-    df = df[df["unit"] == "NR"]
-
-# Keep numeric values only
-df = df[pd.to_numeric(df["obs_value"], errors="coerce").notna()]
-df["obs_value"] = df["obs_value"].astype(float)
-
-# ---- Latest time period ----
-# ---- Use latest per-geo within last 6 months ----
-print("Sample time_period values:", df["time_period"].dropna().unique().tolist()[-10:])
-
-# Convert to datetime (monthly)
-df["date"] = pd.to_datetime(df["time_period"], format="%Y-%m", errors="coerce")
-df = df[df["date"].notna()]
-
-max_date = df["date"].max()
-cutoff = max_date - pd.DateOffset(months=5)  # last 6 months inclusive
-
-print("Global latest date:", max_date)
-print("Cutoff date (6-month window):", cutoff)
-
-# Keep only rows within the 6-month window
-df = df[(df["date"] >= cutoff) & (df["date"] <= max_date)]
-
-# For each geo, keep its latest available month in that window
-latest_by_geo = df.groupby("geo")["date"].transform("max")
-df = df[df["date"] == latest_by_geo]
-
-geos = sorted(df["geo"].dropna().unique().tolist())
-print("Number of host geos (UA, last 6 months):", len(geos))
-print("Host geos (UA, last 6 months):", geos)
-print("Unique sex codes (UA, window):", df["sex"].dropna().unique().tolist())
-print("Unique age codes (UA, window):", df["age"].dropna().unique().tolist()[:50])
-
-
-print("Unique sex codes (UA, latest):", df["sex"].dropna().unique().tolist())
-print("Unique age codes (UA, latest):", df["age"].dropna().unique().tolist()[:50])
-
-# ---- Age groups (tweak if codes differ) ----
-CHILD_AGES = {"Y_LT18", "Y0-14", "Y15-17", "Y14-17", "Y_LT14"}
-ELDER_AGES = {"Y_GE65", "Y65-79", "Y_GE80", "Y80-84", "Y85-89", "Y_GE90"}
-
-# --- Disjoint bins ---
-core = df[df["age"] != "UNK"]
-
-# Total refugees per host = sex T, age TOTAL (official headline)
-total = (
-    df[(df["sex"] == "T") & (df["age"] == "TOTAL")]
-    [["geo", "obs_value"]]
-    .rename(columns={"obs_value": "total_refugees"})
-)
-
-# Children (all sexes, <18)
-def calc_bucket(df_in, sex_code, combos, label):
-    records = []
-    for geo, sub in df_in[df_in["sex"] == sex_code].groupby("geo"):
-        age_map = dict(zip(sub["age"], sub["obs_value"]))
-        val = pick_age_sum(age_map, combos)
-        records.append({"geo": geo, label: val})
-    return pd.DataFrame(records)
-
-children    = calc_bucket(core, "T", CHILD_COMBOS, "children")
-elderly     = calc_bucket(core, "T", ELDER_COMBOS, "elderly")
-tot_f       = df[(df["sex"] == "F") & (df["age"] == "TOTAL")][["geo", "obs_value"]].rename(columns={"obs_value": "women_total"})
-tot_m       = df[(df["sex"] == "M") & (df["age"] == "TOTAL")][["geo", "obs_value"]].rename(columns={"obs_value": "men_total"})
-child_f     = calc_bucket(core, "F", CHILD_COMBOS, "women_child")
-child_m     = calc_bucket(core, "M", CHILD_COMBOS, "men_child")
-elder_f     = calc_bucket(core, "F", ELDER_COMBOS, "women_elder")
-elder_m     = calc_bucket(core, "M", ELDER_COMBOS, "men_elder")
-
-# Unknown ages (sex=T, age=UNK) — tracked separately
-unknown_age = (
-    df[(df["sex"] == "T") & (df["age"] == "UNK")]
-    .groupby("geo", as_index=False)["obs_value"]
-    .sum()
-    .rename(columns={"obs_value": "unknown_age"})
-)
-
-# Merge
-flow = (
-    total.merge(children, on="geo", how="left")
-         .merge(elderly, on="geo", how="left")
-         .merge(unknown_age, on="geo", how="left")
-         .merge(tot_f, on="geo", how="left")
-         .merge(tot_m, on="geo", how="left")
-         .merge(child_f, on="geo", how="left")
-         .merge(child_m, on="geo", how="left")
-         .merge(elder_f, on="geo", how="left")
-         .merge(elder_m, on="geo", how="left")
-)
-
-for col in ["children", "elderly", "unknown_age",
-            "women_total","men_total","women_child","men_child","women_elder","men_elder"]:
-    if col in flow.columns:
-        flow[col] = flow[col].fillna(0.0)
-
-# Derive adult women/men = total by sex minus child/elder for that sex
-flow["women_adult_raw"] = (flow["women_total"] - flow["women_child"] - flow["women_elder"]).clip(lower=0)
-flow["men_adult_raw"]   = (flow["men_total"]   - flow["men_child"]   - flow["men_elder"]).clip(lower=0)
-
-# Scale adult men/women so children+elderly+adults ~= total_refugees
-flow["adult_total_target"] = (flow["total_refugees"] - flow["children"] - flow["elderly"]).clip(lower=0)
-flow["adult_raw_sum"] = flow["women_adult_raw"] + flow["men_adult_raw"]
-scale = flow["adult_total_target"] / flow["adult_raw_sum"].replace({0: pd.NA})
-flow["women_adult"] = (flow["women_adult_raw"] * scale).fillna(0)
-flow["men_adult"]   = (flow["men_adult_raw"]   * scale).fillna(0)
-
-# Percentages (disjoint bins using official total_refugees)
-flow.loc[flow["total_refugees"] <= 0, "total_refugees"] = float("nan")
-flow["pct_children"]    = flow["children"]    / flow["total_refugees"]
-flow["pct_elderly"]     = flow["elderly"]     / flow["total_refugees"]
-flow["pct_women_adult"] = flow["women_adult"] / flow["total_refugees"]
-flow["pct_men_adult"]   = flow["men_adult"]   / flow["total_refugees"]
-flow["pct_unknown_age"] = flow["unknown_age"] / flow["total_refugees"]
+def resolve_combos(wide, combos):
+    """Per row, the sum over the first combo with any reported age code.
+
+    Codes missing from a row are skipped; rows matching no combo get 0.
+    Sums are accumulated left to right, as Python's sum() would.
+    """
+    out = np.zeros(len(wide))
+    done = np.zeros(len(wide), dtype=bool)
+    for combo in combos:
+        codes = [c for c in combo if c in wide.columns]
+        if not codes:
+            continue
+        vals = wide[codes].to_numpy(dtype=float)
+        has = ~np.isnan(vals)
+        acc = np.zeros(len(wide))
+        for j in range(len(codes)):
+            acc = acc + np.where(has[:, j], vals[:, j], 0.0)
+        hit = has.any(axis=1) & ~done
+        out[hit] = acc[hit]
+        done |= hit
+    return out
+
+def age_buckets(df, keys):
+    """Vectorised age buckets for every group of `keys` at once.
+
+    One pivot of (keys, sex) x age codes, then combo resolution as array
+    operations. `keys` can be ["geo"] for a snapshot or e.g.
+    ["citizen", "time_period", "geo"] for whole series; returns one row per
+    key tuple with the BUCKETS columns plus unknown_age (missing -> 0).
+    """
+    core = df[df["age"] != "UNK"]
+    # dict(zip(age, value)) semantics: the last row wins on duplicates
+    wide = core.groupby(keys + ["sex", "age"], sort=False)["obs_value"].last().unstack("age")
+
+    sexes = wide.index.get_level_values("sex")
+    out = pd.DataFrame(index=wide.index.droplevel("sex").unique())
+    for label, (sex, combos) in BUCKETS.items():
+        part = wide[sexes == sex].droplevel("sex")
+        if combos is None:
+            vals = part["TOTAL"] if "TOTAL" in part.columns else pd.Series(dtype=float)
+        else:
+            vals = pd.Series(resolve_combos(part, combos), index=part.index)
+        out[label] = vals.reindex(out.index)
+
+    # Unknown ages (sex=T, age=UNK) — tracked separately
+    unknown = df[(df["sex"] == "T") & (df["age"] == "UNK")].groupby(keys)["obs_value"].sum()
+    out["unknown_age"] = unknown.reindex(out.index)
+    return out.fillna(0.0)
 
 # Map Eurostat GEO (ISO2-ish) to ISO3
 iso2_to_iso3 = {
@@ -204,22 +141,279 @@ iso2_to_iso3 = {
     "MD": "MDA", "UA": "UKR"
 }
 
-flow["dest_iso3"] = flow["geo"].map(iso2_to_iso3)
-flow = flow[flow["dest_iso3"].notna()].copy()
-
-flow = flow[[
+def derive_shares(flow):
+    """Demographic shares of total_refugees from the age_buckets() columns."""
+    for col in ["children", "elderly", "unknown_age",
+                "women_total","men_total","women_child","men_child","women_elder","men_elder"]:
+        if col in flow.columns:
+            flow[col] = flow[col].fillna(0.0)
+
+    # Derive adult women/men = total by sex minus child/elder for that sex
+    flow["women_adult_raw"] = (flow["women_total"] - flow["women_child"] - flow["women_elder"]).clip(lower=0)
+    flow["men_adult_raw"]   = (flow["men_total"]   - flow["men_child"]   - flow["men_elder"]).clip(lower=0)
+
+    # Scale adult men/women so children+elderly+adults ~= total_refugees
+    flow["adult_total_target"] = (flow["total_refugees"] - flow["children"] - flow["elderly"]).clip(lower=0)
+    flow["adult_raw_sum"] = flow["women_adult_raw"] + flow["men_adult_raw"]
+    scale = flow["adult_total_target"] / flow["adult_raw_sum"].replace({0: pd.NA})
+    flow["women_adult"] = (flow["women_adult_raw"] * scale).fillna(0)
+    flow["men_adult"]   = (flow["men_adult_raw"]   * scale).fillna(0)
+
+    # Percentages (disjoint bins using official total_refugees)
+    flow.loc[flow["total_refugees"] <= 0, "total_refugees"] = float("nan")
+    flow["pct_children"]    = flow["children"]    / flow["total_refugees"]
+    flow["pct_elderly"]     = flow["elderly"]     / flow["total_refugees"]
+    flow["pct_women_adult"] = flow["women_adult"] / flow["total_refugees"]
+    flow["pct_men_adult"]   = flow["men_adult"]   / flow["total_refugees"]
+    flow["pct_unknown_age"] = flow["unknown_age"] / flow["total_refugees"]
+    return flow
+
+SERIES_COLUMNS = [
     "dest_iso3",
     "total_refugees",
     "pct_children",
     "pct_elderly",
     "pct_women_adult",
     "pct_men_adult",
-    "pct_unknown_age"
-]]
+    "pct_unknown_age",
+]
 
-print("\nPreview:")
-print(flow.head())
-print("Rows:", len(flow))
+def write_series(series, out_dir, merge=False):
+    """One columnar JSON file per month plus manifest.json.
+
+    Each month file holds parallel arrays (dest_iso3, total_refugees and the
+    pct_* shares rounded to 6 decimals, missing -> null), so the browser only
+    fetches the months the user actually looks at.  With `merge`, `series`
+    only holds new rows: they replace the same destinations in the stored
+    month files and every other month is left untouched.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    periods = set(series["time_period"].unique().tolist())
+    dests = set(series["dest_iso3"].unique().tolist())
+    if merge:
+        old = json.loads((out_dir / "manifest.json").read_text())
+        periods |= set(old["periods"])
+        dests |= set(old["dest_iso3"])
+
+    for period, month in series.groupby("time_period", sort=True):
+        path = out_dir / f"{period}.json"
+        month = month[SERIES_COLUMNS]
+        if merge and path.exists():
+            stored = json.loads(path.read_text())
+            stored = pd.DataFrame({c: stored[c] for c in SERIES_COLUMNS}, dtype=object)
+            stored = stored[~stored["dest_iso3"].isin(month["dest_iso3"])]
+            month = pd.concat([stored.astype({c: float for c in SERIES_COLUMNS[1:]}), month])
+        month = month.sort_values("dest_iso3")
+        doc = {"period": period, "dest_iso3": month["dest_iso3"].tolist()}
+        for col in SERIES_COLUMNS[1:]:
+            vals = month[col].round(0 if col == "total_refugees" else 6)
+            doc[col] = [None if pd.isna(v) else (int(v) if col == "total_refugees" else float(v))
+                        for v in vals]
+        path.write_text(json.dumps(doc, separators=(",", ":")))
+
+    periods = sorted(periods)
+    if not merge:
+        # Months no longer in the dump (e.g. a shorter extract) must not linger
+        for f in out_dir.glob("????-??.json"):
+            if f.stem not in periods:
+                f.unlink()
+
+    manifest = {
+        "periods": periods,
+        "file": "{period}.json",
+        "columns": SERIES_COLUMNS,
+        "dest_iso3": sorted(dests),
+    }
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=1))
+    instrument.info(f"Writing {out_dir} ({len(periods)} months, {periods[0]}..{periods[-1]})")
+
+def window_snapshot(df, max_date, cutoff):
+    """Each geo's latest month within the 6-month window, from raw rows."""
+    # ---- Use latest per-geo within last 6 months ----
+    instrument.debug("Sample time_period values:",
+                     lambda: df["time_period"].dropna().unique().tolist()[-10:])
+
+    instrument.info("Global latest date:", max_date)
+    instrument.info("Cutoff date (6-month window):", cutoff)
+
+    # For each geo, keep its latest available month in that window
+    latest_by_geo = df.groupby("geo")["date"].transform("max")
+    df = df[df["date"] == latest_by_geo]
+
+    geos = sorted(df["geo"].dropna().unique().tolist())
+    instrument.info("Number of host geos (UA, last 6 months):", len(geos))
+    instrument.debug("Host geos (UA, last 6 months):", geos)
+    instrument.debug("Unique sex codes (UA, latest):", lambda: df["sex"].dropna().unique().tolist())
+    instrument.debug("Unique age codes (UA, latest):", lambda: df["age"].dropna().unique().tolist()[:50])
+
+    # --- Disjoint bins ---
+    # Total refugees per host = sex T, age TOTAL (official headline)
+    total = (
+        df[(df["sex"] == "T") & (df["age"] == "TOTAL")]
+        [["geo", "obs_value"]]
+        .rename(columns={"obs_value": "total_refugees"})
+    )
+
+    buckets = age_buckets(df, ["geo"])
+    flow = total.merge(buckets, left_on="geo", right_index=True, how="left")
+
+    flow = derive_shares(flow)
+
+    flow["dest_iso3"] = flow["geo"].map(iso2_to_iso3)
+    flow = flow[flow["dest_iso3"].notna()].copy()
+
+    flow = flow[[
+        "dest_iso3",
+        "total_refugees",
+        "pct_children",
+        "pct_elderly",
+        "pct_women_adult",
+        "pct_men_adult",
+        "pct_unknown_age"
+    ]]
+    return flow
+
+def update_state(state, df, series, has_nr):
+    """Fold this run's rows into the --incremental state.
+
+    last_period is the newest month seen per geo (any row); latest keeps the
+    full-precision series row of each geo's newest month, which is all the
+    snapshot CSV needs when the history itself is not re-read.
+    """
+    state = state or {"version": 1, "last_period": {}, "latest": {}}
+    state["unit"] = "NR" if has_nr else None
+    state["last_period"].update(df.groupby("geo")["time_period"].max().to_dict())
+    newest = series.sort_values("time_period").groupby("geo").tail(1)
+    for row in newest[["geo", "time_period"] + SERIES_COLUMNS].to_dict("records"):
+        geo = row.pop("geo")
+        state["latest"][geo] = {k: None if pd.isna(v) else v for k, v in row.items()}
+    return state
+
+def snapshot_from_state(state):
+    """Latest-per-geo snapshot rows (6-month window) rebuilt from the state."""
+    last = state["last_period"]
+    newest = pd.Period(max(last.values()), freq="M")
+    cutoff = str(newest - 5)
+    instrument.info("Global latest period:", newest)
+    instrument.info("Cutoff period (6-month window):", cutoff)
+    rows = [row for geo, row in sorted(state["latest"].items())
+            if row["time_period"] == last[geo] and row["time_period"] >= cutoff]
+    # In geo order, as window_snapshot() leaves a dump sorted by geo (as
+    # Eurostat's are)
+    return pd.DataFrame(rows, columns=SERIES_COLUMNS)
+
+cols = eurostat.resolve_columns(eurostat.read_header(src), {
+    "citizen":     eurostat.CITIZEN,
+    "sex":         eurostat.SEX,
+    "age":         eurostat.AGE,
+    "geo":         eurostat.GEO,
+    "time_period": eurostat.TIME_PERIOD,
+    "obs_value":   eurostat.OBS_VALUE,
+    "unit":        eurostat.UNIT,
+})
+
+instrument.debug("\nUsing columns:")
+for k, v in cols.items():
+    instrument.debug(f" {k:11s}: {v}")
+
+# ---- Stream the dump: project columns and filter inside the read loop ----
+# Only UA rows within a 6-month window of the running latest date are kept,
+# so memory is bounded by one chunk plus that window, whatever the file size.
+# --series keeps every UA month instead (still only a sliver of the dump).
+citizen_codes = {}
+kept = []
+has_nr = bool(state and state["unit"] == "NR")
+last_period = state["last_period"] if state else {}
+max_date = None
+cutoff = None
+rows_read = 0
+
+for chunk in eurostat.iter_chunks(src, cols, chunksize=args.chunksize,
+                                  cache=not args.no_cache):
+    rows_read += len(chunk)
+    if len(citizen_codes) < 20:
+        citizen_codes.update(dict.fromkeys(chunk["citizen"].astype(str).unique().tolist()))
+
+    # ---- Filter to Ukrainians, unit = NR (number of persons) ----
+    chunk = chunk[chunk["citizen"] == "UA"]
+    if chunk.empty:
+        continue
+
+    # Coerce key dimensions to string
+    chunk = chunk.astype({col: str for col in ["citizen", "sex", "age", "geo", "time_period", "unit"]})
+
+    if not has_nr and (chunk["unit"] == "NR").any():
+        # From now on only NR counts: nothing kept so far is NR, so restart
+        # the window from this chunk
+        has_nr = True
+        kept = []
+        max_date = None
+    if has_nr:
+        chunk = chunk[chunk["unit"] == "NR"]
+    if last_period:
+        # --incremental: drop months already in the stored series.  They
+        # were parsed all the same; only the work after this point is saved
+        chunk = chunk[chunk["time_period"] > chunk["geo"].map(last_period).fillna("")]
+
+    # Keep numeric values only
+    chunk = chunk[chunk["obs_value"].notna()].copy()
+
+    # Convert to datetime (monthly)
+    chunk["date"] = pd.to_datetime(chunk["time_period"], format="%Y-%m", errors="coerce")
+    chunk = chunk[chunk["date"].notna()]
+    if chunk.empty:
+        continue
+
+    chunk_max = chunk["date"].max()
+    if max_date is None or chunk_max > max_date:
+        max_date = chunk_max
+        cutoff = max_date - pd.DateOffset(months=5)  # last 6 months inclusive
+        if not args.series:
+            kept = [k[k["date"] >= cutoff] for k in kept]
+    kept.append(chunk if args.series else chunk[chunk["date"] >= cutoff])
+
+instrument.debug("\nSample citizen codes:", list(citizen_codes)[:20])
+
+if max_date is None:
+    if state:
+        instrument.info(f"No months newer than {state_path.name}; nothing to update.")
+        raise SystemExit(0)
+    raise SystemExit("No rows with citizen == 'UA' – check citizen codes above.")
 
-print("Writing", out)
+df = pd.concat(kept)
+# Filtering happens inside the read loop, so this is one step
+instrument.step("read", rows_in=rows_read, rows=len(df))
+
+if args.series:
+    # Every month x destination, with the same disjoint bins as the snapshot
+    series = (
+        df[(df["sex"] == "T") & (df["age"] == "TOTAL")]
+        [["time_period", "geo", "obs_value"]]
+        .rename(columns={"obs_value": "total_refugees"})
+    )
+    series = series.merge(age_buckets(df, ["time_period", "geo"]),
+                          left_on=["time_period", "geo"], right_index=True, how="left")
+    series = derive_shares(series)
+    series["dest_iso3"] = series["geo"].map(iso2_to_iso3)
+    series = series[series["dest_iso3"].notna()]
+    instrument.step("bucket", rows=len(series), what="series")
+    write_series(series, series_dir, merge=incremental)
+    state = update_state(state, df, series, has_nr)
+    state_path.write_text(json.dumps(state, indent=1, sort_keys=True))
+    instrument.step("write", rows=len(series), what="series")
+    df = df[df["date"] >= cutoff]
+
+if incremental:
+    # The history was not re-read: take the snapshot from the state
+    flow = snapshot_from_state(state)
+else:
+    flow = window_snapshot(df, max_date, cutoff)
+instrument.step("bucket", rows_in=len(df), rows=len(flow))
+
+instrument.debug("\nPreview:")
+instrument.debug(flow.head)
+instrument.info("Rows:", len(flow))
+
+instrument.info("Writing", out)
 flow.to_csv(out, index=False)
+instrument.step("write", rows=len(flow))
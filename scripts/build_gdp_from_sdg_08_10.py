@@ -1,60 +1,50 @@
+import argparse
 import pandas as pd
 from pathlib import Path
 
+import eurostat
+import instrument
+
 BASE = Path(__file__).resolve().parents[1]
 src = BASE / "data" / "sdg_08_10_linear_2_0.csv"
 out = BASE / "data" / "gdp_pc_clean.csv"
 
-print("Reading", src)
-df = pd.read_csv(src, comment="#", low_memory=False)
-
-print("Original columns:")
-for i, c in enumerate(df.columns):
-    print(f"{i:2d}: {repr(c)}")
-
-cols = df.columns
+parser = argparse.ArgumentParser()
+eurostat.add_cache_argument(parser)
+args = instrument.parse_args(parser)
 
-def pick(target):
-    tgt = target.lower()
-    for c in cols:
-        if c.strip().lower() == tgt:
-            return c
-    raise SystemExit(f"Could not find column for {target!r}")
+instrument.info("Reading", src)
 
-geo_col   = pick("geo")
-time_col  = pick("time_period")   # should match 'TIME_PERIOD'
-value_col = pick("obs_value")     # should match 'OBS_VALUE'
-unit_col  = pick("unit")
+cols = eurostat.resolve_columns(eurostat.read_header(src), {
+    "geo":         eurostat.GEO,
+    "time_period": eurostat.TIME_PERIOD,
+    "obs_value":   eurostat.OBS_VALUE,
+    "unit":        eurostat.UNIT,
+})
 
-print("\nUsing columns:")
-print(" geo   :", geo_col)
-print(" time  :", time_col)
-print(" value :", value_col)
-print(" unit  :", unit_col)
+instrument.debug("\nUsing columns:")
+instrument.debug(" geo   :", cols["geo"])
+instrument.debug(" time  :", cols["time_period"])
+instrument.debug(" value :", cols["obs_value"])
+instrument.debug(" unit  :", cols["unit"])
 
-# Keep only what we need
-df = df[[geo_col, time_col, value_col, unit_col]].copy()
-df.columns = ["geo", "time_period", "obs_value", "unit"]
+# Only the projected columns are parsed
+df = eurostat.load(src, cols, cache=not args.no_cache)
+instrument.step("read", rows=len(df))
 
-# Coerce to string where needed
-df["geo"] = df["geo"].astype(str)
-df["time_period"] = df["time_period"].astype(str)
-df["unit"] = df["unit"].astype(str)
-
-print("\nSample units:", df["unit"].dropna().unique().tolist()[:20])
+instrument.debug("\nSample units:", lambda: df["unit"].dropna().unique().tolist()[:20])
 
 # ---- Filter to per-capita units (codes usually contain 'HAB') ----
 mask_pc = df["unit"].str.contains("HAB", case=False, na=False)
 if mask_pc.any():
     df = df[mask_pc]
-    print("Filtered to per-capita units (HAB). Remaining units:",
-          df["unit"].dropna().unique().tolist())
+    instrument.debug("Filtered to per-capita units (HAB). Remaining units:",
+                     lambda: df["unit"].dropna().unique().tolist())
 else:
-    print("WARNING: no unit containing 'HAB' found; using all units as-is.")
+    instrument.warn("WARNING: no unit containing 'HAB' found; using all units as-is.")
 
 # ---- Keep numeric values only ----
-df = df[pd.to_numeric(df["obs_value"], errors="coerce").notna()]
-df["obs_value"] = df["obs_value"].astype(float)
+df = df[df["obs_value"].notna()].copy()
 
 # ---- Extract year from time_period ----
 # Works for '2023' or '2023-01' or '2023-01-01' etc.
@@ -62,24 +52,27 @@ df["year"] = pd.to_numeric(df["time_period"].str.slice(0, 4), errors="coerce")
 df = df[df["year"].notna()]
 df["year"] = df["year"].astype(int)
 
-print("Years present:", sorted(df["year"].unique())[-10:])
+instrument.debug("Years present:", lambda: sorted(df["year"].unique())[-10:])
 
 latest_year = df["year"].max()
-print("Latest year:", latest_year)
+instrument.info("Latest year:", latest_year)
 
 # If latest year looks too futuristic (garbage), you can clamp it manually later
 df = df[df["year"] == latest_year]
+instrument.step("filter", rows=len(df))
 
 # ---- One value per geo: average in case of duplicates ----
 gdp = (
-    df.groupby(["geo", "year"], as_index=False)["obs_value"]
+    df.groupby(["geo", "year"], as_index=False, observed=True)["obs_value"]
       .mean()
       .rename(columns={"obs_value": "gdp_pc"})
 )
 
-print("\nPreview (geo/year/gdp_pc):")
-print(gdp.head())
-print("Rows before ISO mapping:", len(gdp))
+instrument.step("bucket", rows=len(gdp))
+
+instrument.debug("\nPreview (geo/year/gdp_pc):")
+instrument.debug(gdp.head)
+instrument.debug("Rows before ISO mapping:", len(gdp))
 
 # ---- Map GEO (ISO2-ish) to ISO3 ----
 iso2_to_iso3 = {
@@ -97,16 +90,18 @@ iso2_to_iso3 = {
 gdp["dest_iso3"] = gdp["geo"].map(iso2_to_iso3)
 missing = gdp[gdp["dest_iso3"].isna()]["geo"].unique().tolist()
 if missing:
-    print("WARNING: missing ISO3 mapping for GEO codes:", missing)
+    instrument.warn("WARNING: missing ISO3 mapping for GEO codes:", missing)
 
 gdp = gdp[gdp["dest_iso3"].notna()].copy()
 
 # Final columns for merging later
 gdp = gdp[["dest_iso3", "gdp_pc", "year"]]
+instrument.step("merge", rows=len(gdp))
 
-print("\nClean GDP pc table:")
-print(gdp.head())
-print("Rows after ISO mapping:", len(gdp))
+instrument.debug("\nClean GDP pc table:")
+instrument.debug(gdp.head)
+instrument.info("Rows after ISO mapping:", len(gdp))
 
-print("Writing", out)
+instrument.info("Writing", out)
 gdp.to_csv(out, index=False)
+instrument.step("write", rows=len(gdp))
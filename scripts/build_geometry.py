@@ -0,0 +1,282 @@
+"""Build the basemap, data/europe*.topo.json, from the bundled GISCO countries.
+
+gisco/CNTR_RG_20M_2024_4326.geojson covers the whole world at full
+precision.  The map only ever shows Europe, so this stage
+
+  1. keeps the countries whose outline reaches into VIEWPORT,
+  2. clips every ring to VIEWPORT,
+  3. snaps coordinates to a QUANTIZE x QUANTIZE grid and cuts the rings into
+     arcs at the points where neighbouring borders meet or part,
+  4. per level of detail (LODS), simplifies each arc once (Douglas-Peucker,
+     end points fixed), so a border shared by two countries stays shared,
+     and drops islands too small to see at that level, and
+  5. writes one delta-encoded, quantized TopoJSON per level with ISO_A3 /
+     NAME_EN properties and the ISO3 code as feature id.  The coarsest,
+     europe.topo.json, is what the map loads first; its "lods" member lists
+     the finer files and the zoom at which main.js swaps to them.
+
+No GIS packages are needed; everything below is plain Python and numpy.
+"""
+import argparse
+import json
+
+import numpy as np
+from pathlib import Path
+
+import instrument
+from topo import clip_ring
+
+BASE = Path(__file__).resolve().parents[1]
+src = BASE / "gisco" / "CNTR_RG_20M_2024_4326.geojson"
+
+# lon/lat box kept: the map's EUROPE_BOUNDS ([34,-10] - [71.5,60]) plus the
+# margin a wide screen shows around it at the minimum zoom
+VIEWPORT = (-30.0, 25.0, 75.0, 75.0)
+
+QUANTIZE = 100_000      # grid cells per axis across VIEWPORT
+
+MAP_MIN_ZOOM = 4.25      # main.js's minZoom
+
+
+def pixel_deg(zoom):
+    """Degrees of longitude one screen pixel spans at a Leaflet zoom."""
+    return 360 / (256 * 2 ** zoom)
+
+
+# Levels of detail: (file under data/, first map zoom it is used at,
+# Douglas-Peucker tolerance in degrees).  The coarsest level is only drawn
+# at zoom 4.25 - 4.5, so it may be off by 1.5 pixels at MAP_MIN_ZOOM
+# (~0.11 deg, a third of the full outline's vertices); islands smaller
+# than ~3 pixels drop out with it.  One pixel is ~0.02 deg at 6.25, where
+# the full GISCO 1:20M outline takes over from lod1.
+LODS = [
+    ("europe.topo.json",      0,    round(1.5 * pixel_deg(MAP_MIN_ZOOM), 3)),
+    ("europe.lod1.topo.json", 4.75, 0.015),
+    ("europe.lod2.topo.json", 6.25, 0),
+]
+
+
+# ---------------- snapping ----------------
+def quantize(pts, box, q):
+    x0, y0, x1, y1 = box
+    scale = np.array([(x1 - x0) / (q - 1), (y1 - y0) / (q - 1)])
+    grid = np.round((pts - [x0, y0]) / scale).astype(np.int64)
+    # Drop consecutive repeats created by snapping (ring stays open)
+    keep = np.any(grid != np.roll(grid, 1, axis=0), axis=1)
+    grid = grid[keep] if keep.any() else grid[:1]
+    return [tuple(p) for p in grid]
+
+
+# ---------------- topology ----------------
+def find_junctions(rings):
+    """Points where the set of rings passing through them changes.
+
+    A point shared by two rings is a junction unless both pass through it
+    between the same two neighbours (in either direction).
+    """
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        n = len(ring)
+        for i, p in enumerate(ring):
+            pair = frozenset((ring[i - 1], ring[(i + 1) % n]))
+            seen = neighbours.get(p)
+            if seen is None:
+                neighbours[p] = pair
+            elif seen != pair:
+                junctions.add(p)
+    return junctions
+
+
+def cut_ring(ring, junctions):
+    """Split a ring into open arcs at its junctions (closed arc if none)."""
+    idx = [i for i, p in enumerate(ring) if p in junctions]
+    if not idx:
+        # Rotate to a canonical start so identical rings produce one arc
+        start = ring.index(min(ring))
+        ring = ring[start:] + ring[:start]
+        return [ring + [ring[0]]]
+    start = idx[0]
+    ring = ring[start:] + ring[:start]
+    idx = [i - start for i in idx] + [len(ring)]
+    ring = ring + [ring[0]]
+    return [ring[a:b + 1] for a, b in zip(idx, idx[1:])]
+
+
+def simplify(arc, tol, scale):
+    """Douglas-Peucker on a list of grid points, keeping both ends.
+
+    Distances are measured in degrees (grid * scale).  Closed arcs (whole
+    rings) are split at the point farthest from the start so they keep at
+    least a triangle.
+    """
+    pts = np.asarray(arc, dtype=float) * scale
+    n = len(pts)
+    if n <= 2:
+        return arc
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    if arc[0] == arc[-1]:
+        far = int(np.argmax(((pts - pts[0]) ** 2).sum(axis=1)))
+        keep[far] = True
+        stack = [(0, far), (far, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        seg = pts[b] - pts[a]
+        rel = pts[a + 1:b] - pts[a]
+        length = np.hypot(*seg)
+        if length == 0:
+            d = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            d = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / length
+        i = int(np.argmax(d))
+        if d[i] > tol:
+            m = a + 1 + i
+            keep[m] = True
+            stack += [(a, m), (m, b)]
+    if arc[0] == arc[-1] and keep.sum() < 4:
+        # Keep at least a triangle: add the point farthest from the chord
+        # between the start and the far point
+        seg = pts[far] - pts[0]
+        rel = pts - pts[0]
+        d = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0])
+        d[keep] = -1
+        if d.max() < 0:
+            return arc
+        keep[int(np.argmax(d))] = True
+    return [p for p, k in zip(arc, keep) if k]
+
+
+class ArcIndex:
+    """Deduplicates arcs; an arc walked backwards is referenced as ~index."""
+
+    def __init__(self):
+        self.arcs = []
+        self.ids = {}
+
+    def ref(self, arc):
+        key = tuple(arc)
+        if key in self.ids:
+            return self.ids[key]
+        rkey = key[::-1]
+        if rkey in self.ids:
+            return ~self.ids[rkey]
+        self.ids[key] = len(self.arcs)
+        self.arcs.append(list(arc))
+        return self.ids[key]
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+# ---------------- read ----------------
+instrument.info("Reading", src)
+with open(src) as f:
+    gj = json.load(f)
+instrument.step("read", rows=len(gj["features"]))
+
+countries = []  # (iso3, name, [[ring, ...] per polygon])
+for feat in gj["features"]:
+    props = feat["properties"]
+    geom = feat["geometry"]
+    polys = geom["coordinates"] if geom["type"] == "MultiPolygon" else [geom["coordinates"]]
+    kept = []
+    for poly in polys:
+        shell = clip_ring(poly[0], VIEWPORT)
+        if shell is None:
+            continue
+        rings = [quantize(shell, VIEWPORT, QUANTIZE)]
+        if len(set(rings[0])) < 3:
+            continue  # snapped away
+        for hole in poly[1:]:
+            hole = clip_ring(hole, VIEWPORT)
+            if hole is not None:
+                hole = quantize(hole, VIEWPORT, QUANTIZE)
+                if len(set(hole)) >= 3:
+                    rings.append(hole)
+        kept.append(rings)
+    if kept:
+        iso3 = props.get("ISO3_CODE") or props["CNTR_ID"]
+        countries.append((iso3, props.get("NAME_ENGL") or iso3, kept))
+
+instrument.info("Countries in viewport:", len(countries))
+instrument.step("filter", rows=len(countries))
+
+all_rings = [r for _, _, polys in countries for poly in polys for r in poly]
+junctions = find_junctions(all_rings)
+instrument.info("Rings:", len(all_rings), " points:", sum(map(len, all_rings)), " junctions:", len(junctions))
+
+# Cut every ring into shared arcs
+x0, y0, x1, y1 = VIEWPORT
+scale = [(x1 - x0) / (QUANTIZE - 1), (y1 - y0) / (QUANTIZE - 1)]
+index = ArcIndex()
+shapes = []  # (iso3, name, [(arc refs per ring, shell extent in degrees)])
+for iso3, name, polys in countries:
+    parts = []
+    for poly in polys:
+        shell = np.asarray(poly[0], dtype=float) * scale
+        extent = float((shell.max(axis=0) - shell.min(axis=0)).max())
+        parts.append(([[index.ref(a) for a in cut_ring(ring, junctions)] for ring in poly], extent))
+    shapes.append((iso3, name, parts))
+instrument.step("arcs", rows=len(index.arcs))
+
+
+def geometries_for(tol):
+    """Country geometries without the islands smaller than ~2 * tol.
+
+    Each country keeps at least its largest polygon.
+    """
+    out = []
+    for iso3, name, parts in shapes:
+        biggest = max(e for _, e in parts)
+        polys = [rings for rings, e in parts if e >= 2 * tol or e == biggest]
+        out.append({
+            "type": "MultiPolygon" if len(polys) > 1 else "Polygon",
+            "id": iso3,
+            "properties": {"ISO_A3": iso3, "NAME_EN": name},
+            "arcs": polys if len(polys) > 1 else polys[0],
+        })
+    return out
+
+
+def delta(arc):
+    arr = np.asarray(arc, dtype=np.int64)
+    arr[1:] -= arr[:-1].copy()
+    return arr.tolist()
+
+
+def used_arcs(geometries):
+    refs = set()
+    for g in geometries:
+        polys = g["arcs"] if g["type"] == "MultiPolygon" else [g["arcs"]]
+        for rings in polys:
+            for ring in rings:
+                refs.update(r if r >= 0 else ~r for r in ring)
+    return refs
+
+
+# One file per level; arcs are simplified per level, so shared borders
+# stay shared at every level.  The coarsest file lists the others.
+lods = [{"file": f, "minZoom": z, "tolerance": t} for f, z, t in LODS]
+for i, (fname, min_zoom, tol) in enumerate(LODS):
+    geometries = geometries_for(tol)
+    used = used_arcs(geometries)
+    arcs = [simplify(a, tol, scale) if k in used else a[:1] + a[-1:]
+            for k, a in enumerate(index.arcs)]
+    topo = {
+        "type": "Topology",
+        "bbox": list(VIEWPORT),
+        "transform": {"scale": scale, "translate": [x0, y0]},
+        "objects": {"countries": {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": [delta(a) for a in arcs],
+    }
+    if i == 0:
+        topo["lods"] = lods
+    path = BASE / "data" / fname
+    path.write_text(json.dumps(topo, separators=(",", ":")))
+    n_vertices = sum(len(arcs[k]) for k in used)
+    instrument.info(f"Writing {path} (zoom >= {min_zoom}, tolerance {tol}): "
+                    f"{n_vertices} vertices, {path.stat().st_size} bytes")
+    instrument.step("write", rows=len(geometries), file=fname, vertices=n_vertices)
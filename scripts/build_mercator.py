@@ -0,0 +1,94 @@
+"""Pre-project the basemap levels to Web Mercator for the canvas renderer.
+
+For each europe*.topo.json level written by build_geometry.py this writes
+data/europe*.merc.bin with every ring in EPSG:3857 metres, Leaflet's
+default CRS, so the browser wraps the rings as typed arrays and only has to
+scale and offset them per tile instead of projecting point by point.  The
+framing is binfile.py's; the columns are:
+
+    coords           float32  x, y of every ring vertex, closing point dropped
+    ring_offsets     int32    first vertex of each ring, then the total
+    feature_offsets  int32    first ring of each country, then the total
+    bbox             float32  xmin, ymin, xmax, ymax per country
+
+The header lists the countries' "ids" and "names" in feature order, and
+the levels of detail ("lods") as europe.topo.json lists them, so ?tiles /
+?merc pages can boot from the coarse level without the TopoJSON.  A
+level's vertices are projected in one numpy pass with the spherical
+Mercator formulas, so no projection library is needed.
+"""
+import argparse
+import json
+
+import numpy as np
+from pathlib import Path
+
+import binfile
+import instrument
+import topo
+
+BASE = Path(__file__).resolve().parents[1]
+geom_path = BASE / "data" / "europe.topo.json"
+
+MERC_VERSION = 1
+R = 6378137.0                # EPSG:3857 sphere radius, metres
+MAX_LAT = 85.0511287798      # where Web Mercator's square world ends
+
+
+def project(lonlat):
+    """(n, 2) lon/lat degrees -> (n, 2) EPSG:3857 metres."""
+    lon = np.radians(lonlat[:, 0])
+    lat = np.radians(np.clip(lonlat[:, 1], -MAX_LAT, MAX_LAT))
+    return np.column_stack([R * lon, R * np.log(np.tan(np.pi / 4 + lat / 2))])
+
+
+def out_path(file):
+    return BASE / "data" / file.replace(".topo.json", ".merc.bin")
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+with open(geom_path) as f:
+    lods = json.load(f)["lods"]
+levels = {}
+for lod in lods:
+    instrument.info("Reading", BASE / "data" / lod["file"])
+    levels[lod["file"]] = topo.read(BASE / "data" / lod["file"])
+instrument.step("read", rows=sum(map(len, levels.values())))
+
+for file, countries in levels.items():
+    rings = [r[:-1] for c in countries for poly in c.polygons for r in poly]
+    ring_counts = [sum(map(len, c.polygons)) for c in countries]
+    xy = project(np.concatenate(rings))
+
+    ring_offsets = np.zeros(len(rings) + 1, dtype="<i4")
+    np.cumsum([len(r) for r in rings], out=ring_offsets[1:])
+    feature_offsets = np.zeros(len(countries) + 1, dtype="<i4")
+    np.cumsum(ring_counts, out=feature_offsets[1:])
+    starts = ring_offsets[feature_offsets[:-1]]
+    bbox = np.column_stack([np.minimum.reduceat(xy, starts), np.maximum.reduceat(xy, starts)])
+
+    columns = {
+        "coords": xy.astype("<f4").ravel(),
+        "ring_offsets": ring_offsets,
+        "feature_offsets": feature_offsets,
+        "bbox": bbox.astype("<f4").ravel(),
+    }
+    header = {
+        "version": MERC_VERSION,
+        "crs": "EPSG:3857",
+        "ids": [c.id for c in countries],
+        "names": [c.name or c.id for c in countries],
+        "lods": lods,
+        "columns": {},
+    }
+    blocks = []
+    for col, arr in columns.items():
+        header["columns"][col] = {"dtype": arr.dtype.name, "length": len(arr)}
+        blocks.append((header["columns"][col], arr))
+
+    path = out_path(file)
+    instrument.info("Writing", path)
+    size = binfile.write(path, header, blocks)
+    instrument.info(f" {len(countries)} countries, {len(rings)} rings, {len(xy)} vertices, {size} bytes")
+    instrument.step("write", rows_in=len(countries), rows=len(xy), file=path.name, bytes=size)
@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
+import argparse
 import pandas as pd
 from pathlib import Path
 
+import eurostat
+import instrument
+
 ROOT = Path(__file__).resolve().parents[1]
 
 SRC_RES = ROOT / "data" / "migr_resvalid__custom_18711207_linear_2_0.csv"
 FLOWS_CSV = ROOT / "data" / "flows_ua_agg.csv"
 FLOWS_JSON = ROOT / "data" / "flows_ua_agg.json"
+ANCHORS_CSV = ROOT / "data" / "country_anchors.csv"
 
 OUT_AGG_CSV   = ROOT / "data" / "respermits_ua_agg.csv"
 OUT_AGG_JSON  = ROOT / "data" / "respermits_ua_agg.json"
@@ -15,96 +20,76 @@ OUT_METRICS_JSON = ROOT / "data" / "respermits_ua_metrics.json"
 
 PREWAR_CUTOFF = 2021  # latest year <= this is treated as "pre-war"
 
-print(f"Reading {SRC_RES}")
-df_raw = pd.read_csv(SRC_RES, comment="#", low_memory=False)
-
-print("Original columns:")
-for i, c in enumerate(df_raw.columns):
-    print(f"{i:2d}: {c!r}")
-
-# ---------------- helpers ----------------
-def pick(aliases):
-    for a in aliases:
-        if a in df_raw.columns:
-            return a
-    raise KeyError(f"None of {aliases} found in columns")
-
-def pick_optional(aliases):
-    for a in aliases:
-        if a in df_raw.columns:
-            return a
-    return None
-
-citizen_col = pick(["citizen", "CITIZEN"])
-geo_col     = pick(["geo", "GEO"])
-time_col    = pick(["TIME_PERIOD", "time_period", "time", "TIME"])
-value_col   = pick(["OBS_VALUE", "obs_value"])
-unit_col    = pick(["unit", "UNIT"])
-duration_col = pick_optional(["duration", "DURATION"])
-reason_col   = pick_optional(["reason", "REASON"])
-sex_col      = pick_optional(["sex", "SEX"])
-age_col      = pick_optional(["age", "AGE"])
-
-col_map = {
-    "citizen": citizen_col,
-    "geo":     geo_col,
-    "time":    time_col,
-    "value":   value_col,
-    "unit":    unit_col,
-}
-if duration_col: col_map["duration"] = duration_col
-if reason_col:   col_map["reason"]   = reason_col
-if sex_col:      col_map["sex"]      = sex_col
-if age_col:      col_map["age"]      = age_col
-
-print("\nUsing columns:")
+parser = argparse.ArgumentParser()
+eurostat.add_cache_argument(parser)
+args = instrument.parse_args(parser)
+
+instrument.info(f"Reading {SRC_RES}")
+
+col_map = eurostat.resolve_columns(eurostat.read_header(SRC_RES), {
+    "citizen": eurostat.CITIZEN,
+    "geo":     eurostat.GEO,
+    "time":    eurostat.TIME_PERIOD,
+    "value":   eurostat.OBS_VALUE,
+    "unit":    eurostat.UNIT,
+}, optional={
+    "duration": ["duration", "DURATION"],
+    "reason":   ["reason", "REASON"],
+    "sex":      eurostat.SEX,
+    "age":      eurostat.AGE,
+})
+
+instrument.debug("\nUsing columns:")
 for k, v in col_map.items():
-    print(f" {k:9s}: {v}")
+    instrument.debug(f" {k:9s}: {v}")
 
-df = df_raw[list(col_map.values())].rename(columns={v: k for k, v in col_map.items()})
+df = eurostat.load(SRC_RES, col_map, values=["value"], value_dtype=None,
+                   cache=not args.no_cache)
+instrument.step("read", rows=len(df))
 
-print("\nSample citizen codes:", sorted(df["citizen"].dropna().astype(str).unique())[:20])
+instrument.debug("\nSample citizen codes:",
+                 lambda: sorted(df["citizen"].dropna().astype(str).unique())[:20])
 
 # ---------- UA citizens only ----------
 df = df[df["citizen"].isin(["UA", "UKR"])].copy()
-print(f"Rows with UA/UKR: {len(df)}")
+instrument.info(f"Rows with UA/UKR: {len(df)}")
 
 # Optional filters
 if "duration" in df.columns:
-    print("Unique duration codes (UA subset):",
-          sorted(df["duration"].dropna().astype(str).unique())[:20])
+    instrument.debug("Unique duration codes (UA subset):",
+                     lambda: sorted(df["duration"].dropna().astype(str).unique())[:20])
 
 if "reason" in df.columns:
-    print("Unique reason codes (UA subset):",
-          sorted(df["reason"].dropna().astype(str).unique())[:20])
+    instrument.debug("Unique reason codes (UA subset):",
+                     lambda: sorted(df["reason"].dropna().astype(str).unique())[:20])
 
 if "sex" in df.columns:
-    print("Unique sex codes (UA subset):",
-          sorted(df["sex"].dropna().astype(str).unique()))
+    instrument.debug("Unique sex codes (UA subset):",
+                     lambda: sorted(df["sex"].dropna().astype(str).unique()))
     df = df[df["sex"].astype(str).isin(["T", "TOTAL"]) | df["sex"].isna()]
 
 if "age" in df.columns:
-    print("Unique age codes (UA subset):",
-          sorted(df["age"].dropna().astype(str).unique()))
+    instrument.debug("Unique age codes (UA subset):",
+                     lambda: sorted(df["age"].dropna().astype(str).unique()))
     df = df[df["age"].astype(str).isin(["TOTAL"]) | df["age"].isna()]
 
-print(f"Rows after optional sex/age filter: {len(df)}")
+instrument.info(f"Rows after optional sex/age filter: {len(df)}")
+instrument.step("filter", rows=len(df))
 
 # ---------- aggregate per GEO, per year ----------
 t = df["time"].astype(str)
 df["year"] = pd.to_numeric(t.str.slice(0, 4), errors="coerce")
-years = sorted(df["year"].dropna().unique())
-print("Years present:", years)
+instrument.debug("Years present:", lambda: sorted(df["year"].dropna().unique()))
 
 g = (
     df.dropna(subset=["year"])
-      .groupby(["geo", "year"], as_index=False)["value"]
+      .groupby(["geo", "year"], as_index=False, observed=True)["value"]
       .sum()
       .rename(columns={"value": "permits_total"})
 )
 
 latest_year = int(g["year"].max())
-print("Latest year:", latest_year)
+instrument.info("Latest year:", latest_year)
 
 # latest snapshot
 now_df = g[g["year"] == latest_year].copy()
@@ -118,11 +103,13 @@ pre_df = (
     .rename(columns={"year": "prewar_year", "permits_total": "permits_prewar"})
 )
 
-print("\nPreview latest permits (geo / year / permits_total):")
-print(now_df.head())
+instrument.step("bucket", rows=len(g))
 
-print("\nPreview pre-war permits (geo / prewar_year / permits_prewar):")
-print(pre_df.head())
+instrument.debug("\nPreview latest permits (geo / year / permits_total):")
+instrument.debug(now_df.head)
+
+instrument.debug("\nPreview pre-war permits (geo / prewar_year / permits_prewar):")
+instrument.debug(pre_df.head)
 
 # ---------- merge now + pre-war ----------
 merged = now_df[["geo", "permits_total"]].rename(columns={"permits_total": "permits_now"})
@@ -131,8 +118,8 @@ merged["permits_prewar"] = merged["permits_prewar"].fillna(0.0)
 
 merged["ua_perm_delta"] = (merged["permits_now"] - merged["permits_prewar"]).clip(lower=0.0)
 
-print("\nMerged permits (geo / prewar / now / delta):")
-print(merged.head())
+instrument.debug("\nMerged permits (geo / prewar / now / delta):")
+instrument.debug(merged.head)
 
 # ---------- GEO -> ISO3 ----------
 GEO_TO_ISO3 = {
@@ -148,7 +135,7 @@ GEO_TO_ISO3 = {
 merged["dest_iso3"] = merged["geo"].map(GEO_TO_ISO3)
 missing_geo = sorted(set(merged["geo"]) - set(GEO_TO_ISO3.keys()))
 if missing_geo:
-    print("\nWARNING: missing ISO3 mapping for GEO codes:", missing_geo)
+    instrument.warn("\nWARNING: missing ISO3 mapping for GEO codes:", missing_geo)
 
 merged = merged[merged["dest_iso3"].notna()].copy()
 
@@ -156,29 +143,26 @@ merged = merged[merged["dest_iso3"].notna()].copy()
 def load_flows():
     if FLOWS_CSV.exists():
         f = pd.read_csv(FLOWS_CSV)
-        print("Using flows_ua_agg.csv for refugees")
+        instrument.info("Using flows_ua_agg.csv for refugees")
         return f
     if FLOWS_JSON.exists():
         f = pd.read_json(FLOWS_JSON)
-        print("Using flows_ua_agg.json for refugees")
+        instrument.info("Using flows_ua_agg.json for refugees")
         return f
     raise RuntimeError("Could not find flows_ua_agg with dest_iso3 + total_refugees")
 
 flows = load_flows()
-print("Flows columns:", list(flows.columns))
+instrument.debug("Flows columns:", list(flows.columns))
 
 # refugees
 if not {"dest_iso3", "total_refugees"}.issubset(flows.columns):
     raise RuntimeError("flows_ua_agg is missing dest_iso3 or total_refugees columns")
 
-# positions (lat/lon) are optional
-if {"lat", "lon"}.issubset(flows.columns):
-    pos = flows[["dest_iso3", "lat", "lon"]].drop_duplicates()
-else:
-    print("WARNING: flows has no lat/lon; using NaN for positions")
-    pos = flows[["dest_iso3"]].drop_duplicates()
-    pos["lat"] = pd.NA
-    pos["lon"] = pd.NA
+# positions: label anchors from build_anchors.py
+instrument.info(f"Reading {ANCHORS_CSV}")
+pos = pd.read_csv(ANCHORS_CSV)[["dest_iso3", "label_lat", "label_lon"]].rename(
+    columns={"label_lat": "lat", "label_lon": "lon"}
+)
 
 # join refugees
 merged = merged.merge(
@@ -198,6 +182,7 @@ merged["ua_perm_share_war"] = pd.NA
 ratio = merged["ua_perm_per_refugee"]
 share_mask = ratio.notna() & (ratio >= 0)
 merged.loc[share_mask, "ua_perm_share_war"] = ratio[share_mask] / (1.0 + ratio[share_mask])
+instrument.step("merge", rows=len(merged))
 
 # ---------- write outputs ----------
 agg_latest = merged.merge(pos, on="dest_iso3", how="left")
@@ -206,14 +191,14 @@ agg_latest_out = agg_latest[["dest_iso3", "permits_now", "lat", "lon"]].rename(
     columns={"permits_now": "permits_total"}
 ).sort_values("permits_total", ascending=False)
 
-print("\nClean latest-permits table:")
-print(agg_latest_out.head(10))
-print("Rows:", len(agg_latest_out))
+instrument.debug("\nClean latest-permits table:")
+instrument.debug(lambda: agg_latest_out.head(10))
+instrument.info("Rows:", len(agg_latest_out))
 
-print(f"Writing {OUT_AGG_CSV}")
+instrument.info(f"Writing {OUT_AGG_CSV}")
 agg_latest_out.to_csv(OUT_AGG_CSV, index=False)
 
-print(f"Writing {OUT_AGG_JSON}")
+instrument.info(f"Writing {OUT_AGG_JSON}")
 agg_latest_out.to_json(OUT_AGG_JSON, orient="records", indent=2)
 
 metrics = merged.merge(pos, on="dest_iso3", how="left")
@@ -232,12 +217,13 @@ metrics_out = metrics[
     ]
 ].sort_values("dest_iso3")
 
-print("\nPermit metrics table:")
-print(metrics_out.head(10))
-print("Rows:", len(metrics_out))
+instrument.debug("\nPermit metrics table:")
+instrument.debug(lambda: metrics_out.head(10))
+instrument.info("Rows:", len(metrics_out))
 
-print(f"Writing {OUT_METRICS_CSV}")
+instrument.info(f"Writing {OUT_METRICS_CSV}")
 metrics_out.to_csv(OUT_METRICS_CSV, index=False)
 
-print(f"Writing {OUT_METRICS_JSON}")
+instrument.info(f"Writing {OUT_METRICS_JSON}")
 metrics_out.to_json(OUT_METRICS_JSON, orient="records", indent=2)
+instrument.step("write", rows=len(metrics_out))
@@ -0,0 +1,217 @@
+"""Cut the basemap into a static vector-tile pyramid under data/tiles/.
+
+Tiles follow the Mapbox Vector Tile 2.1 layout (protobuf, one "countries"
+layer, extent 4096) in the usual XYZ scheme, data/tiles/{z}/{x}/{y}.pbf, so
+the map can fetch just the tiles in view from a plain static server or the
+file system.  Each feature's id is its position in metadata.json's "ids"
+list and it carries dest_iso3 and name tags.
+
+Zoom z is cut from the europe*.topo.json level main.js shows at that zoom
+(the last whose minZoom is at most z).  Rings are projected to Web
+Mercator, clipped to the tile plus BUFFER (so strokes never end at a tile
+edge) and snapped to the tile grid.  Tiles with no land are not written;
+metadata.json (a TileJSON document) lists the ones that exist, plus a
+lon/lat bbox per country for gradient fills.
+
+The protobuf wire format is small enough to write by hand, so no tile
+library is needed.
+"""
+import argparse
+import json
+import math
+import shutil
+
+import numpy as np
+from pathlib import Path
+
+import instrument
+import topo
+
+BASE = Path(__file__).resolve().parents[1]
+geom_path = BASE / "data" / "europe.topo.json"
+out_dir = BASE / "data" / "tiles"
+
+MIN_ZOOM, MAX_ZOOM = 4, 7   # the map shows zoom 4.25 - 7.5
+EXTENT = 4096               # tile grid units per side
+BUFFER = 64                 # grid units kept beyond each tile edge
+LAYER = "countries"
+
+
+# ---------------- protobuf ----------------
+def varint(n):
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def field(num, wire, payload):
+    """One protobuf field; wire 0 = varint, 2 = length-delimited."""
+    if wire == 0:
+        return varint(num << 3) + varint(payload)
+    return varint(num << 3 | 2) + varint(len(payload)) + payload
+
+
+def packed(values):
+    return b"".join(varint(v) for v in values)
+
+
+def zigzag(n):
+    return (n << 1) ^ (n >> 31)
+
+
+# ---------------- geometry ----------------
+def project(lonlat, z):
+    """lon/lat -> Web Mercator in tile units at zoom z."""
+    n = 2 ** z
+    lon, lat = lonlat[:, 0], np.radians(lonlat[:, 1])
+    x = (lon + 180) / 360 * n
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / math.pi) / 2 * n
+    return np.column_stack([x, y])
+
+
+def ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return (x * np.roll(y, -1) - np.roll(x, -1) * y).sum() / 2
+
+
+def tile_ring(ring, tx, ty, exterior):
+    """Clip a projected ring to tile (tx, ty), snap it to the tile grid and
+    orient it (exterior rings positive area in tile coordinates)."""
+    pad = BUFFER / EXTENT
+    pts = topo.clip_ring(np.vstack([ring, ring[:1]]),
+                         (tx - pad, ty - pad, tx + 1 + pad, ty + 1 + pad))
+    if pts is None:
+        return None
+    grid = np.round((pts - [tx, ty]) * EXTENT).astype(np.int64)
+    keep = np.any(grid != np.roll(grid, 1, axis=0), axis=1)
+    grid = grid[keep]
+    if len(grid) < 3:
+        return None
+    area = ring_area(grid)
+    if area == 0:
+        return None
+    if (area > 0) != exterior:
+        grid = grid[::-1]
+    return grid
+
+
+def encode_geometry(rings):
+    """MoveTo / LineTo / ClosePath commands with zigzag deltas."""
+    cmds = []
+    cx = cy = 0
+    for ring in rings:
+        for i, (x, y) in enumerate(ring.tolist()):
+            if i == 0:
+                cmds.append(1 | 1 << 3)                 # MoveTo, 1 point
+            elif i == 1:
+                cmds.append(2 | (len(ring) - 1) << 3)   # LineTo, n - 1 points
+            cmds += [zigzag(x - cx), zigzag(y - cy)]
+            cx, cy = x, y
+        cmds.append(7 | 1 << 3)                         # ClosePath
+    return cmds
+
+
+def encode_tile(features):
+    """features: [(id, {tag: value}, rings)] -> one "countries" layer."""
+    keys, values = {}, {}
+    layer = field(15, 0, 2) + field(1, 2, LAYER.encode())
+    for fid, props, rings in features:
+        tags = []
+        for k, v in props.items():
+            tags += [keys.setdefault(k, len(keys)), values.setdefault(v, len(values))]
+        feat = (field(1, 0, fid) + field(2, 2, packed(tags))
+                + field(3, 0, 3) + field(4, 2, packed(encode_geometry(rings))))
+        layer += field(2, 2, feat)
+    layer += b"".join(field(3, 2, k.encode()) for k in keys)
+    layer += b"".join(field(4, 2, field(1, 2, v.encode())) for v in values)
+    layer += field(5, 0, EXTENT)
+    return field(3, 2, layer)
+
+
+instrument.parse_args(argparse.ArgumentParser(description=__doc__))
+
+# ---------------- read ----------------
+with open(geom_path) as f:
+    lods = json.load(f)["lods"]
+levels = {}
+for lod in lods:
+    instrument.info("Reading", BASE / "data" / lod["file"])
+    levels[lod["file"]] = topo.read(BASE / "data" / lod["file"])
+instrument.step("read", rows=sum(map(len, levels.values())))
+
+
+def level_for(z):
+    """The level drawn at zoom z, as main.js's lodForZoom() picks it."""
+    return max((l for l in lods if l["minZoom"] <= z), key=lambda l: l["minZoom"])["file"]
+
+
+countries = levels[lods[-1]["file"]]
+ids = [c.id for c in countries]
+id_pos = {iso3: i for i, iso3 in enumerate(ids)}
+props = {c.id: {"dest_iso3": c.id, "name": c.name or c.id} for c in countries}
+
+bboxes = {}
+for c in countries:
+    pts = np.concatenate([p[0] for p in c.polygons])
+    bboxes[c.id] = [round(float(v), 4) for v in (*pts.min(axis=0), *pts.max(axis=0))]
+
+if out_dir.exists():
+    shutil.rmtree(out_dir)
+
+available = {}
+total_bytes = 0
+for z in range(MIN_ZOOM, MAX_ZOOM + 1):
+    source = level_for(z)
+    tiles = {}  # (x, y) -> {iso3: rings}
+    for c in levels[source]:
+        for poly in c.polygons:
+            proj = [project(r[:-1], z) for r in poly]
+            lo = np.floor(proj[0].min(axis=0) - BUFFER / EXTENT).astype(int)
+            hi = np.floor(proj[0].max(axis=0) + BUFFER / EXTENT).astype(int)
+            for tx in range(lo[0], hi[0] + 1):
+                for ty in range(lo[1], hi[1] + 1):
+                    shell = tile_ring(proj[0], tx, ty, exterior=True)
+                    if shell is None:
+                        continue
+                    rings = [shell] + [h for h in (tile_ring(r, tx, ty, exterior=False)
+                                                   for r in proj[1:]) if h is not None]
+                    feats = tiles.setdefault((tx, ty), {})
+                    feats.setdefault(c.id, []).extend(rings)
+    for (tx, ty), feats in tiles.items():
+        path = out_dir / str(z) / str(tx) / f"{ty}.pbf"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = encode_tile([(id_pos[i], props[i], rings) for i, rings in feats.items()])
+        path.write_bytes(data)
+        total_bytes += len(data)
+    available[str(z)] = sorted(f"{x}/{y}" for x, y in tiles)
+    instrument.info(f" z{z}: {len(tiles)} tiles from {source}")
+    instrument.step("tiles", rows_in=len(levels[source]), rows=len(tiles), zoom=z)
+
+west, south, east, north = (min(b[0] for b in bboxes.values()), min(b[1] for b in bboxes.values()),
+                            max(b[2] for b in bboxes.values()), max(b[3] for b in bboxes.values()))
+meta = {
+    "tilejson": "3.0.0",
+    "tiles": ["{z}/{x}/{y}.pbf"],
+    "minzoom": MIN_ZOOM,
+    "maxzoom": MAX_ZOOM,
+    "bounds": [west, south, east, north],
+    "vector_layers": [{"id": LAYER, "fields": {"dest_iso3": "String", "name": "String"}}],
+    "extent": EXTENT,
+    "buffer": BUFFER,
+    "ids": ids,
+    "bbox": bboxes,
+    "available": available,
+}
+meta_path = out_dir / "metadata.json"
+meta_path.parent.mkdir(parents=True, exist_ok=True)
+meta_path.write_text(json.dumps(meta, separators=(",", ":")))
+instrument.info("Writing", meta_path)
+n_tiles = sum(map(len, available.values()))
+instrument.info("Tiles:", n_tiles, " bytes:", total_bytes)
+instrument.step("write", rows_in=n_tiles, rows=n_tiles, bytes=total_bytes)
@@ -1,6 +1,10 @@
+import argparse
 import pandas as pd
 from pathlib import Path
 
+import eurostat
+import instrument
+
 
 BASE = Path(__file__).resolve().parents[1]
 SRC = BASE / "data" / "une_rt_a$defaultview_linear_2_0.csv"
@@ -17,9 +21,23 @@ ISO2_TO_ISO3 = {
 
 
 def main():
-    print("Reading", SRC)
-    df = pd.read_csv(SRC, comment="#", low_memory=False)
-    df = df[df["STRUCTURE"] == "dataflow"]
+    parser = argparse.ArgumentParser()
+    eurostat.add_cache_argument(parser)
+    args = instrument.parse_args(parser)
+
+    instrument.info("Reading", SRC)
+    cols = eurostat.resolve_columns(eurostat.read_header(SRC), {
+        "structure":   ["STRUCTURE"],
+        "unit":        eurostat.UNIT,
+        "sex":         eurostat.SEX,
+        "age":         eurostat.AGE,
+        "geo":         eurostat.GEO,
+        "time_period": eurostat.TIME_PERIOD,
+        "obs_value":   eurostat.OBS_VALUE,
+    })
+    df = eurostat.load(SRC, cols, cache=not args.no_cache)
+    instrument.step("read", rows=len(df))
+    df = df[df["structure"] == "dataflow"]
 
     mask = (
         (df["unit"] == "PC_ACT") &
@@ -27,19 +45,21 @@ def main():
         (df["age"] == "Y15-74")
     )
     df = df[mask].copy()
-    df = df[pd.to_numeric(df["OBS_VALUE"], errors="coerce").notna()]
-    df["OBS_VALUE"] = df["OBS_VALUE"].astype(float)
-    df["TIME_PERIOD"] = pd.to_numeric(df["TIME_PERIOD"], errors="coerce")
+    df = df[df["obs_value"].notna()]
+    df["time_period"] = pd.to_numeric(df["time_period"].astype(str), errors="coerce")
+    instrument.step("filter", rows=len(df))
 
-    latest = df.loc[df.groupby("geo")["TIME_PERIOD"].idxmax()].copy()
-    latest["dest_iso3"] = latest["geo"].map(ISO2_TO_ISO3)
+    latest = df.loc[df.groupby("geo", observed=True)["time_period"].idxmax()].copy()
+    latest["dest_iso3"] = latest["geo"].astype(str).map(ISO2_TO_ISO3)
     latest = latest[latest["dest_iso3"].notna()]
-    latest["unemployment"] = latest["OBS_VALUE"] / 100.0
+    latest["unemployment"] = latest["obs_value"] / 100.0
 
-    out_df = latest[["dest_iso3", "unemployment", "TIME_PERIOD"]].rename(columns={"TIME_PERIOD": "year"})
-    print("Rows:", len(out_df))
-    print("Writing", OUT)
+    out_df = latest[["dest_iso3", "unemployment", "time_period"]].rename(columns={"time_period": "year"})
+    instrument.step("bucket", rows=len(out_df))
+    instrument.info("Rows:", len(out_df))
+    instrument.info("Writing", OUT)
     out_df.to_csv(OUT, index=False)
+    instrument.step("write", rows=len(out_df))
 
 
 if __name__ == "__main__":
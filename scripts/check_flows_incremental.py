@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Check build_flows_from_migr_asytpsm.py's full and --incremental builds.
+
+On bench.py's synthetic migr_asytpsm extract, in a throw-away tree:
+
+  1. a full --series build writes flows_ua_agg.csv with one row per host in
+     the order the hosts appear in the dump, as the script always has;
+  2. a --series build of all but the last INCREMENT months followed by an
+     --incremental build of the whole dump writes the same bytes as (1),
+     for the snapshot CSV and for every file under flows_ua_series/.
+
+    python scripts/check_flows_incremental.py
+"""
+import ast
+import filecmp
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+import bench
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = "scripts/build_flows_from_migr_asytpsm.py"
+DUMP = "data/migr_asytpsm_linear_2_0.csv"
+INCREMENT = 2     # months only the incremental run sees
+
+
+def iso2_to_iso3():
+    """The script's GEO -> ISO3 map, read without running the script."""
+    tree = ast.parse((ROOT / SCRIPT).read_text())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == "iso2_to_iso3":
+            return ast.literal_eval(node.value)
+    raise SystemExit(f"No iso2_to_iso3 in {SCRIPT}")
+
+
+def expected_order(header, rows):
+    """Hosts in the order of their first UA total row in the dump."""
+    col = {name: header.index(name) for name in ("citizen", "sex", "age", "geo")}
+    mapping = iso2_to_iso3()
+    order = []
+    for r in rows:
+        if (r[col["citizen"]], r[col["sex"]], r[col["age"]]) == ("UA", "T", "TOTAL"):
+            iso3 = mapping.get(r[col["geo"]])
+            if iso3 and iso3 not in order:
+                order.append(iso3)
+    return order
+
+
+def build(tree, header, rows, *args):
+    bench.write_fixture(tree / DUMP, header, rows, "citizen", "Z{:04d}", 1)
+    env = dict(os.environ, BB_CACHE_DIR=str(tree / ".cache" / "eurostat"),
+               BB_VERBOSITY="0", BB_METRICS="")
+    subprocess.run([sys.executable, SCRIPT, *args], cwd=tree, env=env, check=True)
+
+
+def snapshot(tree, name):
+    """Copy the outputs aside as <name>/ and return that directory."""
+    dest = tree / name
+    dest.mkdir()
+    shutil.copy2(tree / "data" / "flows_ua_agg.csv", dest)
+    shutil.copytree(tree / "data" / "flows_ua_series", dest / "flows_ua_series")
+    return dest
+
+
+def same_files(a, b):
+    cmp = filecmp.dircmp(a, b)
+    diff = cmp.left_only + cmp.right_only + filecmp.cmpfiles(a, b, cmp.common_files, shallow=False)[1]
+    return [str(Path(a, f)) for f in diff] + [
+        f for sub in cmp.common_dirs for f in same_files(Path(a, sub), Path(b, sub))]
+
+
+def main():
+    header, rows = bench.asytpsm_rows()
+    months = sorted({r[header.index("TIME_PERIOD")] for r in rows})
+    older = [r for r in rows if r[header.index("TIME_PERIOD")] <= months[-INCREMENT - 1]]
+
+    tmp = Path(tempfile.mkdtemp(prefix="bb-check-"))
+    try:
+        tree = tmp / "tree"
+        shutil.copytree(ROOT / "scripts", tree / "scripts",
+                        ignore=shutil.ignore_patterns("__pycache__"))
+        (tree / "data").mkdir()
+
+        build(tree, header, rows, "--series")
+        full = snapshot(tree, "full")
+        got = pd.read_csv(full / "flows_ua_agg.csv")["dest_iso3"].tolist()
+        want = expected_order(header, rows)
+        print("Full build, rows in dump order:", "ok" if got == want else "FAILED")
+        if got != want:
+            print("  expected:", want)
+            print("  got:     ", got)
+
+        shutil.rmtree(tree / "data")
+        (tree / "data").mkdir()
+        build(tree, header, older, "--series")
+        build(tree, header, rows, "--incremental")
+        (tree / "data" / "flows_ua_series" / "state.json").unlink()
+        (full / "flows_ua_series" / "state.json").unlink(missing_ok=True)
+        diff = same_files(full, snapshot(tree, "incremental"))
+        print(f"Incremental build (+{INCREMENT} months) matches the full build:",
+              "ok" if not diff else "FAILED")
+        for f in diff:
+            print("  differs:", f)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if got != want or diff:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Shared reader for Eurostat SDMX-CSV ("linear 2.0") extracts.
+
+Eurostat files carry ~20 columns per row, most of them long, repeated labels
+(STRUCTURE_NAME, "Observation status (Flag) V2 structure", ...).  The build
+scripts only need a handful of dimension codes plus OBS_VALUE, so columns are
+resolved from the header alone and only those are parsed:
+
+    cols = eurostat.resolve_columns(eurostat.read_header(SRC), {
+        "geo":   eurostat.GEO,
+        "time":  eurostat.TIME_PERIOD,
+        "value": eurostat.OBS_VALUE,
+    }, optional={"sex": eurostat.SEX})
+    df = eurostat.load(SRC, cols, values=["value"])
+
+The returned frame uses the clean names as columns, dimension codes as pandas
+categoricals and the value columns as floats (non-numeric cells -> NaN).
+
+Parsed projections are cached as LZ4-compressed Arrow IPC files under
+.cache/eurostat/ (override with BB_CACHE_DIR), keyed by the SHA-256 of the
+source file, the projection and LOADER_VERSION.  Later runs memory-map the
+cached file instead of re-tokenising the CSV.  The cache is capped at
+BB_CACHE_MAX_MB (default 2048) with least-recently-used files evicted first;
+pass cache=False (the scripts' --no-cache flag) to bypass it.  Without
+pyarrow installed the loader simply reads the CSV every time.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # cache is optional
+    pa = None
+
+# Bump whenever parsing/coercion changes, so stale cache entries are ignored
+LOADER_VERSION = 1
+
+CACHE_DIR = Path(os.environ.get("BB_CACHE_DIR") or
+                 Path(__file__).resolve().parents[1] / ".cache" / "eurostat")
+CACHE_MAX_MB = float(os.environ.get("BB_CACHE_MAX_MB", 2048))
+
+GEO         = ["geo", "GEO"]
+TIME_PERIOD = ["TIME_PERIOD", "time_period", "time", "TIME"]
+OBS_VALUE   = ["OBS_VALUE", "obs_value"]
+UNIT        = ["unit", "UNIT"]
+CITIZEN     = ["citizen", "CITIZEN"]
+SEX         = ["sex", "SEX"]
+AGE         = ["age", "AGE"]
+
+
+def read_header(path):
+    """Column names of an SDMX-CSV file, without reading any data rows."""
+    return list(pd.read_csv(path, comment="#", nrows=0).columns)
+
+
+def find_column(header, aliases):
+    """First header column matching one of the aliases, or None.
+
+    Exact matches win; otherwise names are compared stripped and
+    case-insensitively (Eurostat exports vary between 'geo' and 'GEO').
+    """
+    if isinstance(aliases, str):
+        aliases = [aliases]
+    for a in aliases:
+        if a in header:
+            return a
+    for a in aliases:
+        tgt = a.strip().lower()
+        for c in header:
+            if c.strip().lower() == tgt:
+                return c
+    return None
+
+
+def resolve_columns(header, columns, optional=None):
+    """Map clean names to source columns.
+
+    `columns` must all be present (SystemExit otherwise); `optional` ones are
+    left out of the result when missing.
+    """
+    col_map = {}
+    for name, aliases in columns.items():
+        found = find_column(header, aliases)
+        if found is None:
+            raise SystemExit(f"Could not find column for {name!r} (tried {aliases})")
+        col_map[name] = found
+    for name, aliases in (optional or {}).items():
+        found = find_column(header, aliases)
+        if found is not None:
+            col_map[name] = found
+    return col_map
+
+
+def _read_kwargs(col_map, values):
+    # Dimension codes are low-cardinality strings: parse them straight to
+    # categoricals; leave value columns to the parser, they are coerced later.
+    dtype = {src: "category" for name, src in col_map.items() if name not in values}
+    # (low_memory=False: the parser's internal blocks would otherwise infer
+    # categories of different dtypes, e.g. an all-"NA" block of citizen codes)
+    return dict(comment="#", usecols=list(col_map.values()), dtype=dtype,
+                low_memory=False)
+
+
+def _finish(df, col_map, values, value_dtype):
+    df = pd.DataFrame({name: df[src] for name, src in col_map.items()})
+    for name in values:
+        if name in df.columns:
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+            if value_dtype is not None:
+                df[name] = df[name].astype(value_dtype)
+    return df
+
+
+def add_cache_argument(parser):
+    """The --no-cache switch shared by the build scripts."""
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse the raw CSV, bypassing the columnar cache")
+
+
+# ---------------- columnar cache ----------------
+def _file_sha256(path):
+    """SHA-256 of a source file, memoised on (size, mtime) in the cache dir."""
+    path = Path(path).resolve()
+    st = path.stat()
+    index_path = CACHE_DIR / "index.json"
+    try:
+        index = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        index = {}
+    memo = index.get(str(path))
+    if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+        return memo[2]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    index[str(path)] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    tmp = index_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(index, indent=1))
+    tmp.replace(index_path)
+    return h.hexdigest()
+
+
+def _cache_path(path, col_map, values, value_dtype):
+    key = json.dumps([LOADER_VERSION, _file_sha256(path), sorted(col_map.items()),
+                      sorted(values), str(value_dtype)])
+    digest = hashlib.sha256(key.encode()).hexdigest()[:20]
+    return CACHE_DIR / f"{Path(path).stem[:40]}-{digest}.arrow"
+
+
+def _to_batch(df, dims, schema=None):
+    # Categories differ between chunks and the IPC file format cannot replace
+    # dictionaries mid-file, so dimensions are stored as plain strings
+    # (LZ4 still compresses the repeats away) and re-categorised on read.
+    df = df.astype({c: "object" for c in dims})
+    if schema is None:
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        for c in dims:
+            schema = schema.set(schema.get_field_index(c), pa.field(c, pa.string()))
+    return pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _from_batch(batch, dims):
+    df = batch.to_pandas()
+    return df.astype({c: "category" for c in dims})
+
+
+def _evict():
+    """Drop least-recently-used cache files until under CACHE_MAX_MB."""
+    files = []
+    for f in CACHE_DIR.glob("*.arrow"):
+        try:
+            st = f.stat()
+        except FileNotFoundError:  # evicted by a concurrent build
+            continue
+        files.append((st.st_mtime, st.st_size, f))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    limit = CACHE_MAX_MB * 1024 * 1024
+    for _, size, f in files:
+        if total <= limit:
+            break
+        total -= size
+        f.unlink(missing_ok=True)
+
+
+def _cached_batches(cache_file, dims):
+    os.utime(cache_file)  # mark as recently used
+    with pa.memory_map(str(cache_file)) as source:
+        reader = pa.ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield _from_batch(reader.get_batch(i), dims)
+
+
+def _cached_chunks(path, chunks, col_map, values, value_dtype, cache):
+    """Yield `chunks` (or their cached copy), writing the cache on a miss."""
+    if not cache or pa is None:
+        yield from chunks()
+        return
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    dims = [name for name in col_map if name not in values]
+    cache_file = _cache_path(path, col_map, values, value_dtype)
+    if cache_file.exists():
+        yield from _cached_batches(cache_file, dims)
+        return
+
+    # Write next to the final name and rename only once the whole file went
+    # through, so an interrupted run never leaves a truncated cache entry.
+    tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    writer = None
+    schema = None
+    caching = True
+    options = pa.ipc.IpcWriteOptions(compression="lz4")
+    try:
+        for chunk in chunks():
+            if caching:
+                try:
+                    batch = _to_batch(chunk, dims, schema)
+                    if writer is None:
+                        schema = batch.schema
+                        writer = pa.ipc.new_file(str(tmp), schema, options=options)
+                    writer.write_batch(batch)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    # e.g. an int64 value column turning float64 in a later
+                    # chunk: give up on caching this file, keep reading
+                    caching = False
+            yield chunk
+        if writer is not None and caching:
+            writer.close()
+            writer = None
+            tmp.replace(cache_file)
+            _evict()
+    finally:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+
+
+def load(path, col_map, values=("obs_value",), value_dtype="float64", cache=True):
+    """Read only the `col_map` columns of an SDMX-CSV file.
+
+    `col_map` comes from resolve_columns(); `values` names the clean columns
+    holding observations, cast to `value_dtype` (float32 halves their memory
+    where the precision is not needed; None keeps all-integer columns as
+    int64, so person counts are written without a trailing ".0").
+    """
+    def chunks():
+        df = pd.read_csv(path, **_read_kwargs(col_map, values))
+        yield _finish(df, col_map, values, value_dtype)
+
+    parts = list(_cached_chunks(path, chunks, col_map, values, value_dtype, cache))
+    if len(parts) == 1:
+        return parts[0]
+    # A cache written by iter_chunks() holds several batches
+    df = pd.concat(parts, ignore_index=True)
+    dims = [name for name in col_map if name not in values]
+    return df.astype({c: "category" for c in dims})
+
+
+def iter_chunks(path, col_map, values=("obs_value",), value_dtype="float64",
+                chunksize=500_000, cache=True):
+    """Like load(), but yields the file in chunks of `chunksize` rows.
+
+    Categories are inferred per chunk, so concatenating chunks yields plain
+    object columns; filter first, then concat.  Chunks served from the cache
+    keep the batch sizes of the run that wrote it.
+    """
+    def chunks():
+        reader = pd.read_csv(path, chunksize=chunksize, **_read_kwargs(col_map, values))
+        for chunk in reader:
+            yield _finish(chunk, col_map, values, value_dtype)
+
+    yield from _cached_chunks(path, chunks, col_map, values, value_dtype, cache)
@@ -0,0 +1,263 @@
+"""Step timings, memory and row counts for the build scripts, as JSON lines.
+
+A script marks the end of each named step; the step runs from the previous
+mark (or the start of the script):
+
+    df = eurostat.load(src, cols)
+    instrument.step("read", rows=len(df))
+    df = df[df["citizen"] == "UA"]
+    instrument.step("filter", rows=len(df))   # rows_in = the read's rows
+
+Every step appends one JSON object to the metrics file:
+
+    {"kind": "step", "run": ..., "stage": "flows", "script": "build_flows_...",
+     "step": "filter", "wall_s": 0.41, "cpu_s": 0.40, "peak_mb": 212.3,
+     "rows_in": 4300000, "rows_out": 35840, "ts": ...}
+
+peak_mb is the step's own high-water RSS on Linux (the counter is reset at
+each mark), the process's so far elsewhere.  build.py adds one "stage"
+record per stage and shares a run id between them.
+
+Environment:
+
+    BB_METRICS         metrics file ("-" = stderr); unset or "" = off, except
+                       under build.py, which defaults to .cache/metrics.jsonl
+    BB_METRICS_MAX_MB  size at which the file is rotated to <file>.1
+                       (default 16), replacing the previous .1
+    BB_VERBOSITY       0 warnings only, 1 progress (default), 2 debug
+                       previews and a line per step
+    BB_RUN_ID          groups the records of one build
+
+build.py's -v / -q / --metrics set them through configure().  A script run
+on its own takes --metrics and --profile through parse_args():
+
+    args = instrument.parse_args(parser)
+    python scripts/build_geometry.py --profile --metrics -
+
+info() and debug() replace bare prints; arguments that are callables are
+only evaluated when the line is printed, so costly previews (unique codes
+of a multi-million row column) are skipped at the default level.
+"""
+import atexit
+import cProfile
+import contextlib
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_METRICS = ROOT / ".cache" / "metrics.jsonl"
+PROFILE_DIR = ROOT / ".cache" / "profile"
+
+METRICS = os.environ.get("BB_METRICS", "")
+METRICS_MAX_MB = float(os.environ.get("BB_METRICS_MAX_MB", 16))
+VERBOSITY = int(os.environ.get("BB_VERBOSITY") or 1)
+RUN_ID = os.environ.get("BB_RUN_ID") or uuid.uuid4().hex[:12]
+
+_CLEAR_REFS = Path("/proc/self/clear_refs")
+
+_stage = None
+_lap = None           # (wall, cpu) at the previous mark
+_rows = None          # rows_out of the previous step
+_peak = 0.0           # highest peak_mb since the stage started
+
+
+def configure(verbosity=None, metrics=None, run_id=None):
+    """Override the environment settings, here and for child processes."""
+    global VERBOSITY, METRICS, RUN_ID
+    if verbosity is not None:
+        VERBOSITY = verbosity
+        os.environ["BB_VERBOSITY"] = str(verbosity)
+    if metrics is not None:
+        METRICS = str(metrics)
+        os.environ["BB_METRICS"] = METRICS
+    if run_id is not None:
+        RUN_ID = run_id
+        os.environ["BB_RUN_ID"] = run_id
+
+
+def parse_args(parser):
+    """Add --metrics / --profile to a script's parser, parse and apply them.
+
+    --profile runs the rest of the script under cProfile; the stats go to
+    <PROFILE_DIR>/<script>.pstats when it exits.
+    """
+    parser.add_argument("--metrics", metavar="PATH",
+                        help=f'append step metrics to PATH ("-" = stderr), '
+                             f'e.g. {DEFAULT_METRICS.relative_to(ROOT)}')
+    parser.add_argument("--profile", action="store_true",
+                        help=f"run under cProfile, stats in {PROFILE_DIR.relative_to(ROOT)}/")
+    args = parser.parse_args()
+    configure(metrics=args.metrics)
+    if args.profile:
+        profiler = cProfile.Profile()
+        atexit.register(_dump_profile, profiler, Path(sys.argv[0]).stem, PROFILE_DIR)
+        profiler.enable()
+    return args
+
+
+# ---------------- output ----------------
+def _emit(*args):
+    print(*(a() if callable(a) else a for a in args), flush=True)
+
+
+def info(*args):
+    """Progress lines ("Reading ...", "Rows: ..."), shown by default."""
+    if VERBOSITY >= 1:
+        _emit(*args)
+
+
+def debug(*args):
+    """Column maps, sample codes and previews; only with BB_VERBOSITY=2."""
+    if VERBOSITY >= 2:
+        _emit(*args)
+
+
+def warn(*args):
+    """Always shown."""
+    _emit(*args)
+
+
+def _write(record):
+    if not METRICS:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    if METRICS == "-":
+        sys.stderr.write(line)
+        return
+    path = Path(METRICS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if path.stat().st_size > METRICS_MAX_MB * 1e6:
+            path.replace(path.with_name(path.name + ".1"))
+    except FileNotFoundError:
+        pass
+    with open(path, "a") as f:
+        f.write(line)
+
+
+# ---------------- measurement ----------------
+def _peak_mb():
+    """High-water RSS since the last reset, in MB."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss: KiB on Linux, bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (
+        1 << 20 if sys.platform == "darwin" else 1 << 10)
+
+
+def _reset_peak():
+    try:
+        _CLEAR_REFS.write_text("5")
+    except OSError:
+        pass
+
+
+def _now():
+    return time.perf_counter(), time.process_time()
+
+
+def _reset():
+    global _lap, _rows, _peak
+    _reset_peak()
+    _lap, _rows, _peak = _now(), None, 0.0
+
+
+def _record(kind, name, since, **fields):
+    global _peak
+    wall, cpu = _now()
+    peak = _peak_mb()
+    _peak = max(_peak, peak)
+    return {
+        "kind": kind,
+        "run": RUN_ID,
+        "stage": _stage,
+        "script": Path(sys.argv[0]).stem,
+        "step": name,
+        "wall_s": round(wall - since[0], 4),
+        "cpu_s": round(cpu - since[1], 4),
+        "peak_mb": round(peak, 1),
+        **fields,
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+    }
+
+
+def step(name, rows=None, rows_in=None, **extra):
+    """Close the step that ran since the previous mark and record it.
+
+    `rows` is the step's output row count; `rows_in` defaults to the rows
+    of the step before.  Extra keyword arguments are stored as they are.
+    """
+    global _lap, _rows
+    record = _record("step", name, _lap,
+                     rows_in=_rows if rows_in is None else rows_in, rows_out=rows, **extra)
+    _write(record)
+    debug(f"  [{name}] {record['wall_s']:.3f} s wall, {record['cpu_s']:.3f} s cpu, "
+          f"{record['peak_mb']:.0f} MB peak"
+          + (f", {record['rows_in']} -> {rows} rows" if rows is not None else ""))
+    if rows is not None:
+        _rows = rows
+    _reset_peak()
+    _lap = _now()
+    return record
+
+
+@contextlib.contextmanager
+def stage(name, profile_dir=None):
+    """Scope the steps of one build stage and record the stage as a whole.
+
+    Yields a dict of extra fields for the stage record ("ok" is True unless
+    the block raises or the caller sets it).  With `profile_dir` the stage
+    runs under cProfile; the stats are dumped to <profile_dir>/<name>.pstats
+    and the top entries printed.
+    """
+    global _stage
+    _stage = name
+    _reset()
+    start = _lap
+    profiler = cProfile.Profile() if profile_dir else None
+    fields = {"ok": True}
+    try:
+        if profiler:
+            profiler.enable()
+        yield fields
+    except BaseException:
+        fields["ok"] = False
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        record = _record("stage", None, start, **fields)
+        record["peak_mb"] = round(max(_peak, record["peak_mb"]), 1)
+        _write(record)
+        _stage = None
+        if profiler:
+            _dump_profile(profiler, name, profile_dir)
+
+
+def _dump_profile(profiler, name, profile_dir):
+    """Write <profile_dir>/<name>.pstats and print the top entries."""
+    profiler.disable()
+    path = Path(profile_dir) / f"{name}.pstats"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(15)
+    info(f"[{name}] profile written to {path}")
+    info(out.getvalue())
+
+
+_reset()
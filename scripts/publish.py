@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Publish the site into dist/ with content-hashed, precompressed assets.
+
+Run after the data build:
+
+    python scripts/build.py && python scripts/publish.py
+    python scripts/publish.py --out site --no-brotli
+
+Every file under data/, js/ and css/ is copied under a name carrying the
+first HASH_LEN hex digits of its SHA-256 (data/bundle.bin ->
+data/bundle.1a2b3c4d5e.bin), so it can be served with a one-year
+"immutable" Cache-Control and never goes stale.  Directories the map
+addresses by URL template (vector tiles, the monthly series) are hashed as
+a whole instead: data/tiles/ -> data/tiles.<hash>/.  Raw Eurostat / Kiel
+inputs are build sources, not site assets, and are left out.
+
+The logical -> hashed mapping is written to dist/assets.json and inlined
+into dist/index.html as <script id="bb-assets" type="application/json">,
+where main.js's asset() reads it for every fetch; index.html's own script
+and stylesheet URLs are rewritten in place.  Next to each compressible file
+go .gz and (with the optional brotli package) .br variants for servers that
+serve precompressed siblings (nginx gzip_static / brotli_static, most
+CDNs).  dist/_headers carries the caching rules in the Netlify / Cloudflare
+Pages format.
+
+The front-end libraries under js/vendor/ and css/vendor/ are fetched with
+vendor.py first if any is missing; --no-vendor skips that and leaves the
+site loading them from the CDN.
+"""
+import argparse
+import fnmatch
+import gzip
+import hashlib
+import html
+import json
+import re
+import shutil
+from pathlib import Path
+
+import vendor
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional
+    brotli = None
+
+ROOT = Path(__file__).resolve().parents[1]
+ASSET_DIRS = ["data", "js", "css"]
+# Fetched through a URL template, so hashed as one directory
+HASHED_DIRS = ["data/tiles", "data/flows_ua_series"]
+# Build inputs that live in data/ but are never served
+SOURCES = ["*_linear_2_0.csv", "*.xlsx"]
+# Served from the site root under their own names
+ROOT_FILES = ["*.ico", "*.png", "*.svg"]
+
+HASH_LEN = 10
+MIN_COMPRESS = 1024          # bytes; smaller files go out as they are
+MAX_RATIO = 0.9              # keep a variant only if it saves 10%
+INCOMPRESSIBLE = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".woff2", ".zip", ".gz", ".br"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+
+def hashed_name(rel, h):
+    """data/europe.lod1.topo.json -> data/europe.lod1.topo.<h>.json"""
+    p = Path(rel)
+    return str(p.with_name(f"{p.stem}.{h}{p.suffix}" if p.suffix else f"{p.name}.{h}"))
+
+
+def is_source(path):
+    return any(fnmatch.fnmatch(path.name, pat) for pat in SOURCES)
+
+
+def compress(path, use_brotli):
+    """Write .gz / .br next to `path`; returns the variants written."""
+    if path.suffix.lower() in INCOMPRESSIBLE or path.stat().st_size < MIN_COMPRESS:
+        return []
+    data = path.read_bytes()
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if use_brotli:
+        variants.append((".br", brotli.compress(data, quality=11)))
+    written = []
+    for ext, packed in variants:
+        if len(packed) <= MAX_RATIO * len(data):
+            path.with_name(path.name + ext).write_bytes(packed)
+            written.append(ext)
+    return written
+
+
+def publish_dir(rel, out):
+    """Copy a HASHED_DIRS entry to <rel>.<hash>/; the hash covers every file."""
+    src = ROOT / rel
+    files = sorted(p for p in src.rglob("*") if p.is_file())
+    h = hashlib.sha256()
+    for p in files:
+        h.update(p.relative_to(src).as_posix().encode() + b"\0")
+        h.update(hashlib.sha256(p.read_bytes()).digest())
+    dest = f"{rel}.{h.hexdigest()[:HASH_LEN]}"
+    shutil.copytree(src, out / dest)
+    return dest, [out / dest / p.relative_to(src) for p in files]
+
+
+def rewrite_index(text, files, manifest):
+    """Point index.html's local src/href at the hashed copies and inline
+    the manifest ahead of the first script."""
+    def swap(m):
+        url = html.unescape(m.group(2)).split("?")[0].split("#")[0]
+        return f'{m.group(1)}="{html.escape(files[url])}"' if url in files else m.group(0)
+
+    text = re.sub(r'\b(src|href)="([^"]+)"', swap, text)
+    inline = ('<script id="bb-assets" type="application/json">'
+              + json.dumps(manifest, separators=(",", ":")).replace("</", "<\\/")
+              + "</script>\n  ")
+    at = text.find("<script")
+    if at < 0:
+        raise SystemExit("index.html has no <script> tag to put the asset manifest before")
+    return text[:at] + inline + text[at:]
+
+
+def headers():
+    rules = [(f"/{d}/*", IMMUTABLE) for d in ASSET_DIRS]
+    rules += [("/", "no-cache"), ("/index.html", "no-cache"), ("/assets.json", "no-cache")]
+    return "".join(f"{path}\n  Cache-Control: {value}\n" for path, value in rules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, default=ROOT / "dist",
+                        help="output directory, replaced on every run (default: dist/)")
+    parser.add_argument("--no-brotli", action="store_true", help="skip the .br variants")
+    parser.add_argument("--no-vendor", action="store_true",
+                        help="do not fetch missing vendored libraries (the site uses the CDN)")
+    args = parser.parse_args()
+
+    out = args.out.resolve()
+    if out == ROOT or ROOT.is_relative_to(out):
+        raise SystemExit(f"Refusing to replace {out}")
+    use_brotli = brotli is not None and not args.no_brotli
+    if brotli is None and not args.no_brotli:
+        print("brotli not installed; writing .gz variants only")
+
+    if not args.no_vendor and vendor.missing():
+        print("Vendoring", ", ".join(vendor.missing()))
+        vendor.vendor()
+
+    if out.exists():
+        shutil.rmtree(out)
+    out.mkdir(parents=True)
+
+    files, dirs, written = {}, {}, []
+    for rel in HASHED_DIRS:
+        if (ROOT / rel).is_dir():
+            dest, copied = publish_dir(rel, out)
+            dirs[rel + "/"] = dest + "/"
+            written += copied
+            print(f"{rel}/ -> {dest}/ ({len(copied)} files)")
+
+    for top in ASSET_DIRS:
+        for src in sorted((ROOT / top).rglob("*")):
+            rel = src.relative_to(ROOT).as_posix()
+            if (not src.is_file() or is_source(src)
+                    or any(rel.startswith(d + "/") for d in HASHED_DIRS)):
+                continue
+            data = src.read_bytes()
+            dest = hashed_name(rel, digest(data))
+            (out / dest).parent.mkdir(parents=True, exist_ok=True)
+            (out / dest).write_bytes(data)
+            files[rel] = dest
+            written.append(out / dest)
+    print(f"Hashed {len(files)} files under {', '.join(ASSET_DIRS)}/")
+
+    for pat in ROOT_FILES:
+        for src in ROOT.glob(pat):
+            shutil.copy2(src, out / src.name)
+            written.append(out / src.name)
+
+    manifest = {"version": 1, "files": files, "dirs": dirs}
+    (out / "assets.json").write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    index = rewrite_index((ROOT / "index.html").read_text(encoding="utf-8"), files, manifest)
+    (out / "index.html").write_text(index, encoding="utf-8")
+    (out / "_headers").write_text(headers())
+    written += [out / "index.html", out / "assets.json"]
+
+    raw = packed = 0
+    for path in written:
+        variants = compress(path, use_brotli)
+        if variants:
+            raw += path.stat().st_size
+            packed += path.with_name(path.name + variants[-1]).stat().st_size
+    print(f"Compressed {raw / 1e6:.2f} MB of text to {packed / 1e6:.2f} MB"
+          f" ({'.br' if use_brotli else '.gz'})")
+    print("Writing", out)
+
+
+if __name__ == "__main__":
+    main()
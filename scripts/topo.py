@@ -0,0 +1,76 @@
+"""Shared helpers for the basemap geometry written by build_geometry.py.
+
+    countries = topo.read(BASE / "data" / "europe.topo.json")
+    for c in countries:
+        c.id, c.name, c.polygons   # polygons: [[shell, hole, ...], ...]
+
+Rings come back as closed (n, 2) float arrays of lon/lat.  clip_ring() is
+the Sutherland-Hodgman clip build_geometry.py uses for the viewport; the
+tile and index builds reuse it on projected coordinates.
+"""
+import json
+from collections import namedtuple
+
+import numpy as np
+
+Country = namedtuple("Country", "id name polygons")
+
+
+def clip_ring(ring, box):
+    """Sutherland-Hodgman clip of one closed ring to an axis-aligned box.
+
+    Returns the clipped ring as an (n, 2) array without the closing point,
+    or None when nothing is left.  Parts of a concave ring outside the box
+    collapse onto its edge, which is invisible once the box is the viewport.
+    """
+    x0, y0, x1, y1 = box
+    pts = np.asarray(ring, dtype=float)[:-1]
+    lo, hi = pts.min(axis=0), pts.max(axis=0)
+    if lo[0] >= x1 or hi[0] <= x0 or lo[1] >= y1 or hi[1] <= y0:
+        return None
+    if lo[0] >= x0 and hi[0] <= x1 and lo[1] >= y0 and hi[1] <= y1:
+        return pts
+
+    for axis, bound, keep_above in ((0, x0, True), (0, x1, False),
+                                    (1, y0, True), (1, y1, False)):
+        if len(pts) == 0:
+            return None
+        inside = pts[:, axis] >= bound if keep_above else pts[:, axis] <= bound
+        out_pts = []
+        prev, prev_in = pts[-1], inside[-1]
+        for cur, cur_in in zip(pts, inside):
+            if cur_in != prev_in:
+                t = (bound - prev[axis]) / (cur[axis] - prev[axis])
+                out_pts.append(prev + t * (cur - prev))
+            if cur_in:
+                out_pts.append(cur)
+            prev, prev_in = cur, cur_in
+        pts = np.array(out_pts) if out_pts else np.empty((0, 2))
+    return pts if len(pts) >= 3 else None
+
+
+def read(path):
+    """Decode a quantized TopoJSON file into a list of Country tuples."""
+    with open(path) as f:
+        data = json.load(f)
+    scale = np.asarray(data["transform"]["scale"], dtype=float)
+    translate = np.asarray(data["transform"]["translate"], dtype=float)
+    arcs = [np.cumsum(np.asarray(a, dtype=np.int64), axis=0) * scale + translate
+            for a in data["arcs"]]
+
+    def ring(refs):
+        parts = []
+        for r in refs:
+            arc = arcs[r] if r >= 0 else arcs[~r][::-1]
+            parts.append(arc if not parts else arc[1:])
+        return np.concatenate(parts)
+
+    countries = []
+    for obj in data["objects"].values():
+        for g in obj["geometries"]:
+            polys = g["arcs"] if g["type"] == "MultiPolygon" else [g["arcs"]]
+            props = g.get("properties", {})
+            countries.append(Country(g.get("id") or props.get("ISO_A3"),
+                                     props.get("NAME_EN"),
+                                     [[ring(r) for r in rings] for rings in polys]))
+    return countries
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Vendor the front-end libraries into js/vendor/ and css/vendor/.
+
+    python scripts/vendor.py            # fetch the pinned versions
+    python scripts/vendor.py --list     # what would be written
+
+The files are not committed: they only exist once this has run.
+publish.py runs it when any of the files is missing, so a published site
+always carries them; main.js falls back to the CDN otherwise.
+
+The map used to pull d3 and topojson-client from jsdelivr one after the
+other and Leaflet from unpkg.  This fetches pinned npm releases once and
+writes plain files the site serves itself (and publish.py hashes like any
+other asset):
+
+    js/vendor/d3.min.js               only the d3 modules main.js uses
+    js/vendor/topojson-client.min.js
+    js/vendor/leaflet.js
+    css/vendor/leaflet.css
+    js/vendor/LICENSES.txt
+
+d3.min.js is the modules' own UMD builds concatenated in dependency order;
+each adds its exports to the global d3, so no bundler is needed.  Tarballs
+are checked against the registry's sha512 integrity before anything is
+extracted.  Leaflet's marker and layer-control images are not copied: the
+map uses neither.
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import tarfile
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+REGISTRY = "https://registry.npmjs.org"
+
+# d3 v7's modules that main.js calls into, dependencies first
+D3_MODULES = [
+    ("d3-array", "3.2.4"),           # group, sum, min, max; scales
+    ("d3-color", "3.1.0"),           # color
+    ("d3-interpolate", "3.0.1"),     # interpolateRgb
+    ("d3-format", "3.1.0"),          # format
+    ("d3-time", "3.1.0"),
+    ("d3-time-format", "4.1.0"),     # timeFormat, timeParse
+    ("d3-scale", "4.0.2"),           # scaleLinear, scaleLog, scaleSequential
+    ("d3-scale-chromatic", "3.1.0"), # interpolatePlasma
+    ("d3-selection", "3.0.0"),       # select
+    ("d3-dispatch", "3.0.1"),
+    ("d3-timer", "3.0.1"),
+    ("d3-ease", "3.0.1"),            # easeCubicOut
+    ("d3-transition", "3.0.1"),      # selection.transition
+]
+# package, version, {file in the tarball: destination}
+PACKAGES = [
+    ("topojson-client", "3.1.0", {"dist/topojson-client.min.js": "js/vendor/topojson-client.min.js"}),
+    ("leaflet", "1.9.4", {"dist/leaflet.js": "js/vendor/leaflet.js",
+                          "dist/leaflet.css": "css/vendor/leaflet.css"}),
+]
+D3_OUT = "js/vendor/d3.min.js"
+LICENSES_OUT = "js/vendor/LICENSES.txt"
+LICENSE_NAMES = ("LICENSE", "LICENSE.md", "LICENSE.txt")
+
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=60) as r:
+            return r.read()
+    except urllib.error.URLError as e:
+        raise SystemExit(f"Could not fetch {url}: {e.reason}")
+
+
+def tarball(name, version):
+    """{path inside package/: bytes} of a verified npm release."""
+    meta = json.loads(fetch(f"{REGISTRY}/{name}/{version}"))
+    data = fetch(meta["dist"]["tarball"])
+    algo, _, expected = meta["dist"]["integrity"].partition("-")
+    if algo != "sha512" or base64.b64encode(hashlib.sha512(data).digest()).decode() != expected:
+        raise SystemExit(f"{name}@{version}: tarball does not match the registry's integrity hash")
+    files = {}
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        for member in tar.getmembers():
+            if member.isfile():
+                files[member.name.split("/", 1)[1]] = tar.extractfile(member).read()
+    return files
+
+
+def license_text(name, version, files):
+    text = next((files[n] for n in LICENSE_NAMES if n in files), None)
+    if text is None:
+        raise SystemExit(f"{name}@{version}: no license file in the package")
+    return f"{name}@{version}\n\n{text.decode().strip()}\n"
+
+
+def outputs():
+    """Every file vendor() writes, relative to the repository root."""
+    return [D3_OUT] + [dest for _, _, wanted in PACKAGES for dest in wanted.values()] + [LICENSES_OUT]
+
+
+def missing():
+    return [dest for dest in outputs() if not (ROOT / dest).is_file()]
+
+
+def vendor():
+    """Fetch, verify and write the pinned libraries."""
+    outputs, licenses, d3_parts = {}, [], []
+    for name, version in D3_MODULES:
+        print(f"Fetching {name}@{version}")
+        files = tarball(name, version)
+        src = f"dist/{name}.min.js"
+        if src not in files:
+            raise SystemExit(f"{name}@{version}: no {src}")
+        d3_parts.append(f"// {name}@{version}\n".encode() + files[src].rstrip() + b"\n")
+        licenses.append(license_text(name, version, files))
+    outputs[D3_OUT] = b"".join(d3_parts)
+
+    for name, version, wanted in PACKAGES:
+        print(f"Fetching {name}@{version}")
+        files = tarball(name, version)
+        for src, dest in wanted.items():
+            if src not in files:
+                raise SystemExit(f"{name}@{version}: no {src}")
+            outputs[dest] = files[src]
+        licenses.append(license_text(name, version, files))
+    outputs[LICENSES_OUT] = "\n\n".join(licenses).encode()
+
+    for dest, data in outputs.items():
+        path = ROOT / dest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        print(f"Writing {dest} ({len(data) / 1024:.0f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="print the pinned packages and outputs")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, version in D3_MODULES:
+            print(f"{name}@{version} -> {D3_OUT}")
+        for name, version, wanted in PACKAGES:
+            for dest in wanted.values():
+                print(f"{name}@{version} -> {dest}")
+        return
+    vendor()
+
+
+if __name__ == "__main__":
+    main()